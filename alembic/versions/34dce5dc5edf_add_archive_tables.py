@@ -0,0 +1,115 @@
+"""Add archive tables
+
+Revision ID: 34dce5dc5edf
+Revises: 54f33f6fc7d8
+Create Date: 2026-10-18 21:19:34.771042
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '34dce5dc5edf'
+down_revision = '54f33f6fc7d8'
+branch_labels = None
+depends_on = None
+
+# Триггеры версии кэша на charityproject из ревизии a5ca1fa3bb17.
+VERSION_TRIGGERS = [
+    f'CREATE TRIGGER charityproject_version_{operation.lower()} '
+    f'AFTER {operation} ON charityproject '
+    'BEGIN UPDATE cacheversion SET version = version + 1 '
+    "WHERE name = 'charityproject'; END"
+    for operation in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+
+def set_autoincrement(table: str, enabled: bool):
+    # В SQLite AUTOINCREMENT задаётся только при создании таблицы.
+    # Пересоздание таблицы удаляет её триггеры.
+    with op.batch_alter_table(
+        table,
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': enabled},
+    ):
+        pass
+
+
+def upgrade():
+    op.create_table(
+        'charityproject_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('full_amount', sa.Integer(), nullable=False),
+        sa.Column('fully_invested', sa.Boolean(), nullable=True),
+        sa.Column('create_date', sa.DateTime(), nullable=False),
+        sa.Column('close_date', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('invested_amount', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'donation_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('full_amount', sa.Integer(), nullable=False),
+        sa.Column('invested_amount', sa.Integer(), nullable=False),
+        sa.Column('fully_invested', sa.Boolean(), nullable=True),
+        sa.Column('create_date', sa.DateTime(), nullable=False),
+        sa.Column('close_date', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'investment_allocation_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('donation_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_charityproject_archive_create_date',
+        'charityproject_archive',
+        ['create_date'],
+    )
+    op.create_index(
+        'ix_donation_archive_create_date', 'donation_archive', ['create_date']
+    )
+    op.create_index(
+        'ix_donation_archive_user_id_create_date',
+        'donation_archive',
+        ['user_id', 'create_date'],
+    )
+    op.create_index(
+        'ix_investment_allocation_archive_donation_id',
+        'investment_allocation_archive',
+        ['donation_id'],
+    )
+    op.create_index(
+        'ix_investment_allocation_archive_project_id',
+        'investment_allocation_archive',
+        ['project_id'],
+    )
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # id не переиспользуются после переноса строк в архив.
+    for table in ('charityproject', 'donation'):
+        set_autoincrement(table, True)
+    for statement in VERSION_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in ('charityproject', 'donation'):
+            set_autoincrement(table, False)
+        for statement in VERSION_TRIGGERS:
+            op.execute(statement)
+    op.drop_table('investment_allocation_archive')
+    op.drop_table('donation_archive')
+    op.drop_table('charityproject_archive')
@@ -0,0 +1,33 @@
+"""Add row versions
+
+Revision ID: 48e3e85b4f9e
+Revises: b5eb8adbe933
+Create Date: 2026-10-18 21:07:40.118524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '48e3e85b4f9e'
+down_revision = 'b5eb8adbe933'
+branch_labels = None
+depends_on = None
+
+TABLES = ('charityproject', 'donation')
+
+
+def upgrade():
+    # Существующие строки получают версию 1, как новые строки ORM.
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column(
+                'version', sa.Integer(), server_default='1', nullable=False
+            ))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
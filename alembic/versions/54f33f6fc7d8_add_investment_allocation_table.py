@@ -0,0 +1,45 @@
+"""Add investment_allocation table
+
+Revision ID: 54f33f6fc7d8
+Revises: a5ca1fa3bb17
+Create Date: 2026-10-18 21:15:51.260318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '54f33f6fc7d8'
+down_revision = 'a5ca1fa3bb17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'investment_allocation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('donation_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['donation_id'], ['donation.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['charityproject.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        'ix_investment_allocation_donation_id',
+        'investment_allocation',
+        ['donation_id'],
+    )
+    op.create_index(
+        'ix_investment_allocation_project_id',
+        'investment_allocation',
+        ['project_id'],
+    )
+
+
+def downgrade():
+    op.drop_table('investment_allocation')
@@ -0,0 +1,33 @@
+"""Add list indexes
+
+Revision ID: 92bf255d64e6
+Revises: 48e3e85b4f9e
+Create Date: 2026-10-18 21:09:03.552981
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '92bf255d64e6'
+down_revision = '48e3e85b4f9e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_charityproject_create_date', 'charityproject', ['create_date']
+    )
+    op.create_index('ix_donation_create_date', 'donation', ['create_date'])
+    op.create_index(
+        'ix_donation_user_id_create_date',
+        'donation',
+        ['user_id', 'create_date'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_donation_user_id_create_date', 'donation')
+    op.drop_index('ix_donation_create_date', 'donation')
+    op.drop_index('ix_charityproject_create_date', 'charityproject')
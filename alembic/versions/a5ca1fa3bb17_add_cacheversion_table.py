@@ -0,0 +1,57 @@
+"""Add cacheversion table
+
+Revision ID: a5ca1fa3bb17
+Revises: 92bf255d64e6
+Create Date: 2026-10-18 21:12:26.904713
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5ca1fa3bb17'
+down_revision = '92bf255d64e6'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ('charityproject',)
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def upgrade():
+    op.create_table(
+        'cacheversion',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('epoch', sa.String(length=16), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    # Версии ведут только триггеры SQLite.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TRACKED_TABLES:
+        op.execute(
+            'INSERT INTO cacheversion (name, epoch, version) '
+            f"VALUES ('{table}', lower(hex(randomblob(8))), 0)"
+        )
+        for operation in OPERATIONS:
+            op.execute(
+                f'CREATE TRIGGER {table}_version_{operation.lower()} '
+                f'AFTER {operation} ON {table} '
+                'BEGIN UPDATE cacheversion SET version = version + 1 '
+                f"WHERE name = '{table}'; END"
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in TRACKED_TABLES:
+            for operation in OPERATIONS:
+                op.execute(
+                    'DROP TRIGGER IF EXISTS '
+                    f'{table}_version_{operation.lower()}'
+                )
+    op.drop_table('cacheversion')
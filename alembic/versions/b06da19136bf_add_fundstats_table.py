@@ -0,0 +1,96 @@
+"""Add fundstats table
+
+Revision ID: b06da19136bf
+Revises: ece9c92a1135
+Create Date: 2026-10-18 23:02:15.640187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b06da19136bf'
+down_revision = 'ece9c92a1135'
+branch_labels = None
+depends_on = None
+
+STATS_SHARDS = 16
+PROJECT_METRICS = {
+    'projects': '1',
+    'projects_closed': 'COALESCE({row}.fully_invested, 0)',
+    'projects_goal': '{row}.full_amount',
+    'projects_invested': '{row}.invested_amount',
+}
+DONATION_METRICS = {
+    'donations': '1',
+    'donations_closed': 'COALESCE({row}.fully_invested, 0)',
+    'donations_amount': '{row}.full_amount',
+    'donations_invested': '{row}.invested_amount',
+}
+FUND_STATS_COLUMNS = [*PROJECT_METRICS, *DONATION_METRICS]
+CHANGES = {
+    'insert': ('NEW', '+ ({new})'),
+    'delete': ('OLD', '- ({old})'),
+    'update': ('NEW', '+ ({new}) - ({old})'),
+}
+TABLES = {
+    'charityproject': PROJECT_METRICS,
+    'charityproject_archive': PROJECT_METRICS,
+    'donation': DONATION_METRICS,
+    'donation_archive': DONATION_METRICS,
+}
+
+
+def upgrade():
+    op.create_table(
+        'fundstats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        *(
+            sa.Column(column, sa.BigInteger(), nullable=False)
+            for column in FUND_STATS_COLUMNS
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        'WITH RECURSIVE shard(id) AS (SELECT 1 UNION ALL '
+        f'SELECT id + 1 FROM shard WHERE id < {STATS_SHARDS}) '
+        f'INSERT INTO fundstats (id, {", ".join(FUND_STATS_COLUMNS)}) '
+        f'SELECT id{", 0" * len(FUND_STATS_COLUMNS)} FROM shard'
+    )
+    # Счётчики ведут только триггеры SQLite.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # Начальные значения — по уже существующим строкам, в их шарды.
+    for table, metrics in TABLES.items():
+        assignments = ', '.join(
+            f'{column} = {column} + (SELECT COALESCE(SUM('
+            f"{expression.format(row='source')}), 0) FROM {table} "
+            f'AS source WHERE source.id % {STATS_SHARDS} + 1 = fundstats.id)'
+            for column, expression in metrics.items()
+        )
+        op.execute(f'UPDATE fundstats SET {assignments}')
+        for operation, (row, change) in CHANGES.items():
+            assignments = ', '.join(
+                f'{column} = {column} ' + change.format(
+                    new=expression.format(row='NEW'),
+                    old=expression.format(row='OLD'),
+                )
+                for column, expression in metrics.items()
+            )
+            op.execute(
+                f'CREATE TRIGGER {table}_fund_stats_{operation} '
+                f'AFTER {operation.upper()} ON {table} '
+                f'BEGIN UPDATE fundstats SET {assignments} '
+                f'WHERE id = {row}.id % {STATS_SHARDS} + 1; END'
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in TABLES:
+            for operation in CHANGES:
+                op.execute(
+                    f'DROP TRIGGER IF EXISTS {table}_fund_stats_{operation}'
+                )
+    op.drop_table('fundstats')
@@ -0,0 +1,31 @@
+"""Add FIFO indexes
+
+Revision ID: b5eb8adbe933
+Revises: b93df3a7b697
+Create Date: 2026-10-18 21:05:12.417305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5eb8adbe933'
+down_revision = 'b93df3a7b697'
+branch_labels = None
+depends_on = None
+
+TABLES = ('charityproject', 'donation')
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_fully_invested_create_date',
+            table,
+            ['fully_invested', 'create_date'],
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_fully_invested_create_date', table)
@@ -0,0 +1,118 @@
+"""Add donortotals table
+
+Revision ID: cbd71a4fcdd7
+Revises: d90d4c8896e6
+Create Date: 2026-10-18 23:34:09.517264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cbd71a4fcdd7'
+down_revision = 'd90d4c8896e6'
+branch_labels = None
+depends_on = None
+
+TABLES = ('donation', 'donation_archive')
+TRIGGER_SUFFIXES = ('insert', 'delete', 'update', 'move')
+
+
+def donor_totals_add(row: str) -> str:
+    return (
+        'INSERT INTO donortotals '
+        '(user_id, donations, amount, invested, last_donation_date) '
+        f'VALUES ({row}.user_id, 1, {row}.full_amount, '
+        f'{row}.invested_amount, {row}.create_date) '
+        'ON CONFLICT (user_id) DO UPDATE SET '
+        'donations = donations + 1, '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested, '
+        'last_donation_date = max('
+        'coalesce(last_donation_date, excluded.last_donation_date), '
+        'excluded.last_donation_date);'
+    )
+
+
+def donor_totals_remove(row: str) -> str:
+    return (
+        'UPDATE donortotals SET donations = donations - 1, '
+        f'amount = amount - {row}.full_amount, '
+        f'invested = invested - {row}.invested_amount '
+        f'WHERE user_id = {row}.user_id;'
+    )
+
+
+def donor_totals_triggers(table: str) -> list[str]:
+    name = f'{table}_donor_totals'
+    changed = (
+        'OLD.full_amount IS NOT NEW.full_amount OR '
+        'OLD.invested_amount IS NOT NEW.invested_amount'
+    )
+    delta = (
+        'UPDATE donortotals SET '
+        'amount = amount + NEW.full_amount - OLD.full_amount, '
+        'invested = invested + NEW.invested_amount - OLD.invested_amount '
+        'WHERE user_id = NEW.user_id;'
+    )
+    return [
+        f'CREATE TRIGGER {name}_insert AFTER INSERT ON {table} '
+        f"BEGIN {donor_totals_add('NEW')} END",
+        f'CREATE TRIGGER {name}_delete AFTER DELETE ON {table} '
+        f"BEGIN {donor_totals_remove('OLD')} END",
+        f'CREATE TRIGGER {name}_update AFTER UPDATE ON {table} '
+        f'WHEN OLD.user_id IS NEW.user_id AND ({changed}) '
+        f'BEGIN {delta} END',
+        f'CREATE TRIGGER {name}_move AFTER UPDATE ON {table} '
+        'WHEN OLD.user_id IS NOT NEW.user_id '
+        f"BEGIN {donor_totals_remove('OLD')} {donor_totals_add('NEW')} END",
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'donortotals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('donations', sa.BigInteger(), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=False),
+        sa.Column('invested', sa.BigInteger(), nullable=False),
+        sa.Column('last_donation_date', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id'),
+    )
+    op.create_index(
+        'ix_donortotals_amount_user_id',
+        'donortotals',
+        [sa.text('amount DESC'), 'user_id'],
+    )
+    # Итоги ведут только триггеры SQLite.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    history = ' UNION ALL '.join(
+        'SELECT user_id, create_date, full_amount, invested_amount '
+        f'FROM {table}'
+        for table in TABLES
+    )
+    # Начальные итоги — по уже существующим пожертвованиям.
+    op.execute(
+        'INSERT INTO donortotals '
+        '(user_id, donations, amount, invested, last_donation_date) '
+        'SELECT user_id, count(*), sum(full_amount), sum(invested_amount), '
+        f'max(create_date) FROM ({history}) GROUP BY user_id'
+    )
+    for table in TABLES:
+        for statement in donor_totals_triggers(table):
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in TABLES:
+            for suffix in TRIGGER_SUFFIXES:
+                op.execute(
+                    f'DROP TRIGGER IF EXISTS {table}_donor_totals_{suffix}'
+                )
+    op.drop_table('donortotals')
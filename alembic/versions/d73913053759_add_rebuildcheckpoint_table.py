@@ -0,0 +1,32 @@
+"""Add rebuildcheckpoint table
+
+Revision ID: d73913053759
+Revises: 34dce5dc5edf
+Create Date: 2026-10-18 21:24:08.390215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd73913053759'
+down_revision = '34dce5dc5edf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rebuildcheckpoint',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('state', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('rebuildcheckpoint')
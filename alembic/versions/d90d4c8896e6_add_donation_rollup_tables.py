@@ -0,0 +1,111 @@
+"""Add donation rollup tables
+
+Revision ID: d90d4c8896e6
+Revises: b06da19136bf
+Create Date: 2026-10-18 23:20:41.308722
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd90d4c8896e6'
+down_revision = 'b06da19136bf'
+branch_labels = None
+depends_on = None
+
+TABLES = ('donation', 'donation_archive')
+TRIGGER_SUFFIXES = ('insert', 'delete', 'update', 'move')
+# Таблица сводки и начало интервала в том виде, в каком SQLite
+# хранит DateTime.
+ROLLUPS = {
+    'donationhourlyrollup': '%Y-%m-%d %H:00:00.000000',
+    'donationdailyrollup': '%Y-%m-%d 00:00:00.000000',
+}
+
+
+def rollup_upsert(rollup: str, bucket: str, row: str, sign: str) -> str:
+    return (
+        f'INSERT INTO {rollup} (start, donations, amount, invested) '
+        f"VALUES (strftime('{bucket}', {row}.create_date), "
+        f'{sign}1, {sign}{row}.full_amount, {sign}{row}.invested_amount) '
+        'ON CONFLICT (start) DO UPDATE SET '
+        'donations = donations + excluded.donations, '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested;'
+    )
+
+
+def rollup_triggers(table: str, rollup: str, bucket: str) -> list[str]:
+    name = f'{table}_{rollup}'
+    changed = (
+        'OLD.full_amount IS NOT NEW.full_amount OR '
+        'OLD.invested_amount IS NOT NEW.invested_amount'
+    )
+    delta = (
+        f'INSERT INTO {rollup} (start, donations, amount, invested) '
+        f"VALUES (strftime('{bucket}', NEW.create_date), 0, "
+        'NEW.full_amount - OLD.full_amount, '
+        'NEW.invested_amount - OLD.invested_amount) '
+        'ON CONFLICT (start) DO UPDATE SET '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested;'
+    )
+    return [
+        f'CREATE TRIGGER {name}_insert AFTER INSERT ON {table} '
+        f"BEGIN {rollup_upsert(rollup, bucket, 'NEW', '+')} END",
+        f'CREATE TRIGGER {name}_delete AFTER DELETE ON {table} '
+        f"BEGIN {rollup_upsert(rollup, bucket, 'OLD', '-')} END",
+        f'CREATE TRIGGER {name}_update AFTER UPDATE ON {table} '
+        f'WHEN OLD.create_date IS NEW.create_date AND ({changed}) '
+        f'BEGIN {delta} END',
+        f'CREATE TRIGGER {name}_move AFTER UPDATE ON {table} '
+        'WHEN OLD.create_date IS NOT NEW.create_date '
+        f"BEGIN {rollup_upsert(rollup, bucket, 'OLD', '-')} "
+        f"{rollup_upsert(rollup, bucket, 'NEW', '+')} END",
+    ]
+
+
+def upgrade():
+    for rollup in ROLLUPS:
+        op.create_table(
+            rollup,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('start', sa.DateTime(), nullable=False),
+            sa.Column('donations', sa.BigInteger(), nullable=False),
+            sa.Column('amount', sa.BigInteger(), nullable=False),
+            sa.Column('invested', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('start'),
+        )
+    # Сводки ведут только триггеры SQLite.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    history = ' UNION ALL '.join(
+        f'SELECT create_date, full_amount, invested_amount FROM {table}'
+        for table in TABLES
+    )
+    for rollup, bucket in ROLLUPS.items():
+        # Начальные строки — по уже существующим пожертвованиям.
+        op.execute(
+            f'INSERT INTO {rollup} (start, donations, amount, invested) '
+            f"SELECT strftime('{bucket}', create_date) "
+            'AS bucket, count(*), sum(full_amount), sum(invested_amount) '
+            f'FROM ({history}) GROUP BY bucket'
+        )
+        for table in TABLES:
+            for statement in rollup_triggers(table, rollup, bucket):
+                op.execute(statement)
+
+
+def downgrade():
+    for rollup in ROLLUPS:
+        if op.get_bind().dialect.name == 'sqlite':
+            for table in TABLES:
+                for suffix in TRIGGER_SUFFIXES:
+                    op.execute(
+                        'DROP TRIGGER IF EXISTS '
+                        f'{table}_{rollup}_{suffix}'
+                    )
+        op.drop_table(rollup)
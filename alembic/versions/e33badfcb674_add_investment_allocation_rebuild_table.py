@@ -0,0 +1,32 @@
+"""Add investment_allocation_rebuild table
+
+Revision ID: e33badfcb674
+Revises: cbd71a4fcdd7
+Create Date: 2026-10-19 10:12:41.305519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e33badfcb674'
+down_revision = 'cbd71a4fcdd7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'investment_allocation_rebuild',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('donation_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade():
+    op.drop_table('investment_allocation_rebuild')
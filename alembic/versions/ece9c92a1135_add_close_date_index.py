@@ -0,0 +1,29 @@
+"""Add close date index
+
+Revision ID: ece9c92a1135
+Revises: d73913053759
+Create Date: 2026-10-18 21:26:47.125960
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'ece9c92a1135'
+down_revision = 'd73913053759'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_charityproject_fully_invested_close_date',
+        'charityproject',
+        ['fully_invested', 'close_date', 'create_date'],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_charityproject_fully_invested_close_date', 'charityproject'
+    )
@@ -1,3 +1,6 @@
 from .user import router as user_router  # noqa
 from.donation import router as donation_router  # noqa
 from .charity_project import router as charity_project_router  # noqa
+from .allocation import router as allocation_router  # noqa
+from .archive import router as archive_router  # noqa
+from .stats import router as stats_router  # noqa
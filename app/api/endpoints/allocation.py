@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import get_read_session
+from app.core.user import current_superuser
+from app.services.allocation_lock import lock_stats
+from app.services.allocation_queue import allocation_queue
+from app.services.allocation_retry import conflict_stats
+from app.services.audit import audit_investments
+
+router = APIRouter()
+
+
+@router.get('/metrics')
+async def get_allocation_metrics(
+    superuser=Depends(current_superuser),
+):
+    """Счётчики блокировок, конфликтов и очереди распределения."""
+    return {
+        'lock': lock_stats.as_dict(),
+        'conflicts': conflict_stats.as_dict(),
+        'queue': {
+            'running': allocation_queue.running,
+            'batches': allocation_queue.batches,
+            'processed': allocation_queue.processed,
+        },
+    }
+
+
+@router.get('/audit')
+async def audit_allocation(
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Проверка инвариантов инвестиций с id нарушителей."""
+    return await audit_investments(
+        session, settings.audit_chunk_size, settings.audit_sample_size
+    )
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import get_async_session
+from app.core.user import current_superuser
+from app.services.archive import archiver
+
+router = APIRouter()
+
+
+@router.get('/status')
+async def get_archive_status(
+    superuser=Depends(current_superuser),
+):
+    """Ход последнего прогона архивации."""
+    return archiver.progress.as_dict()
+
+
+@router.post('/run', status_code=status.HTTP_202_ACCEPTED)
+async def run_archiver(
+    dry_run: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """
+    Запускает архивацию в фоне.
+
+    С dry_run=true только подсчитывает строки, готовые к переносу.
+    """
+    session_factory = sessionmaker(session.bind, class_=AsyncSession)
+    if not archiver.start(session_factory, dry_run=dry_run):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Архивация уже выполняется',
+        )
+    return archiver.progress.as_dict()
@@ -1,22 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.api.export import ExportParams, export_response
+from app.api.pagination import ListParams, paginate
+from app.api.response_cache import (
+    cached_json_response, cached_stream_response, render_json
+)
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser
 from app.crud.charity_project import charity_project_crud
+from app.crud.investment_allocation import investment_allocation_crud
 from app.models.charity_project import CharityProject
 from app.schemas.charity_project import (
     CharityProjectCreate,
     CharityProjectUpdate,
     CharityProjectDB,
 )
+from app.schemas.investment_allocation import ProjectDonor
 from app.api.validators import (
-    check_charity_project_name_is_available,
+    charity_project_name_conflict,
+    check_charity_project_name_not_taken,
     validate_not_fully_invested,
     validate_full_amount,
     validate_project_for_deletion,
 )
-from app.services.investment import process_investment
+from app.services.allocation_queue import (
+    AllocationQueueBusy,
+    allocation_queue,
+)
+from app.services.bulk_import import ProjectImporter
+from app.services.investment import (
+    create_with_investment,
+    update_with_investment,
+)
+from app.services.ledger import open_pool_ledger
+from app.services.project_names import project_names
+from app.services.export import MEDIA_TYPES
+from app.services.reports import build_funding_speed_report
 from app.crud.donation import donation_crud
 
 router = APIRouter()
@@ -28,24 +50,150 @@ async def create_charity_project(
     session: AsyncSession = Depends(get_async_session),
     superuser=Depends(current_superuser),
 ):
-    await check_charity_project_name_is_available(
-        name=project_in.name, session=session
-    )
+    check_charity_project_name_not_taken(project_in.name)
+    async with charity_project_name_conflict(session):
+        if allocation_queue.running:
+            try:
+                project = await allocation_queue.submit(
+                    charity_project_crud, project_in, donation_crud
+                )
+            except AllocationQueueBusy as error:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=str(error),
+                )
+        else:
+            project = await create_with_investment(
+                charity_project_crud, project_in, donation_crud, session
+            )
+    project_names.add(project.name, project.id)
+    return project
 
-    new_project = await charity_project_crud.create(project_in, session)
-    session.add_all(process_investment(
-        new_project, await donation_crud.get_open(session)
-    ))
-    await session.commit()
-    await session.refresh(new_project)
-    return new_project
+
+@router.post('/import')
+async def import_charity_projects(
+    request: Request,
+    import_format: str = Query(
+        'ndjson', alias='format', regex='^(ndjson|csv)$',
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """
+    Загрузка проектов потоком NDJSON или CSV.
+
+    Поля строк — как у CharityProjectCreate. Возвращает отчёт
+    с ошибками по номерам строк.
+    """
+    report = await ProjectImporter(session).run(
+        request.stream(), import_format
+    )
+    return report.as_dict()
 
 
 @router.get('/', response_model=list[CharityProjectDB])
 async def get_all_charity_projects(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    params: ListParams = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+):
+    async def build():
+        response = Response()
+        # Тело кэшируется по версии таблицы, и число объектов в нём
+        # должно соответствовать той же версии.
+        page = await paginate(
+            charity_project_crud, session, params, response,
+            cache_total=False,
+        )
+        headers = {
+            header: response.headers[header]
+            for header in ('X-Next-Cursor', 'X-Total-Count')
+            if header in response.headers
+        }
+        return render_json(
+            [CharityProjectDB.from_orm(project) for project in page]
+        ), headers
+
+    return await cached_json_response(
+        request, session, CharityProject.__tablename__, build
+    )
+
+
+@router.get('/export')
+async def export_charity_projects(
+    params: ExportParams = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Потоковая выгрузка всех проектов в NDJSON или CSV."""
+    return export_response(
+        charity_project_crud, CharityProjectDB, session, params
+    )
+
+
+@router.get('/report')
+async def get_funding_speed_report(
+    request: Request,
+    report_format: str = Query(
+        'csv', alias='format', regex='^(ndjson|csv)$',
+    ),
+    history: bool = Query(
+        False, description='Включить перенесённые в архив проекты',
+    ),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
 ):
-    return await charity_project_crud.get_multi(session)
+    """Закрытые проекты от самого быстро собранного к самому долгому."""
+    async def build():
+        return await build_funding_speed_report(
+            session, report_format, history
+        )
+
+    return await cached_stream_response(
+        request, session, CharityProject.__tablename__, build,
+        MEDIA_TYPES[report_format], f'funding_speed.{report_format}',
+    )
+
+
+@router.get('/{project_id}', response_model=CharityProjectDB)
+async def get_charity_project(
+    project_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
+):
+    # Проверка идёт до сверки ETag: If-None-Match: * или текущий
+    # ETag не должны давать 304 для несуществующего проекта. Сам
+    # проект читается только при промахе кэша.
+    if not await charity_project_crud.exists(project_id, session):
+        raise HTTPException(status_code=404, detail='Project not found')
+
+    async def build():
+        project = await charity_project_crud.get(project_id, session)
+        if not project:
+            raise HTTPException(status_code=404, detail='Project not found')
+        return render_json(CharityProjectDB.from_orm(project)), {}
+
+    return await cached_json_response(
+        request, session, CharityProject.__tablename__, build
+    )
+
+
+@router.get('/{project_id}/donors', response_model=list[ProjectDonor])
+async def get_charity_project_donors(
+    project_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Пользователи, чьи пожертвования ушли в проект, и их суммы."""
+    project = (
+        await charity_project_crud.get(project_id, session) or
+        await charity_project_crud.get_archived(project_id, session)
+    )
+    if project is None:
+        raise HTTPException(status_code=404, detail='Project not found')
+    return await investment_allocation_crud.get_project_donors(
+        project_id, session
+    )
 
 
 @router.patch('/{project_id}', response_model=CharityProjectDB)
@@ -55,32 +203,38 @@ async def update_charity_project(
     session: AsyncSession = Depends(get_async_session),
     user=Depends(current_superuser),
 ):
-    db_project = await session.get(CharityProject, project_id)
-    if not db_project:
-        raise HTTPException(status_code=404, detail='Project not found')
-
     forbidden_updates = {
         'invested_amount', 'create_date', 'close_date', 'fully_invested'
     }
     update_data = project_in.dict(exclude_unset=True)
-    if any(field in forbidden_updates for field in update_data):
-        raise HTTPException(
-            status_code=422, detail='Attempt to update restricted fields'
-        )
-    validate_not_fully_invested(db_project)
-    if 'full_amount' in update_data:
-        validate_full_amount(
-            project_in.full_amount, db_project.invested_amount
-        )
-    if 'name' in update_data:
-        await check_charity_project_name_is_available(
-            name=project_in.name, session=session, project_id=project_id
+    old_names = []
+
+    def validate(db_project):
+        if not db_project:
+            raise HTTPException(status_code=404, detail='Project not found')
+        old_names.append(db_project.name)
+        if any(field in forbidden_updates for field in update_data):
+            raise HTTPException(
+                status_code=422, detail='Attempt to update restricted fields'
+            )
+        validate_not_fully_invested(db_project)
+        if 'full_amount' in update_data:
+            validate_full_amount(
+                project_in.full_amount, db_project.invested_amount
+            )
+        if 'name' in update_data:
+            check_charity_project_name_not_taken(project_in.name, project_id)
+
+    async with charity_project_name_conflict(session):
+        updated_obj = await update_with_investment(
+            charity_project_crud, project_id, project_in, donation_crud,
+            session, validate=validate,
         )
-    updated_obj = await charity_project_crud.update(
-        db_obj=db_project,
-        obj_in=project_in,
-        session=session
-    )
+    open_pool_ledger.track(updated_obj)
+    old_name = old_names[-1]
+    if updated_obj.name != old_name:
+        project_names.discard(old_name)
+        project_names.add(updated_obj.name, project_id)
     return updated_obj
 
 
@@ -94,4 +248,6 @@ async def delete_charity_project(
     validate_project_for_deletion(project)
     await session.delete(project)
     await session.commit()
+    open_pool_ledger.discard(CharityProject, project_id)
+    project_names.discard(project.name)
     return project
@@ -1,19 +1,41 @@
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.api.export import ExportParams, export_response
+from app.api.pagination import ListParams, paginate
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_user, current_superuser
 from app.crud.donation import donation_crud
 from app.crud.charity_project import charity_project_crud
+from app.crud.investment_allocation import investment_allocation_crud
 from app.schemas.donation import (
     DonationCreate,
     DonationDB,
-    DonationResponse
+    DonationResponse,
+    DonorRank,
+    DonorSummary,
+)
+from app.schemas.investment_allocation import DonationAllocation
+from app.services.allocation_queue import (
+    AllocationQueueBusy,
+    allocation_queue,
 )
-from app.services.investment import process_investment
+from app.services.bulk_import import DonationImporter
+from app.services.donor_totals import get_donor_summary, get_top_donors
+from app.services.investment import create_with_investment
 
 router = APIRouter()
 
+# Пользователи, недавно создавшие пожертвование: их список читается
+# из основной базы, пока реплика может не успеть получить запись.
+recent_donors = TTLCache(
+    settings.recent_donors_cache_size, settings.read_your_writes_window
+)
+
 
 @router.post('/', response_model=DonationResponse)
 async def create_donation(
@@ -21,25 +43,126 @@ async def create_donation(
     session: AsyncSession = Depends(get_async_session),
     user=Depends(current_user),
 ):
-    new_donation = await donation_crud.create(donation_in, session, user=user)
-    open_projects = await charity_project_crud.get_open(session)
-    session.add_all(process_investment(new_donation, open_projects))
-    await session.commit()
-    await session.refresh(new_donation)
-    return new_donation
+    if allocation_queue.running:
+        try:
+            donation = await allocation_queue.submit(
+                donation_crud, donation_in, charity_project_crud, user=user
+            )
+        except AllocationQueueBusy as error:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(error),
+            )
+    else:
+        donation = await create_with_investment(
+            donation_crud, donation_in, charity_project_crud, session,
+            user=user,
+        )
+    recent_donors.set(user.id, True)
+    return donation
 
 
 @router.get('/my', response_model=list[DonationResponse])
 async def get_user_donations(
+    response: Response,
+    params: ListParams = Depends(),
+    fresh: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+    read_session: AsyncSession = Depends(get_read_session),
+    user=Depends(current_user),
+):
+    """
+    Пожертвования текущего пользователя.
+
+    Сразу после создания пожертвования или с fresh=true список читается
+    из основной базы, чтобы в нём было только что созданное.
+    """
+    if not fresh and not recent_donors.get(user.id):
+        session = read_session
+    return await paginate(
+        donation_crud, session, params, response, user_id=user.id
+    )
+
+
+@router.get('/my/summary', response_model=DonorSummary)
+async def get_user_donation_summary(
+    fresh: bool = False,
     session: AsyncSession = Depends(get_async_session),
+    read_session: AsyncSession = Depends(get_read_session),
     user=Depends(current_user),
 ):
-    return await donation_crud.get_user_donations(session, user.id)
+    """Число и суммы пожертвований текущего пользователя без списка."""
+    if not fresh and not recent_donors.get(user.id):
+        session = read_session
+    return await get_donor_summary(session, user.id) or DonorSummary()
+
+
+@router.get('/leaderboard', response_model=list[DonorRank])
+async def get_donor_leaderboard(
+    limit: int = Query(10, ge=1, le=settings.leaderboard_size_max),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Крупнейшие жертвователи по сумме пожертвований."""
+    return await get_top_donors(session, limit)
 
 
 @router.get('/', response_model=list[DonationDB])
 async def get_all_donations(
+    response: Response,
+    params: ListParams = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    return await paginate(donation_crud, session, params, response)
+
+
+@router.get('/export')
+async def export_donations(
+    params: ExportParams = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Потоковая выгрузка всех пожертвований в NDJSON или CSV."""
+    return export_response(donation_crud, DonationDB, session, params)
+
+
+@router.post('/import')
+async def import_donations(
+    request: Request,
+    import_format: str = Query(
+        'ndjson', alias='format', regex='^(ndjson|csv)$',
+    ),
     session: AsyncSession = Depends(get_async_session),
     superuser=Depends(current_superuser),
 ):
-    return await donation_crud.get_multi(session)
+    """
+    Загрузка пожертвований потоком NDJSON или CSV.
+
+    Поля строк — как у DonationCreate и необязательный user_id, по
+    умолчанию автор — текущий пользователь. Возвращает отчёт
+    с ошибками по номерам строк.
+    """
+    importer = DonationImporter(session, user_id=superuser.id)
+    report = await importer.run(request.stream(), import_format)
+    return report.as_dict()
+
+
+@router.get(
+    '/{donation_id}/allocations', response_model=list[DonationAllocation]
+)
+async def get_donation_allocations(
+    donation_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    user=Depends(current_user),
+):
+    """Проекты, в которые ушли средства пожертвования владельца."""
+    donation = (
+        await donation_crud.get(donation_id, session) or
+        await donation_crud.get_archived(donation_id, session)
+    )
+    if donation is None or donation.user_id != user.id:
+        raise HTTPException(status_code=404, detail='Donation not found')
+    return await investment_allocation_crud.get_donation_allocations(
+        donation_id, session
+    )
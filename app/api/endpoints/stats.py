@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import get_read_session
+from app.models.donation_rollup import ROLLUPS
+from app.schemas.stats import DonationRollupDB, FundStatsDB
+from app.services.rollups import get_donation_rollups
+from app.services.stats import get_fund_stats
+
+router = APIRouter()
+
+
+def naive_utc(moment: datetime) -> datetime:
+    # Даты в базе хранятся в UTC без часового пояса.
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get('/', response_model=FundStatsDB)
+async def get_stats(
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Сводка фонда: проекты, собранные и ожидающие средства."""
+    return await get_fund_stats(session)
+
+
+@router.get('/donations', response_model=list[DonationRollupDB])
+async def get_donation_stats(
+    start: datetime = Query(..., alias='from'),
+    end: datetime = Query(..., alias='to'),
+    bucket: str = Query('day', regex='^(hour|day)$'),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Число, сумма и вложенная часть пожертвований по часам или суткам.
+
+    Читает только строки сводки, не больше rollup_max_buckets.
+    """
+    rollup = ROLLUPS[bucket]
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Конец периода должен быть позже начала',
+        )
+    if (end - rollup.bucket_of(start)) / rollup.step > (
+        settings.rollup_max_buckets
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Слишком длинный период для такого интервала',
+        )
+    return await get_donation_rollups(session, bucket, start, end)
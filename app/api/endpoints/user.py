@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.core.user import auth_backend, fastapi_users
+from app.core.user import auth_backend, current_superuser, fastapi_users
+from app.core.user_cache import user_cache
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 
 router = APIRouter()
@@ -15,6 +16,16 @@ router.include_router(
     prefix='/auth',
     tags=['auth'],
 )
+
+
+@router.get('/auth/cache', tags=['auth'])
+async def get_user_cache_stats(
+    superuser=Depends(current_superuser),
+):
+    """Счётчики кэша пользователей по токенам."""
+    return user_cache.stats()
+
+
 users_router = fastapi_users.get_users_router(UserRead, UserUpdate)
 
 users_router.routes = [
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.services.export import MEDIA_TYPES, export_rows
+
+
+class ExportParams:
+    """Параметры выгрузки объектов инвестиций."""
+
+    def __init__(
+        self,
+        export_format: str = Query(
+            'ndjson', alias='format', regex='^(ndjson|csv)$',
+        ),
+        create_date_from: Optional[datetime] = None,
+        create_date_to: Optional[datetime] = None,
+        close_date_from: Optional[datetime] = None,
+        close_date_to: Optional[datetime] = None,
+        history: bool = Query(
+            False, description='Включить перенесённые в архив объекты',
+        ),
+    ):
+        self.export_format = export_format
+        self.history = history
+        self.filters = {
+            'create_date_from': create_date_from,
+            'create_date_to': create_date_to,
+            'close_date_from': close_date_from,
+            'close_date_to': close_date_to,
+        }
+
+
+def export_response(
+    crud: CRUDBase,
+    schema: type[BaseModel],
+    session: AsyncSession,
+    params: ExportParams,
+) -> StreamingResponse:
+    filename = f'{crud.model.__tablename__}.{params.export_format}'
+    return StreamingResponse(
+        export_rows(
+            crud, schema, session, params.export_format,
+            history=params.history, **params.filters,
+        ),
+        media_type=MEDIA_TYPES[params.export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+        },
+    )
@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response, status
+
+from app.core.config import settings
+from app.models.base import InvestmentBaseModel
+
+
+def encode_cursor(obj: InvestmentBaseModel) -> str:
+    """Непрозрачный курсор на позицию сразу после объекта."""
+    raw = json.dumps([obj.create_date.isoformat(), obj.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        create_date, obj_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(create_date), int(obj_id)
+    except (binascii.Error, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Некорректный курсор',
+        )
+
+
+class ListParams:
+    """Параметры постраничного списка объектов инвестиций."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(
+            None, ge=1, le=settings.page_size_max,
+            description='Размер страницы',
+        ),
+        cursor: Optional[str] = Query(
+            None, description='Курсор из заголовка X-Next-Cursor',
+        ),
+        fully_invested: Optional[bool] = None,
+        create_date_from: Optional[datetime] = None,
+        create_date_to: Optional[datetime] = None,
+        with_total: bool = Query(
+            False, description='Вернуть X-Total-Count',
+        ),
+        history: bool = Query(
+            False, description='Включить перенесённые в архив объекты',
+        ),
+    ):
+        self.limit = limit or settings.page_size_default
+        self.after = decode_cursor(cursor) if cursor else None
+        self.with_total = with_total
+        self.history = history
+        self.filters = {
+            'fully_invested': fully_invested,
+            'create_date_from': create_date_from,
+            'create_date_to': create_date_to,
+        }
+
+
+async def paginate(
+    crud,
+    session,
+    params: ListParams,
+    response: Response,
+    *,
+    cache_total: bool = True,
+    **filters,
+) -> list:
+    """
+    Возвращает страницу объектов и выставляет заголовки пагинации.
+
+    Курсор следующей страницы попадает в X-Next-Cursor, общее число
+    объектов (по запросу) — в X-Total-Count. cache_total=False
+    считает число заново, минуя кэш crud.count.
+    """
+    filters = {**params.filters, **filters, 'history': params.history}
+    page = await crud.get_page(
+        session, params.limit + 1, after=params.after, **filters
+    )
+    if len(page) > params.limit:
+        page = page[:params.limit]
+        response.headers['X-Next-Cursor'] = encode_cursor(page[-1])
+    if params.with_total:
+        response.headers['X-Total-Count'] = str(
+            await crud.count(session, use_cache=cache_total, **filters)
+        )
+    return page
@@ -0,0 +1,128 @@
+import json
+from typing import Awaitable, Callable, Iterator, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import CacheVersion
+
+CachedBody = tuple[bytes, dict[str, str]]
+
+# Размер кусков, которыми отдаётся закэшированное тело отчёта.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+response_cache = TTLCache(
+    maxsize=settings.response_cache_size, ttl=settings.response_cache_ttl
+)
+
+
+def render_json(content) -> bytes:
+    """Сериализует ответ так же, как JSONResponse."""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+async def get_table_version(
+    session: AsyncSession, name: str
+) -> Optional[str]:
+    row = (
+        await session.execute(
+            select(CacheVersion.epoch, CacheVersion.version)
+            .where(CacheVersion.name == name)
+        )
+    ).first()
+    return f'{row.epoch}.{row.version}' if row else None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+async def cached_json_response(
+    request: Request,
+    session: AsyncSession,
+    table: str,
+    build: Callable[[], Awaitable[CachedBody]],
+) -> Response:
+    """
+    Отдаёт JSON-ответ из кэша, привязанного к версии таблицы.
+
+    Ключ кэша — версия таблицы и URL запроса, поэтому любое изменение
+    таблицы делает старые записи недостижимыми. Версия же служит
+    ETag: при совпадении If-None-Match возвращается 304 без тела.
+    """
+    version = await get_table_version(session, table)
+    if version is None:
+        body, headers = await build()
+        return Response(body, media_type='application/json', headers=headers)
+    etag = f'"{version}"'
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+        )
+    key = (version, request.url.path, str(request.query_params))
+    cached = response_cache.get(key)
+    if cached is None:
+        cached = await build()
+        response_cache.set(key, cached)
+    body, headers = cached
+    return Response(
+        body,
+        media_type='application/json',
+        headers={**headers, 'ETag': etag},
+    )
+
+
+def iter_chunks(body: bytes) -> Iterator[bytes]:
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[start:start + STREAM_CHUNK_SIZE]
+
+
+async def cached_stream_response(
+    request: Request,
+    session: AsyncSession,
+    table: str,
+    build: Callable[[], Awaitable[bytes]],
+    media_type: str,
+    filename: str,
+) -> Response:
+    """
+    Отдаёт потоком тело файла из кэша, привязанного к версии таблицы.
+
+    Кэш и ETag устроены как в cached_json_response; тело отдаётся
+    кусками по STREAM_CHUNK_SIZE байт.
+    """
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    version = await get_table_version(session, table)
+    if version is None:
+        body = await build()
+    else:
+        etag = f'"{version}"'
+        if etag_matches(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': etag},
+            )
+        key = (version, request.url.path, str(request.query_params))
+        body = response_cache.get(key)
+        if body is None:
+            body = await build()
+            response_cache.set(key, body)
+        headers['ETag'] = etag
+    return StreamingResponse(
+        iter_chunks(body), media_type=media_type, headers=headers
+    )
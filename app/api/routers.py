@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import (charity_project_router, donation_router,
-                               user_router)
+from app.api.endpoints import (allocation_router, archive_router,
+                               charity_project_router, donation_router,
+                               stats_router, user_router)
 
 
 main_router = APIRouter()
@@ -17,4 +18,19 @@ main_router.include_router(
     prefix='/donation',
     tags=['Donations']
 )
+main_router.include_router(
+    allocation_router,
+    prefix='/allocation',
+    tags=['Allocation']
+)
+main_router.include_router(
+    archive_router,
+    prefix='/archive',
+    tags=['Archive']
+)
+main_router.include_router(
+    stats_router,
+    prefix='/stats',
+    tags=['Stats']
+)
 main_router.include_router(user_router)
@@ -1,10 +1,19 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.crud.charity_project import charity_project_crud
 from app.models.charity_project import CharityProject
 from app.schemas.charity_project import CharityProjectDB, CharityProjectUpdate
+from app.services.project_names import NAME_TAKEN, project_names
+
+# Уникальный индекс имени: так он называется в сообщениях SQLite
+# и PostgreSQL о нарушении уникальности.
+NAME_CONSTRAINTS = ('charityproject.name', 'ix_charityproject_name')
 
 
 async def check_charity_project_name_is_available(
@@ -29,7 +38,44 @@ async def check_charity_project_name_is_available(
     if existing_project:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail='Проект с таким именем уже существует!',
+            detail=NAME_TAKEN,
+        )
+
+
+def check_charity_project_name_not_taken(
+        name: Optional[str],
+        project_id: Optional[int] = None,
+) -> None:
+    """
+    Проверяет имя без запроса к базе.
+
+    Повторы, известные набору имён, отклоняются сразу, остальные
+    ловит уникальный индекс (см. charity_project_name_conflict).
+    """
+    if not name:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Имя проекта не может быть пустым',
+        )
+    if project_names.is_taken(name, project_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=NAME_TAKEN,
+        )
+
+
+@asynccontextmanager
+async def charity_project_name_conflict(session: AsyncSession):
+    """Превращает нарушение уникальности имени проекта в ответ 400."""
+    try:
+        yield
+    except IntegrityError as error:
+        if not any(name in str(error.orig) for name in NAME_CONSTRAINTS):
+            raise
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=NAME_TAKEN,
         )
 
 
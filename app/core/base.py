@@ -1,3 +1,10 @@
 from app.core.db import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.donation import Donation  # noqa
+from app.models.cache_version import CacheVersion  # noqa
+from app.models.investment_allocation import InvestmentAllocation  # noqa
+from app.models.archive import ARCHIVES  # noqa
+from app.models.rebuild_checkpoint import RebuildCheckpoint  # noqa
+from app.models.fund_stats import FundStats  # noqa
+from app.models.donation_rollup import ROLLUPS  # noqa
+from app.models.donor_totals import DonorTotals  # noqa
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseSettings, EmailStr
 
 
@@ -6,6 +6,60 @@ class Settings(BaseSettings):
     app_title: str = 'Благотворительный фонд для поддержки котиков QRKot'
     database_url: str = 'sqlite+aiosqlite:///./qrcot.db'
     secret: str = 'SECRET'
+    investment_engine: Literal['python', 'sql'] = 'python'
+    investment_batch_size: int = 100
+    investment_ledger_enabled: bool = False
+    investment_ledger_reconcile_interval: float = 60
+    page_size_default: int = 100
+    page_size_max: int = 1000
+    total_count_cache_ttl: float = 30
+    export_chunk_size: int = 1000
+    response_cache_size: int = 256
+    response_cache_ttl: float = 3600
+    allocation_lock_enabled: bool = True
+    allocation_max_retries: int = 5
+    allocation_retry_base_delay: float = 0.01
+    allocation_retry_max_delay: float = 0.5
+    allocation_queue_enabled: bool = False
+    allocation_queue_size: int = 1000
+    allocation_queue_window: float = 0.005
+    allocation_queue_batch_size: int = 100
+    allocation_queue_put_timeout: float = 1
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+    sqlite_journal_mode: Literal[
+        'delete', 'truncate', 'persist', 'memory', 'wal', 'off'
+    ] = 'wal'
+    sqlite_synchronous: Literal['off', 'normal', 'full', 'extra'] = 'normal'
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_busy_timeout: int = 5000
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    read_replica_url: Optional[str] = None
+    read_pool_size: int = 10
+    read_your_writes_window: float = 5
+    recent_donors_cache_size: int = 10000
+    project_name_cache_enabled: bool = False
+    archive_enabled: bool = False
+    archive_after_days: float = 365
+    archive_batch_size: int = 1000
+    archive_interval: float = 3600
+    rebuild_chunk_size: int = 10000
+    audit_chunk_size: int = 100000
+    audit_sample_size: int = 100
+    report_workers: int = 2
+    report_process_threshold: int = 10000
+    rollup_max_buckets: int = 1000
+    rollup_backfill_days: int = 30
+    leaderboard_size_max: int = 100
+    import_batch_size: int = 2000
+    import_error_limit: int = 1000
 
     first_superuser_email: Optional[EmailStr] = None
     first_superuser_password: Optional[str] = None
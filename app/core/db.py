@@ -1,9 +1,22 @@
-from sqlalchemy import Column, Integer
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import logging
+from typing import Optional
+
+from sqlalchemy import Column, Integer, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, create_async_engine
+)
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+SQLITE_PRAGMAS = (
+    'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout'
+)
+
 
 class PreBase:
 
@@ -16,12 +29,138 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
+
+def get_sqlite_pragmas() -> dict:
+    return {
+        pragma: getattr(settings, f'sqlite_{pragma}')
+        for pragma in SQLITE_PRAGMAS
+    }
+
+
+def set_sqlite_pragmas(sync_engine: Engine, read_only: bool = False) -> None:
+    """Выставляет PRAGMA из настроек каждому новому соединению SQLite."""
+    pragmas = get_sqlite_pragmas()
+    if read_only:
+        pragmas['query_only'] = 1
+
+    @event.listens_for(sync_engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        cursor.close()
+
+
+def get_engine_options(url: str, pool_size: Optional[int] = None) -> dict:
+    """
+    Параметры пула соединений из настроек.
+
+    При pool_size = 0 остаётся пул диалекта по умолчанию: для файла
+    SQLite это NullPool, открывающий соединение на каждую сессию.
+    """
+    options = {
+        'pool_recycle': settings.pool_recycle,
+        'pool_pre_ping': settings.pool_pre_ping,
+    }
+    if pool_size is None:
+        pool_size = settings.pool_size
+    if pool_size and ':memory:' not in url:
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=settings.pool_max_overflow,
+            pool_timeout=settings.pool_timeout,
+        )
+    return options
+
+
+def create_tuned_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Создаёт движок с параметрами пула и PRAGMA из настроек.
+
+    Соединения движка только для чтения в SQLite открываются
+    с PRAGMA query_only и отдельным пулом read_pool_size.
+    """
+    async_engine = create_async_engine(
+        url,
+        **get_engine_options(
+            url, settings.read_pool_size if read_only else None
+        ),
+    )
+    if async_engine.dialect.name == 'sqlite':
+        set_sqlite_pragmas(async_engine.sync_engine, read_only)
+    return async_engine
+
+
+async def get_engine_report(async_engine: AsyncEngine) -> dict:
+    """Действующие параметры движка и соединения для отчёта при старте."""
+    pool = async_engine.pool
+    report = {
+        'dialect': async_engine.dialect.name,
+        'pool': type(pool).__name__,
+        'pool_size': getattr(pool, 'size', lambda: None)(),
+    }
+    if async_engine.dialect.name == 'sqlite':
+        async with async_engine.connect() as connection:
+            for pragma in (*SQLITE_PRAGMAS, 'query_only'):
+                report[pragma] = await connection.scalar(
+                    text(f'PRAGMA {pragma}')
+                )
+    return report
+
+
+def create_read_engine() -> AsyncEngine:
+    if settings.read_replica_url:
+        return create_tuned_engine(settings.read_replica_url, read_only=True)
+    if ':memory:' in settings.database_url:
+        # У каждого соединения своя база в памяти, читать её можно
+        # только через основной движок.
+        return engine
+    return create_tuned_engine(settings.database_url, read_only=True)
+
+
+engine = create_tuned_engine(settings.database_url)
+read_engine = create_read_engine()
 
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+ReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession)
 
 
 async def get_async_session():
-    """Асинхронный генератор сессий."""
+    """
+    Асинхронный генератор сессий.
+
+    Соединение берётся из пула только при первом запросе к базе,
+    поэтому эндпоинты, не обращающиеся к базе, пул не занимают.
+    """
     async with AsyncSessionLocal() as async_session:
         yield async_session
+
+
+async def get_read_session():
+    """
+    Асинхронный генератор сессий для чтения.
+
+    Чтение идёт через отдельный пул движка только для чтения (реплики
+    или той же базы SQLite в режиме query_only), чтобы длинные выборки
+    не занимали соединения пути записи.
+    """
+    async with ReadSessionLocal() as read_session:
+        yield read_session
+
+
+async def commit_without_expiring(session: AsyncSession) -> None:
+    """
+    Фиксирует транзакцию, не просрочивая объекты сессии.
+
+    Все значения столбцов вычисляются на стороне приложения (id
+    приходит из lastrowid), поэтому после flush объекты уже совпадают
+    со строками в базе и перечитывать их после коммита не нужно.
+    """
+    sync_session = session.sync_session
+    expire_on_commit = sync_session.expire_on_commit
+    sync_session.expire_on_commit = False
+    try:
+        await session.commit()
+    finally:
+        sync_session.expire_on_commit = expire_on_commit
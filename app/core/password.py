@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from passlib import pwd
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """
+    Хеширование паролей bcrypt в отдельном пуле потоков.
+
+    bcrypt отпускает GIL на время вычисления, поэтому потоки не мешают
+    циклу событий, а размер пула ограничивает число одновременных
+    вычислений. Хеш со стоимостью, отличной от password_hash_rounds,
+    при проверке помечается к пересчёту.
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.context = CryptContext(
+            schemes=['bcrypt'],
+            deprecated='auto',
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix='password-hasher'
+            )
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """Проверяет пароль и возвращает новый хеш, если нужен пересчёт."""
+        return await self._run(
+            self.context.verify_and_update, password, hashed_password
+        )
+
+    def generate(self) -> str:
+        return pwd.genword()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_rounds, settings.password_hash_workers
+)
@@ -0,0 +1,76 @@
+import time
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import User
+
+USER_COLUMNS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+class UserLookupCache:
+    """
+    Кэш пользователей по проверенным JWT-токенам.
+
+    Хранит снимки столбцов пользователя, а не объекты сессии, поэтому
+    при попадании запрос не обращается к базе. Изменение пользователя
+    увеличивает его поколение, и записи старых поколений отбрасываются.
+    Сбрасывается только кэш текущего процесса, поэтому в остальных
+    процессах снимок живёт не дольше user_cache_ttl.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._tokens = TTLCache(maxsize, ttl)
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    def get(self, token: str) -> Optional[User]:
+        entry = self._tokens.get(token)
+        if entry is not None:
+            snapshot, expires, generation = entry
+            fresh = generation == self.generation(snapshot['id'])
+            if fresh and expires > time.time():
+                self.hits += 1
+                user = User(**snapshot)
+                make_transient_to_detached(user)
+                return user
+            self._tokens.pop(token)
+        self.misses += 1
+        return None
+
+    def set(self, token: str, user: User, expires: float, generation: int):
+        """
+        Запоминает пользователя, прочитанного по токену.
+
+        Поколение нужно взять до чтения пользователя из базы, иначе
+        изменение, случившееся во время чтения, останется незамеченным.
+        """
+        snapshot = {key: getattr(user, key) for key in USER_COLUMNS}
+        self._tokens.set(token, (snapshot, expires, generation))
+
+    def invalidate(self, user_id: int):
+        self._generations[user_id] = self.generation(user_id) + 1
+        self.invalidations += 1
+
+    def clear(self):
+        self._tokens.clear()
+        self._generations.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._tokens),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+
+user_cache = UserLookupCache(settings.user_cache_size, settings.user_cache_ttl)
@@ -1,15 +1,25 @@
-from typing import Generic, Optional, TypeVar, List
+from datetime import datetime
+from typing import AsyncIterator, Generic, Optional, TypeVar, List
 
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import bindparam, case, func, select, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.db import commit_without_expiring
+from app.models.archive import ARCHIVES, get_history
 from app.models.user import User
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+total_count_cache = TTLCache(
+    maxsize=1024, ttl=settings.total_count_cache_ttl
+)
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Универсальный класс для CRUD-операций."""
@@ -30,6 +40,107 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await session.execute(stmt)
         return result.scalars().all()
 
+    def get_filters(
+        self,
+        columns=None,
+        fully_invested: Optional[bool] = None,
+        create_date_from: Optional[datetime] = None,
+        create_date_to: Optional[datetime] = None,
+        close_date_from: Optional[datetime] = None,
+        close_date_to: Optional[datetime] = None,
+        **equal,
+    ) -> list:
+        """
+        Условия отбора для списков; None означает «без фильтра».
+
+        columns — столбцы, к которым применяются условия: по умолчанию
+        модель, для истории — столбцы объединения с архивом.
+        """
+        if columns is None:
+            columns = self.model
+        filters = [
+            getattr(columns, field) == value
+            for field, value in equal.items()
+        ]
+        if fully_invested is not None:
+            filters.append(columns.fully_invested.is_(fully_invested))
+        if create_date_from is not None:
+            filters.append(columns.create_date >= create_date_from)
+        if create_date_to is not None:
+            filters.append(columns.create_date < create_date_to)
+        if close_date_from is not None:
+            filters.append(columns.close_date >= close_date_from)
+        if close_date_to is not None:
+            filters.append(columns.close_date < close_date_to)
+        return filters
+
+    def get_source(self, history: bool = False):
+        """
+        Источник строк для чтения и его столбцы.
+
+        С history=True горячая таблица объединяется с архивом.
+        """
+        if not history or self.model not in ARCHIVES:
+            return self.model, self.model
+        source = get_history(self.model)
+        return source, source.c
+
+    async def get_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        after: Optional[tuple[datetime, int]] = None,
+        history: bool = False,
+        **filters,
+    ) -> List[ModelType]:
+        """
+        Страница объектов в порядке (create_date, id).
+
+        Страница начинается сразу после ключа after, поэтому стоимость
+        запроса не зависит от номера страницы. С history=True в выборку
+        попадают и архивные строки.
+        """
+        source, columns = self.get_source(history)
+        stmt = (
+            select(source)
+            .where(*self.get_filters(columns, **filters))
+            .order_by(columns.create_date, columns.id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(columns.create_date, columns.id) > tuple_(*after)
+            )
+        result = await session.execute(stmt)
+        if source is self.model:
+            return result.scalars().all()
+        return result.all()
+
+    async def count(
+        self,
+        session: AsyncSession,
+        history: bool = False,
+        use_cache: bool = True,
+        **filters,
+    ) -> int:
+        """
+        Число объектов; значение кэшируется на короткое время.
+
+        use_cache=False нужен ответам, которые сами кэшируются по версии
+        таблицы: устаревшее число из кэша попало бы в их тело.
+        """
+        key = (self.model.__tablename__, history, *sorted(filters.items()))
+        total = total_count_cache.get(key) if use_cache else None
+        if total is None:
+            source, columns = self.get_source(history)
+            total = await session.scalar(
+                select(func.count())
+                .select_from(source)
+                .where(*self.get_filters(columns, **filters))
+            )
+            total_count_cache.set(key, total)
+        return total
+
     async def get(
         self,
         obj_id: int,
@@ -39,6 +150,42 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await session.execute(stmt)
         return result.scalars().first()
 
+    async def exists(self, obj_id: int, session: AsyncSession) -> bool:
+        """Есть ли объект с таким id: читается только первичный ключ."""
+        return await session.scalar(
+            select(self.model.id).where(self.model.id == obj_id)
+        ) is not None
+
+    async def get_archived(self, obj_id: int, session: AsyncSession):
+        """Архивная строка объекта по id или None."""
+        archive = ARCHIVES[self.model]
+        result = await session.execute(
+            select(archive).where(archive.c.id == obj_id)
+        )
+        return result.first()
+
+    async def reserve_ids(
+        self, session: AsyncSession, count: int
+    ) -> Optional[range]:
+        """
+        id для count новых строк, чтобы вставить их одним executemany.
+
+        Работает в SQLite под блокировкой распределения: id выдаются
+        после последнего выданного AUTOINCREMENT, включая перенесённые
+        в архив. Для других баз возвращает None, id выдаёт база.
+        """
+        if (
+            session.bind.dialect.name != 'sqlite' or
+            not settings.allocation_lock_enabled
+        ):
+            return None
+        last = await session.scalar(
+            text('SELECT seq FROM sqlite_sequence WHERE name = :name'),
+            {'name': self.model.__tablename__},
+        )
+        first = (last or 0) + 1
+        return range(first, first + count)
+
     async def create(
         self,
         obj_in: CreateSchemaType,
@@ -55,8 +202,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj = self.model(**data)
         session.add(db_obj)
         if commit:
-            await session.commit()
-            await session.refresh(db_obj)
+            await session.flush()
+            await commit_without_expiring(session)
         return db_obj
 
     async def update(
@@ -72,8 +219,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         session.add(db_obj)
         if commit:
-            await session.commit()
-        await session.refresh(db_obj)
+            await commit_without_expiring(session)
         return db_obj
 
     async def remove(
@@ -96,6 +242,136 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         stmt = (
             select(self.model)
             .where(self.model.fully_invested.is_(False))
+            .order_by(self.model.create_date, self.model.id)
         )
         result = await session.execute(stmt)
         return result.scalars().all()
+
+    async def get_open_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        after: Optional[ModelType] = None,
+    ) -> List[ModelType]:
+        """
+        Возвращает страницу открытых объектов в порядке FIFO.
+
+        Страница начинается сразу после объекта after по ключу
+        (create_date, id).
+        """
+        stmt = (
+            select(self.model)
+            .where(self.model.fully_invested.is_(False))
+            .order_by(self.model.create_date, self.model.id)
+            .limit(limit)
+        )
+        if after is not None:
+            last_key = tuple_(after.create_date, after.id)
+            stmt = stmt.where(
+                tuple_(self.model.create_date, self.model.id) > last_key
+            )
+        return (await session.execute(stmt)).scalars().all()
+
+    async def get_open_batches(
+        self,
+        session: AsyncSession,
+        batch_size: int,
+    ) -> AsyncIterator[List[ModelType]]:
+        """
+        Отдаёт открытые объекты пачками в порядке FIFO.
+
+        Каждая пачка выбирается по ключу (create_date, id) с LIMIT,
+        поэтому вызывающий код может прекратить обход в любой момент,
+        не загружая остаток открытых объектов.
+        """
+        batch = await self.get_open_page(session, batch_size)
+        while batch:
+            yield batch
+            if len(batch) < batch_size:
+                return
+            batch = await self.get_open_page(session, batch_size, batch[-1])
+
+    async def add_invested_amounts(
+        self,
+        session: AsyncSession,
+        amounts: dict[int, int],
+        versions: dict[int, int],
+    ) -> None:
+        """
+        Одним UPDATE добавляет суммы инвестиций к объектам по их id.
+
+        Объекты в сессию не загружаются; закрытые объекты получают
+        fully_invested и close_date в том же запросе. Строка меняется
+        только при совпадении версии из versions, как при UPDATE
+        через ORM; если совпали не все строки, выбрасывается
+        StaleDataError и run_with_retries повторяет транзакцию.
+        """
+        new_amount = self.model.invested_amount + case(
+            amounts, value=self.model.id, else_=0
+        )
+        closed = new_amount >= self.model.full_amount
+        result = await session.execute(
+            update(self.model)
+            .where(
+                self.model.id.in_(list(amounts)),
+                self.model.version == case(
+                    versions, value=self.model.id, else_=None
+                ),
+            )
+            .values(
+                invested_amount=new_amount,
+                fully_invested=closed,
+                close_date=case(
+                    (closed, datetime.utcnow()),
+                    else_=self.model.close_date,
+                ),
+                version=self.model.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(amounts):
+            raise StaleDataError(
+                f'UPDATE statement on table {self.model.__tablename__!r} '
+                f'expected to update {len(amounts)} row(s); '
+                f'{result.rowcount} were matched.'
+            )
+
+    async def get_fifo_allocation(
+        self,
+        session: AsyncSession,
+        amount: int,
+    ) -> dict[int, tuple[int, int]]:
+        """
+        Рассчитывает в базе распределение суммы по открытым объектам.
+
+        Нарастающий итог остатков в порядке FIFO считается оконной
+        функцией; возвращаются только объекты, получающие средства,
+        в виде {id: (сумма, прочитанная версия строки)}.
+        """
+        remaining = self.model.full_amount - self.model.invested_amount
+        ranked = (
+            select(
+                self.model.id.label('id'),
+                self.model.version.label('version'),
+                remaining.label('remaining'),
+                func.sum(remaining).over(
+                    order_by=(self.model.create_date, self.model.id)
+                ).label('running'),
+            )
+            .where(self.model.fully_invested.is_(False))
+            .cte('ranked')
+        )
+        need = bindparam('need', amount)
+        before = ranked.c.running - ranked.c.remaining
+        result = await session.execute(
+            select(
+                ranked.c.id,
+                func.min(ranked.c.remaining, need - before),
+                ranked.c.version,
+            )
+            .where(before < need)
+            .order_by(ranked.c.running)
+        )
+        return {
+            obj_id: (amount, version) for obj_id, amount, version in result
+        }
@@ -0,0 +1,68 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CharityProject, Donation, InvestmentAllocation
+from app.models.archive import get_history, lookup_with_archive
+
+
+class InvestmentAllocationCRUD:
+    """Запись и чтение переводов пожертвований в проекты."""
+
+    def __init__(self, model: type[InvestmentAllocation]):
+        self.model = model
+
+    def add_many(self, session, rows: list[dict]) -> None:
+        """Добавляет переводы одним INSERT (синхронная сессия)."""
+        if rows:
+            session.execute(insert(self.model), rows)
+
+    async def get_donation_allocations(
+        self, donation_id: int, session: AsyncSession
+    ) -> list:
+        """Переводы пожертвования, включая перенесённые в архив."""
+        journal = get_history(self.model)
+        return (
+            await session.execute(
+                select(
+                    journal.c.project_id,
+                    lookup_with_archive(
+                        CharityProject, 'name', journal.c.project_id
+                    ).label('project_name'),
+                    journal.c.amount,
+                    journal.c.created_at,
+                )
+                .where(journal.c.donation_id == donation_id)
+                .order_by(journal.c.id)
+            )
+        ).all()
+
+    async def get_project_donors(
+        self, project_id: int, session: AsyncSession
+    ) -> list:
+        """Суммы, вложенные в проект каждым пользователем."""
+        journal = get_history(self.model)
+        transfers = (
+            select(
+                lookup_with_archive(
+                    Donation, 'user_id', journal.c.donation_id
+                ).label('user_id'),
+                journal.c.amount,
+            )
+            .where(journal.c.project_id == project_id)
+            .subquery()
+        )
+        total = func.sum(transfers.c.amount)
+        return (
+            await session.execute(
+                select(
+                    transfers.c.user_id,
+                    total.label('amount'),
+                    func.count().label('donations'),
+                )
+                .group_by(transfers.c.user_id)
+                .order_by(total.desc())
+            )
+        ).all()
+
+
+investment_allocation_crud = InvestmentAllocationCRUD(InvestmentAllocation)
@@ -1,5 +1,13 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
-from app.core.db import Base, engine
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.db import (
+    AsyncSessionLocal, Base, engine, get_engine_report, read_engine
+)
+from app.core.password import password_hasher
 
 from app.api.routers import main_router
 from app.api.endpoints.charity_project import router as charity_project_router
@@ -7,6 +15,15 @@ from app.api.endpoints.donation import router as donation_router
 from app.api.endpoints.user import router as user_router
 from app.core.user import fastapi_users, auth_backend
 from app.schemas.user import UserCreate, UserRead
+from app.services.allocation_queue import allocation_queue
+from app.services.allocation_retry import AllocationConflict
+from app.services.archive import archiver
+from app.services.ledger import open_pool_ledger
+from app.services.project_names import project_names
+from app.services.reports import report_renderer
+from app.services.stats import CountersUnavailable
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title='Благотворительный фонд QRKot',
@@ -58,7 +75,58 @@ async def root():
     return {'message': 'Добро пожаловать в API Благотворительного фонда QRKot'}
 
 
+@app.exception_handler(AllocationConflict)
+async def allocation_conflict_handler(request, exc):
+    return JSONResponse(status_code=409, content={'detail': str(exc)})
+
+
+@app.exception_handler(CountersUnavailable)
+async def counters_unavailable_handler(request, exc):
+    return JSONResponse(status_code=501, content={'detail': str(exc)})
+
+
 @app.on_event('startup')
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    logger.info('Параметры движка: %s', await get_engine_report(engine))
+    if read_engine is not engine:
+        logger.info(
+            'Параметры движка чтения: %s',
+            await get_engine_report(read_engine),
+        )
+    if settings.investment_ledger_enabled:
+        async with AsyncSessionLocal() as session:
+            await open_pool_ledger.warm(session)
+        app.state.ledger_reconciler = asyncio.create_task(
+            open_pool_ledger.run_reconciler(
+                AsyncSessionLocal,
+                settings.investment_ledger_reconcile_interval,
+            )
+        )
+    if settings.project_name_cache_enabled:
+        async with AsyncSessionLocal() as session:
+            await project_names.warm(session)
+    if settings.allocation_queue_enabled:
+        allocation_queue.start(AsyncSessionLocal)
+    if settings.archive_enabled:
+        app.state.archiver = asyncio.create_task(
+            archiver.run_periodically(
+                AsyncSessionLocal, settings.archive_interval
+            )
+        )
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    await allocation_queue.stop()
+    password_hasher.shutdown()
+    report_renderer.shutdown()
+    reconciler = getattr(app.state, 'ledger_reconciler', None)
+    if reconciler is not None:
+        reconciler.cancel()
+    archive_task = getattr(app.state, 'archiver', None)
+    if archive_task is not None:
+        archive_task.cancel()
+    await engine.dispose()
+    await read_engine.dispose()
@@ -1,3 +1,10 @@
 from .user import User # noqa
 from .donation import Donation # noqa
 from .charity_project import CharityProject # noqa
+from .cache_version import CacheVersion # noqa
+from .investment_allocation import InvestmentAllocation # noqa
+from .archive import ARCHIVES # noqa
+from .rebuild_checkpoint import RebuildCheckpoint # noqa
+from .fund_stats import FundStats # noqa
+from .donation_rollup import ROLLUPS # noqa
+from .donor_totals import DonorTotals # noqa
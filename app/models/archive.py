@@ -0,0 +1,87 @@
+from sqlalchemy import Column, Index, Table, func, select, union_all
+
+from .base import Base
+from .charity_project import CharityProject
+from .donation import Donation
+from .investment_allocation import InvestmentAllocation
+
+
+def archive_table(table: Table) -> Table:
+    """
+    Архивная копия таблицы: те же столбцы без ограничений.
+
+    Строки переносятся в архив вместе со своими id, а внешние ключи
+    на горячие таблицы в архиве не нужны.
+    """
+    return Table(
+        f'{table.name}_archive',
+        Base.metadata,
+        *(
+            Column(
+                column.name, column.type,
+                primary_key=column.primary_key,
+                autoincrement=False,
+                nullable=column.nullable,
+            )
+            for column in table.columns
+        ),
+    )
+
+
+charity_project_archive = archive_table(CharityProject.__table__)
+donation_archive = archive_table(Donation.__table__)
+investment_allocation_archive = archive_table(InvestmentAllocation.__table__)
+
+Index(
+    'ix_charityproject_archive_create_date',
+    charity_project_archive.c.create_date,
+)
+Index(
+    'ix_donation_archive_create_date', donation_archive.c.create_date
+)
+Index(
+    'ix_donation_archive_user_id_create_date',
+    donation_archive.c.user_id, donation_archive.c.create_date,
+)
+Index(
+    'ix_investment_allocation_archive_donation_id',
+    investment_allocation_archive.c.donation_id,
+)
+Index(
+    'ix_investment_allocation_archive_project_id',
+    investment_allocation_archive.c.project_id,
+)
+
+ARCHIVES = {
+    CharityProject: charity_project_archive,
+    Donation: donation_archive,
+    InvestmentAllocation: investment_allocation_archive,
+}
+
+
+def get_history(model):
+    """Горячая таблица модели, объединённая с её архивом."""
+    table = model.__table__
+    archive = ARCHIVES[model]
+    return union_all(
+        select(*table.columns),
+        select(*(archive.c[column.name] for column in table.columns)),
+    ).subquery(f'{table.name}_history')
+
+
+def lookup_with_archive(model, column: str, key):
+    """
+    Значение столбца строки по id из горячей таблицы или архива.
+
+    Два коррелированных поиска по первичному ключу вместо соединения
+    с объединённой таблицей, которое пришлось бы материализовать.
+    """
+    archive = ARCHIVES[model]
+    return func.coalesce(
+        select(model.__table__.c[column])
+        .where(model.__table__.c.id == key)
+        .scalar_subquery(),
+        select(archive.c[column])
+        .where(archive.c.id == key)
+        .scalar_subquery(),
+    )
@@ -1,7 +1,8 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, DateTime, Integer, Boolean, CheckConstraint
+    Column, DateTime, Integer, Boolean, CheckConstraint, Index
 )
+from sqlalchemy.orm import declared_attr
 
 from app.core.db import Base
 
@@ -19,17 +20,41 @@ class InvestmentBaseModel(Base):
     fully_invested = Column(Boolean, default=False)
     create_date = Column(DateTime, default=datetime.utcnow, nullable=False)
     close_date = Column(DateTime, nullable=True)
+    # Версия строки: ORM обновляет строку только при совпадении версии.
+    version = Column(Integer, nullable=False, server_default='1')
 
-    __table_args__ = (
-        CheckConstraint(
-            '0 <= invested_amount <= full_amount',
-            name='check_invested_amount_range'
-        ),
-        CheckConstraint(
-            'full_amount > 0',
-            name='check_full_amount_positive'
-        ),
-    )
+    def __init__(self, **kwargs):
+        # Суммы нужны распределению ещё до вставки строки,
+        # а значения default столбцы получают только при flush.
+        kwargs.setdefault('invested_amount', 0)
+        kwargs.setdefault('fully_invested', False)
+        super().__init__(**kwargs)
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.version}
+
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            CheckConstraint(
+                '0 <= invested_amount <= full_amount',
+                name='check_invested_amount_range'
+            ),
+            CheckConstraint(
+                'full_amount > 0',
+                name='check_full_amount_positive'
+            ),
+            # Индекс для обхода открытых объектов в порядке FIFO.
+            Index(
+                f'ix_{cls.__tablename__}_fully_invested_create_date',
+                'fully_invested', 'create_date'
+            ),
+            # Индекс для постраничных списков в порядке (create_date, id).
+            Index(f'ix_{cls.__tablename__}_create_date', 'create_date'),
+            # id не переиспользуются после переноса строк в архив.
+            {'sqlite_autoincrement': True},
+        )
 
     def __repr__(self):
         """
@@ -0,0 +1,58 @@
+from sqlalchemy import DDL, Column, Integer, String, event
+
+from .base import Base
+from .charity_project import CharityProject
+
+
+class CacheVersion(Base):
+    """
+    Версия содержимого таблицы для кэширования ответов.
+
+    Версия увеличивается триггерами при любом изменении таблицы,
+    в том числе сделанном в обход приложения. Epoch задаётся при
+    создании таблицы, поэтому пересозданная база не совпадёт с кэшем.
+    """
+
+    name = Column(String(50), unique=True, nullable=False)
+    epoch = Column(String(16), nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CacheVersion({self.name=}, {self.version=})>'
+
+
+def cache_version_seed(name: str) -> str:
+    """Строка версии таблицы со случайной epoch."""
+    return (
+        'INSERT INTO cacheversion (name, epoch, version) '
+        f"VALUES ('{name}', lower(hex(randomblob(8))), 0)"
+    )
+
+
+def cache_version_triggers(name: str) -> list[str]:
+    """DDL триггеров, увеличивающих версию при изменении таблицы."""
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {name}_version_{operation.lower()} '
+        f'AFTER {operation} ON {name} '
+        'BEGIN UPDATE cacheversion SET version = version + 1 '
+        f"WHERE name = '{name}'; END"
+        for operation in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+def track_table_version(table):
+    """Подключает таблицу к счётчику версий (только SQLite)."""
+    event.listen(
+        CacheVersion.__table__,
+        'after_create',
+        DDL(cache_version_seed(table.name)).execute_if(dialect='sqlite'),
+    )
+    for statement in cache_version_triggers(table.name):
+        event.listen(
+            table,
+            'after_create',
+            DDL(statement).execute_if(dialect='sqlite'),
+        )
+
+
+track_table_version(CharityProject.__table__)
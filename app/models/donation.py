@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 
 from .base import InvestmentBaseModel
@@ -17,3 +17,10 @@ class Donation(InvestmentBaseModel):
             f'{base_repr[:-1]}, user_id={self.user_id}, '
             f'comment={self.comment})'
         )
+
+
+# Индекс для списка пожертвований пользователя в порядке создания.
+Index(
+    'ix_donation_user_id_create_date',
+    Donation.user_id, Donation.create_date,
+)
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, Column, DateTime, event
+
+from .archive import donation_archive
+from .base import Base
+from .donation import Donation
+from .fund_stats import sqlite_ddl
+
+
+class DonationRollup(Base):
+    """
+    Сводка пожертвований, созданных за интервал времени.
+
+    Строки поддерживаются триггерами на donation и donation_archive
+    в той же транзакции, что и сами пожертвования, поэтому учитывают
+    и создание, и распределение средств, и перенос в архив.
+    """
+
+    __abstract__ = True
+
+    start = Column(DateTime, unique=True, nullable=False)
+    donations = Column(BigInteger, nullable=False, default=0)
+    amount = Column(BigInteger, nullable=False, default=0)
+    invested = Column(BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def bucket_of(cls, moment: datetime) -> datetime:
+        """Начало интервала, в который попадает moment."""
+        return moment - (moment - datetime.min) % cls.step
+
+    def __repr__(self):
+        return (
+            f'<{type(self).__name__}('
+            f'{self.start=}, {self.donations=}, {self.amount=})>'
+        )
+
+
+class DonationHourlyRollup(DonationRollup):
+    # Начало интервала в том же виде, в каком SQLite хранит DateTime.
+    bucket_format = '%Y-%m-%d %H:00:00.000000'
+    step = timedelta(hours=1)
+
+
+class DonationDailyRollup(DonationRollup):
+    bucket_format = '%Y-%m-%d 00:00:00.000000'
+    step = timedelta(days=1)
+
+
+ROLLUPS = {'hour': DonationHourlyRollup, 'day': DonationDailyRollup}
+
+
+def rollup_upsert(rollup, row: str, sign: str, count: str = '1') -> str:
+    """Добавляет вклад строки row в интервал её create_date."""
+    return (
+        f'INSERT INTO {rollup.__tablename__} '
+        '(start, donations, amount, invested) VALUES ('
+        f"strftime('{rollup.bucket_format}', {row}.create_date), "
+        f'{sign}{count}, {sign}{row}.full_amount, '
+        f'{sign}{row}.invested_amount) '
+        'ON CONFLICT (start) DO UPDATE SET '
+        'donations = donations + excluded.donations, '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested;'
+    )
+
+
+def rollup_triggers(table_name: str, rollup) -> list[str]:
+    """DDL триггеров, переносящих изменения пожертвований в сводку."""
+    name = f'{table_name}_{rollup.__tablename__}'
+    changed = (
+        'OLD.full_amount IS NOT NEW.full_amount OR '
+        'OLD.invested_amount IS NOT NEW.invested_amount'
+    )
+    # В интервал попадает разность сумм: число пожертвований не меняется.
+    delta = (
+        f'INSERT INTO {rollup.__tablename__} '
+        '(start, donations, amount, invested) VALUES ('
+        f"strftime('{rollup.bucket_format}', NEW.create_date), 0, "
+        'NEW.full_amount - OLD.full_amount, '
+        'NEW.invested_amount - OLD.invested_amount) '
+        'ON CONFLICT (start) DO UPDATE SET '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested;'
+    )
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {name}_insert '
+        f'AFTER INSERT ON {table_name} '
+        f"BEGIN {rollup_upsert(rollup, 'NEW', '+')} END",
+        f'CREATE TRIGGER IF NOT EXISTS {name}_delete '
+        f'AFTER DELETE ON {table_name} '
+        f"BEGIN {rollup_upsert(rollup, 'OLD', '-')} END",
+        f'CREATE TRIGGER IF NOT EXISTS {name}_update '
+        f'AFTER UPDATE ON {table_name} '
+        f'WHEN OLD.create_date IS NEW.create_date AND ({changed}) '
+        f'BEGIN {delta} END',
+        f'CREATE TRIGGER IF NOT EXISTS {name}_move '
+        f'AFTER UPDATE ON {table_name} '
+        'WHEN OLD.create_date IS NOT NEW.create_date '
+        f"BEGIN {rollup_upsert(rollup, 'OLD', '-')} "
+        f"{rollup_upsert(rollup, 'NEW', '+')} END",
+    ]
+
+
+ROLLUP_TABLES = (Donation.__table__, donation_archive)
+
+for table in ROLLUP_TABLES:
+    for rollup in ROLLUPS.values():
+        for statement in rollup_triggers(table.name, rollup):
+            event.listen(table, 'after_create', sqlite_ddl(statement))
@@ -0,0 +1,103 @@
+from sqlalchemy import (
+    BigInteger, Column, DateTime, ForeignKey, Index, Integer, event
+)
+
+from .archive import donation_archive
+from .base import Base
+from .donation import Donation
+from .fund_stats import sqlite_ddl
+
+
+class DonorTotals(Base):
+    """
+    Итоги пожертвований одного пользователя.
+
+    Строки поддерживаются триггерами на donation и donation_archive,
+    поэтому учитывают создание, распределение и перенос в архив.
+    last_donation_date только растёт: пожертвования не удаляются,
+    а при переносе в архив остаются в истории.
+    """
+
+    user_id = Column(
+        Integer, ForeignKey('user.id'), unique=True, nullable=False
+    )
+    donations = Column(BigInteger, nullable=False, default=0)
+    amount = Column(BigInteger, nullable=False, default=0)
+    invested = Column(BigInteger, nullable=False, default=0)
+    last_donation_date = Column(DateTime)
+
+    def __repr__(self):
+        return (
+            f'<DonorTotals({self.user_id=}, {self.donations=}, '
+            f'{self.amount=})>'
+        )
+
+
+# Рейтинг жертвователей читается первыми строками индекса.
+Index(
+    'ix_donortotals_amount_user_id',
+    DonorTotals.amount.desc(), DonorTotals.user_id,
+)
+
+
+def donor_totals_add(row: str) -> str:
+    return (
+        'INSERT INTO donortotals '
+        '(user_id, donations, amount, invested, last_donation_date) '
+        f'VALUES ({row}.user_id, 1, {row}.full_amount, '
+        f'{row}.invested_amount, {row}.create_date) '
+        'ON CONFLICT (user_id) DO UPDATE SET '
+        'donations = donations + 1, '
+        'amount = amount + excluded.amount, '
+        'invested = invested + excluded.invested, '
+        'last_donation_date = max('
+        'coalesce(last_donation_date, excluded.last_donation_date), '
+        'excluded.last_donation_date);'
+    )
+
+
+def donor_totals_remove(row: str) -> str:
+    return (
+        'UPDATE donortotals SET donations = donations - 1, '
+        f'amount = amount - {row}.full_amount, '
+        f'invested = invested - {row}.invested_amount '
+        f'WHERE user_id = {row}.user_id;'
+    )
+
+
+def donor_totals_triggers(table_name: str) -> list[str]:
+    """DDL триггеров, переносящих изменения пожертвований в итоги."""
+    name = f'{table_name}_donor_totals'
+    changed = (
+        'OLD.full_amount IS NOT NEW.full_amount OR '
+        'OLD.invested_amount IS NOT NEW.invested_amount'
+    )
+    delta = (
+        'UPDATE donortotals SET '
+        'amount = amount + NEW.full_amount - OLD.full_amount, '
+        'invested = invested + NEW.invested_amount - OLD.invested_amount '
+        'WHERE user_id = NEW.user_id;'
+    )
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {name}_insert '
+        f'AFTER INSERT ON {table_name} '
+        f"BEGIN {donor_totals_add('NEW')} END",
+        f'CREATE TRIGGER IF NOT EXISTS {name}_delete '
+        f'AFTER DELETE ON {table_name} '
+        f"BEGIN {donor_totals_remove('OLD')} END",
+        f'CREATE TRIGGER IF NOT EXISTS {name}_update '
+        f'AFTER UPDATE ON {table_name} '
+        f'WHEN OLD.user_id IS NEW.user_id AND ({changed}) '
+        f'BEGIN {delta} END',
+        f'CREATE TRIGGER IF NOT EXISTS {name}_move '
+        f'AFTER UPDATE ON {table_name} '
+        'WHEN OLD.user_id IS NOT NEW.user_id '
+        f"BEGIN {donor_totals_remove('OLD')} {donor_totals_add('NEW')} END",
+    ]
+
+
+DONOR_TOTALS_TABLES = (Donation.__table__, donation_archive)
+
+for table in DONOR_TOTALS_TABLES:
+    for statement in donor_totals_triggers(table.name):
+        event.listen(table, 'after_create', sqlite_ddl(statement))
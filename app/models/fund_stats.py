@@ -0,0 +1,99 @@
+from sqlalchemy import DDL, BigInteger, Column, event
+
+from .archive import charity_project_archive, donation_archive
+from .base import Base
+from .charity_project import CharityProject
+from .donation import Donation
+
+# Число строк-счётчиков: каждая запись попадает в строку по id объекта.
+STATS_SHARDS = 16
+
+# Вклад одной строки таблицы в счётчики: столбец FundStats -> выражение.
+PROJECT_METRICS = {
+    'projects': '1',
+    'projects_closed': 'COALESCE({row}.fully_invested, 0)',
+    'projects_goal': '{row}.full_amount',
+    'projects_invested': '{row}.invested_amount',
+}
+DONATION_METRICS = {
+    'donations': '1',
+    'donations_closed': 'COALESCE({row}.fully_invested, 0)',
+    'donations_amount': '{row}.full_amount',
+    'donations_invested': '{row}.invested_amount',
+}
+
+
+class FundStats(Base):
+    """
+    Шард сводной статистики фонда.
+
+    Счётчики обновляются триггерами в той же транзакции, что и строки
+    проектов и пожертвований, включая архивные. Запись идёт в строку
+    id % STATS_SHARDS + 1, поэтому параллельные записи не упираются
+    в одну строку, а сводка — сумма по STATS_SHARDS строкам.
+    """
+
+    projects = Column(BigInteger, nullable=False, default=0)
+    projects_closed = Column(BigInteger, nullable=False, default=0)
+    projects_goal = Column(BigInteger, nullable=False, default=0)
+    projects_invested = Column(BigInteger, nullable=False, default=0)
+    donations = Column(BigInteger, nullable=False, default=0)
+    donations_closed = Column(BigInteger, nullable=False, default=0)
+    donations_amount = Column(BigInteger, nullable=False, default=0)
+    donations_invested = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<FundStats({self.id=}, {self.projects=}, {self.donations=})>'
+
+
+def fund_stats_triggers(table_name: str, metrics: dict) -> list[str]:
+    """DDL триггеров, переносящих изменения таблицы в счётчики."""
+    changes = {
+        'insert': ('NEW', '+ ({new})'),
+        'delete': ('OLD', '- ({old})'),
+        'update': ('NEW', '+ ({new}) - ({old})'),
+    }
+    statements = []
+    for operation, (row, change) in changes.items():
+        assignments = ', '.join(
+            f'{column} = {column} ' + change.format(
+                new=expression.format(row='NEW'),
+                old=expression.format(row='OLD'),
+            )
+            for column, expression in metrics.items()
+        )
+        statements.append(
+            'CREATE TRIGGER IF NOT EXISTS '
+            f'{table_name}_fund_stats_{operation} '
+            f'AFTER {operation.upper()} ON {table_name} '
+            f'BEGIN UPDATE fundstats SET {assignments} '
+            f'WHERE id = {row}.id % {STATS_SHARDS} + 1; END'
+        )
+    return statements
+
+
+FUND_STATS_TABLES = {
+    CharityProject.__table__: PROJECT_METRICS,
+    charity_project_archive: PROJECT_METRICS,
+    Donation.__table__: DONATION_METRICS,
+    donation_archive: DONATION_METRICS,
+}
+FUND_STATS_COLUMNS = [*PROJECT_METRICS, *DONATION_METRICS]
+# Пустые строки-шарды с id от 1 до STATS_SHARDS.
+SEED_FUND_STATS = (
+    'WITH RECURSIVE shard(id) AS (SELECT 1 UNION ALL '
+    f'SELECT id + 1 FROM shard WHERE id < {STATS_SHARDS}) '
+    f'INSERT INTO fundstats (id, {", ".join(FUND_STATS_COLUMNS)}) '
+    f'SELECT id{", 0" * len(FUND_STATS_COLUMNS)} FROM shard'
+)
+
+
+def sqlite_ddl(statement: str) -> DDL:
+    # DDL подставляет параметры через %, поэтому знак экранируется.
+    return DDL(statement.replace('%', '%%')).execute_if(dialect='sqlite')
+
+
+event.listen(FundStats.__table__, 'after_create', sqlite_ddl(SEED_FUND_STATS))
+for table, metrics in FUND_STATS_TABLES.items():
+    for statement in fund_stats_triggers(table.name, metrics):
+        event.listen(table, 'after_create', sqlite_ddl(statement))
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from .base import Base
+
+
+class InvestmentAllocation(Base):
+    """
+    Перевод средств пожертвования в проект.
+
+    Таблица только пополняется: строка пишется при каждом
+    распределении и больше не меняется.
+    """
+
+    __tablename__ = 'investment_allocation'
+    # id не переиспользуются после переноса строк в архив.
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    donation_id = Column(
+        Integer, ForeignKey('donation.id'), nullable=False, index=True
+    )
+    project_id = Column(
+        Integer, ForeignKey('charityproject.id'), nullable=False, index=True
+    )
+    amount = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f'<InvestmentAllocation({self.donation_id=}, '
+            f'{self.project_id=}, {self.amount=})>'
+        )
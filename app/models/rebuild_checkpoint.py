@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, Text
+
+from .base import Base
+
+
+class RebuildCheckpoint(Base):
+    """
+    Точка продолжения пересчёта состояния инвестиций.
+
+    Хранится в той же транзакции, что и исправления, поэтому
+    прерванный пересчёт продолжается ровно с зафиксированного места.
+    """
+
+    name = Column(String(50), unique=True, nullable=False)
+    state = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<RebuildCheckpoint({self.name=}, {self.updated_at=})>'
+
+
+# Журнал переводов, который строит пересчёт. В конце прогона он
+# заменяет investment_allocation, а до того приложение продолжает
+# писать свои переводы в рабочий журнал.
+investment_allocation_rebuild = Table(
+    'investment_allocation_rebuild',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('donation_id', Integer, nullable=False),
+    Column('project_id', Integer, nullable=False),
+    Column('amount', Integer, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+)
@@ -33,6 +33,21 @@ class DonationDB(DonationBase):
         orm_mode = True
 
 
+class DonorSummary(BaseModel):
+    donations: int = 0
+    amount: int = 0
+    invested: int = 0
+    last_donation_date: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class DonorRank(DonorSummary):
+    user_id: int
+    email: str
+
+
 class DonationResponse(BaseModel):
     id: int
     comment: Optional[str] = None
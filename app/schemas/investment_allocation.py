@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class DonationAllocation(BaseModel):
+    project_id: int
+    project_name: str
+    amount: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ProjectDonor(BaseModel):
+    user_id: int
+    amount: int
+    donations: int
+
+    class Config:
+        orm_mode = True
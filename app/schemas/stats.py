@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class ProjectStats(BaseModel):
+    total: int
+    open: int
+    closed: int
+    goal: int
+    invested: int
+
+
+class DonationStats(BaseModel):
+    total: int
+    open: int
+    closed: int
+    amount: int
+    invested: int
+    waiting: int
+    average_amount: float
+
+
+class FundStatsDB(BaseModel):
+    projects: ProjectStats
+    donations: DonationStats
+
+
+class DonationRollupDB(BaseModel):
+    start: datetime
+    donations: int
+    amount: int
+    invested: int
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,62 @@
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Ключ advisory-блокировки PostgreSQL для распределения инвестиций.
+ALLOCATION_LOCK_KEY = 0x51524B6F74
+
+
+class LockStats:
+    """Счётчики ожидания межпроцессной блокировки распределения."""
+
+    def __init__(self):
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'acquired': self.acquired,
+            'total_wait': self.total_wait,
+            'mean_wait': self.mean_wait,
+            'max_wait': self.max_wait,
+        }
+
+
+lock_stats = LockStats()
+
+
+async def acquire_allocation_lock(session: AsyncSession) -> None:
+    """
+    Берёт блокировку распределения до конца текущей транзакции.
+
+    Блокировка общая для всех процессов, работающих с базой:
+    в SQLite транзакция открывается через BEGIN IMMEDIATE и сразу
+    получает право записи, в PostgreSQL берётся advisory-блокировка
+    транзакции. Вызывать нужно до первой записи в транзакции.
+    """
+    if not settings.allocation_lock_enabled:
+        return
+    dialect = session.bind.dialect.name
+    started = time.perf_counter()
+    if dialect == 'sqlite':
+        await session.execute(text('BEGIN IMMEDIATE'))
+    elif dialect == 'postgresql':
+        await session.execute(
+            select(func.pg_advisory_xact_lock(ALLOCATION_LOCK_KEY))
+        )
+    else:
+        return
+    lock_stats.record(time.perf_counter() - started)
@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.investment_allocation import investment_allocation_crud
+from app.models import CharityProject
+from app.models.base import InvestmentBaseModel
+
+PENDING_KEY = 'investment_allocations_pending'
+
+
+def record_allocations(
+    session: AsyncSession,
+    target: InvestmentBaseModel,
+    amounts: dict[int, int],
+) -> None:
+    """
+    Запоминает переводы из источников в цель.
+
+    Новая цель к этому моменту может быть ещё не вставлена, поэтому
+    строки журнала пишутся одним INSERT перед коммитом транзакции.
+    """
+    if amounts:
+        session.sync_session.info.setdefault(PENDING_KEY, []).append(
+            (target, amounts)
+        )
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_allocations(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    session.flush()
+    rows = []
+    for target, amounts in pending:
+        if isinstance(target, CharityProject):
+            target_key, source_key = 'project_id', 'donation_id'
+        else:
+            target_key, source_key = 'donation_id', 'project_id'
+        rows.extend(
+            {target_key: target.id, source_key: source_id, 'amount': amount}
+            for source_id, amount in amounts.items()
+        )
+    investment_allocation_crud.add_many(session, rows)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _drop_allocations(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+from collections import deque
+from typing import NamedTuple, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.base import InvestmentBaseModel
+from app.models.user import User
+from app.services.allocation_lock import acquire_allocation_lock
+from app.services.allocation_retry import run_with_retries
+from app.services.investment import transfer
+from app.services.ledger import open_pool_ledger
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationQueueBusy(Exception):
+    """Очередь распределения переполнена или остановлена."""
+
+
+class AllocationRequest(NamedTuple):
+    crud: CRUDBase
+    obj_in: BaseModel
+    sources_crud: CRUDBase
+    user: Optional[User]
+    future: asyncio.Future
+
+
+class OpenSourcesCursor:
+    """
+    Курсор по открытым источникам одного типа в пределах пачки.
+
+    Страницы дочитываются по ключу (create_date, id), поэтому каждая
+    открытая строка читается из базы не более одного раза за пачку,
+    а объекты, созданные ранее в той же пачке, попадают в конец FIFO.
+    """
+
+    def __init__(self, crud: CRUDBase, session):
+        self.crud = crud
+        self.session = session
+        self.loaded = deque()
+        self.last = None
+
+    async def allocate(
+        self, target: InvestmentBaseModel
+    ) -> list[InvestmentBaseModel]:
+        changed = []
+        while not target.fully_invested:
+            while self.loaded and self.loaded[0].fully_invested:
+                self.loaded.popleft()
+            if not self.loaded:
+                page = await self.crud.get_open_page(
+                    self.session, settings.investment_batch_size, self.last
+                )
+                if not page:
+                    break
+                self.loaded.extend(page)
+                self.last = page[-1]
+                continue
+            changed.extend(transfer(target, [self.loaded[0]], self.session))
+        return changed
+
+
+class AllocationQueue:
+    """
+    Единственный писатель распределения инвестиций в процессе.
+
+    Эндпоинты ставят запрос на создание объекта в очередь и ждут
+    результат. Воркер собирает все запросы, пришедшие в течение окна,
+    выполняет их в одной транзакции и отдаёт каждому вызывающему его
+    объект. Если транзакция пачки не удалась, запросы повторяются
+    по одному, чтобы ошибка одного не затронула остальных. Ошибка
+    после фиксации пачки к повтору не ведёт: объекты уже созданы.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.processed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._session_factory = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._closing
+
+    def start(self, session_factory):
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue(settings.allocation_queue_size)
+        self._closing = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Дожидается обработки поставленных запросов и гасит воркер."""
+        if self._worker is None:
+            return
+        self._closing = True
+        await self._queue.join()
+        self._worker.cancel()
+        self._worker = None
+
+    async def submit(
+        self,
+        crud: CRUDBase,
+        obj_in: BaseModel,
+        sources_crud: CRUDBase,
+        *,
+        user: Optional[User] = None,
+    ) -> InvestmentBaseModel:
+        if not self.running:
+            raise AllocationQueueBusy('Очередь распределения остановлена')
+        future = asyncio.get_running_loop().create_future()
+        request = AllocationRequest(crud, obj_in, sources_crud, user, future)
+        try:
+            await asyncio.wait_for(
+                self._queue.put(request),
+                settings.allocation_queue_put_timeout,
+            )
+        except asyncio.TimeoutError:
+            raise AllocationQueueBusy('Очередь распределения переполнена')
+        return await future
+
+    async def _collect(self) -> list[AllocationRequest]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.allocation_queue_window
+        while len(batch) < settings.allocation_queue_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._process(batch)
+            except Exception:
+                logger.exception('Не удалось выполнить пачку распределения')
+                for request in batch:
+                    await self._process_one(request)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process_one(self, request: AllocationRequest):
+        try:
+            await run_with_retries(lambda: self._process([request]))
+        except Exception as error:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    async def _process(self, batch: list[AllocationRequest]):
+        """
+        Выполняет пачку в одной транзакции и отдаёт результаты.
+
+        Исключение наружу означает, что пачка не зафиксирована и её
+        можно повторить. Ошибки после фиксации только пишутся в лог.
+        """
+        committed = False
+        try:
+            async with self._session_factory(
+                expire_on_commit=False
+            ) as session:
+                created, changed = await self._write(session, batch)
+                await session.commit()
+                committed = True
+            self._finish(batch, created, changed)
+        except Exception:
+            if not committed:
+                raise
+            logger.exception(
+                'Пачка распределения записана, но обработка после '
+                'записи не удалась'
+            )
+            for request, obj in zip(batch, created):
+                if not request.future.done():
+                    request.future.set_result(obj)
+
+    async def _write(self, session, batch: list[AllocationRequest]):
+        """Создаёт объекты пачки и распределяет средства до фиксации."""
+        await acquire_allocation_lock(session)
+        cursors = {}
+        created = []
+        changed = []
+        for request in batch:
+            data = request.obj_in.dict()
+            if request.user is not None:
+                data['user_id'] = request.user.id
+            obj = request.crud.model(**data)
+            session.add(obj)
+            model = request.sources_crud.model
+            if model not in cursors:
+                cursors[model] = OpenSourcesCursor(
+                    request.sources_crud, session
+                )
+            with session.no_autoflush:
+                changed.extend(await cursors[model].allocate(obj))
+            # Объект вставляется с итоговыми суммами и становится
+            # виден курсорам следующих запросов пачки.
+            await session.flush()
+            created.append(obj)
+        session.add_all(changed)
+        return created, changed
+
+    def _finish(self, batch: list[AllocationRequest], created, changed):
+        self.batches += 1
+        self.processed += len(batch)
+        for obj in (*changed, *created):
+            open_pool_ledger.track(obj)
+        for request, obj in zip(batch, created):
+            if not request.future.done():
+                request.future.set_result(obj)
+
+
+allocation_queue = AllocationQueue()
@@ -0,0 +1,78 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+
+ResultType = TypeVar('ResultType')
+
+
+class AllocationConflict(Exception):
+    """Распределение не удалось из-за конкурирующих изменений."""
+
+
+class ConflictStats:
+    """Счётчики конфликтов версий при распределении инвестиций."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.conflicts = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def conflict_rate(self) -> float:
+        return self.conflicts / self.attempts if self.attempts else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'attempts': self.attempts,
+            'conflicts': self.conflicts,
+            'retries': self.retries,
+            'failures': self.failures,
+            'conflict_rate': self.conflict_rate,
+        }
+
+
+conflict_stats = ConflictStats()
+
+
+def get_backoff(attempt: int) -> float:
+    """Экспоненциальная пауза перед повтором со случайным разбросом."""
+    delay = min(
+        settings.allocation_retry_max_delay,
+        settings.allocation_retry_base_delay * 2 ** attempt,
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+async def run_with_retries(
+    operation: Callable[[], Awaitable[ResultType]],
+    rollback: Optional[Callable[[], Awaitable[None]]] = None,
+) -> ResultType:
+    """
+    Выполняет операцию, повторяя её при конфликте версий строк.
+
+    Конфликт означает, что строку изменили после чтения, поэтому
+    после отката операция выполняется заново со свежими данными.
+    """
+    attempt = 0
+    while True:
+        conflict_stats.attempts += 1
+        try:
+            return await operation()
+        except StaleDataError as error:
+            conflict_stats.conflicts += 1
+            if rollback is not None:
+                await rollback()
+            if attempt >= settings.allocation_max_retries:
+                conflict_stats.failures += 1
+                raise AllocationConflict(
+                    'Не удалось распределить средства из-за '
+                    'одновременных изменений, повторите запрос'
+                ) from error
+            conflict_stats.retries += 1
+            await asyncio.sleep(get_backoff(attempt))
+            attempt += 1
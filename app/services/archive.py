@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import CharityProject, Donation, InvestmentAllocation
+from app.models.archive import ARCHIVES
+from app.services.allocation_lock import acquire_allocation_lock
+
+logger = logging.getLogger(__name__)
+
+# Колонка журнала переводов, ссылающаяся на архивируемую модель.
+ALLOCATION_KEYS = {
+    CharityProject: InvestmentAllocation.project_id,
+    Donation: InvestmentAllocation.donation_id,
+}
+
+
+class ArchiveProgress:
+    """Состояние последнего прогона архивации."""
+
+    def __init__(self):
+        self.running = False
+        self.dry_run = False
+        self.cutoff: Optional[datetime] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.batches = 0
+        self.candidates = {}
+        self.moved = {}
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            'running': self.running,
+            'dry_run': self.dry_run,
+            'cutoff': self.cutoff,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'batches': self.batches,
+            'candidates': self.candidates,
+            'moved': self.moved,
+            'error': self.error,
+        }
+
+
+class Archiver:
+    """
+    Перенос закрытых проектов и пожертвований в архивные таблицы.
+
+    Переносятся строки, закрытые раньше archive_after_days дней назад,
+    вместе с их переводами из журнала. Каждая пачка из
+    archive_batch_size строк переносится отдельной короткой
+    транзакцией. Закрытые строки распределение не изменяет, поэтому
+    перенос не мешает работе с открытыми объектами.
+    """
+
+    models = (Donation, CharityProject)
+
+    def __init__(self):
+        self.progress = ArchiveProgress()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.progress.running
+
+    @staticmethod
+    def closed_before(model, cutoff: datetime) -> list:
+        return [model.fully_invested.is_(True), model.close_date < cutoff]
+
+    async def count_candidates(
+        self, session: AsyncSession, model, cutoff: datetime
+    ) -> int:
+        return await session.scalar(
+            select(func.count())
+            .select_from(model)
+            .where(*self.closed_before(model, cutoff))
+        )
+
+    async def archive_batch(
+        self,
+        session: AsyncSession,
+        model,
+        cutoff: datetime,
+        batch_size: int,
+    ) -> int:
+        """Переносит в архив очередную пачку строк; 0 — переносить нечего."""
+        await acquire_allocation_lock(session)
+        ids = (
+            await session.scalars(
+                select(model.id)
+                .where(*self.closed_before(model, cutoff))
+                .order_by(model.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not ids:
+            await session.rollback()
+            return 0
+        # Сначала переводы: они ссылаются на переносимые строки.
+        for hot, key in (
+            (InvestmentAllocation, ALLOCATION_KEYS[model]),
+            (model, model.id),
+        ):
+            table = hot.__table__
+            await session.execute(
+                insert(ARCHIVES[hot]).from_select(
+                    [column.name for column in table.columns],
+                    select(table).where(key.in_(ids)),
+                )
+            )
+            await session.execute(
+                delete(table)
+                .where(key.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+        await session.commit()
+        return len(ids)
+
+    async def run(
+        self,
+        session_factory,
+        *,
+        dry_run: bool = False,
+        older_than_days: Optional[float] = None,
+        batch_size: Optional[int] = None,
+    ) -> ArchiveProgress:
+        """
+        Прогон архивации по всем моделям.
+
+        В режиме dry_run только подсчитываются строки, которые были бы
+        перенесены. Ход прогона виден в self.progress.
+        """
+        if older_than_days is None:
+            older_than_days = settings.archive_after_days
+        batch_size = batch_size or settings.archive_batch_size
+        progress = self.progress = ArchiveProgress()
+        progress.running = True
+        progress.dry_run = dry_run
+        progress.started_at = datetime.utcnow()
+        progress.cutoff = progress.started_at - timedelta(
+            days=older_than_days
+        )
+        try:
+            for model in self.models:
+                name = model.__tablename__
+                async with session_factory() as session:
+                    progress.candidates[name] = await self.count_candidates(
+                        session, model, progress.cutoff
+                    )
+                progress.moved[name] = 0
+                if dry_run:
+                    continue
+                while True:
+                    async with session_factory() as session:
+                        moved = await self.archive_batch(
+                            session, model, progress.cutoff, batch_size
+                        )
+                    if not moved:
+                        break
+                    progress.moved[name] += moved
+                    progress.batches += 1
+                    # Отдаём управление запросам между пачками.
+                    await asyncio.sleep(0)
+        except Exception as error:
+            progress.error = str(error)
+            raise
+        finally:
+            progress.running = False
+            progress.finished_at = datetime.utcnow()
+        logger.info('Архивация завершена: %s', progress.as_dict())
+        return progress
+
+    def start(self, session_factory, **kwargs) -> bool:
+        """Запускает прогон в фоне; False, если прогон уже идёт."""
+        if self.running:
+            return False
+        self.progress.running = True
+        self._task = asyncio.create_task(self._run_logged(
+            session_factory, **kwargs
+        ))
+        return True
+
+    async def _run_logged(self, session_factory, **kwargs):
+        try:
+            await self.run(session_factory, **kwargs)
+        except Exception:
+            logger.exception('Не удалось перенести строки в архив')
+
+    async def run_periodically(self, session_factory, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if not self.running:
+                await self._run_logged(session_factory)
+
+
+archiver = Archiver()
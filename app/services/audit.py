@@ -0,0 +1,157 @@
+import time
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CharityProject, Donation
+from app.models.archive import ARCHIVES, get_history
+
+
+def row_checks(columns) -> dict:
+    """
+    Условия нарушения инвариантов для одной строки таблицы.
+
+    Условия не ссылаются на fully_invested напрямую, иначе планировщик
+    SQLite выбирает индекс по нему вместо диапазона id и каждая пачка
+    перечитывает все закрытые строки.
+    """
+    closed = func.coalesce(columns.fully_invested, False)
+    return {
+        'fully_invested': closed != (
+            columns.invested_amount == columns.full_amount
+        ),
+        'close_date': closed != columns.close_date.isnot(None),
+    }
+
+
+class CheckResult:
+    """Число нарушений инварианта и первые id нарушителей."""
+
+    def __init__(self, sample_size: int):
+        self.sample_size = sample_size
+        self.count = 0
+        self.ids = {}
+
+    def add(self, table: str, obj_id: int):
+        self.count += 1
+        ids = self.ids.setdefault(table, [])
+        if len(ids) < self.sample_size:
+            ids.append(obj_id)
+
+    def as_dict(self) -> dict:
+        return {'ok': not self.count, 'count': self.count, 'ids': self.ids}
+
+
+class InvestmentAuditor:
+    """
+    Проверка инвариантов данных об инвестициях.
+
+    - суммы вложенного в проекты и из пожертвований совпадают;
+    - fully_invested равен invested_amount == full_amount;
+    - close_date заполнен ровно у закрытых объектов;
+    - открытые проекты и открытые пожертвования не существуют
+      одновременно.
+
+    Все запросы агрегатные или идут по диапазонам id пачками
+    по chunk_size и возвращают только строки-нарушители, ORM-объекты
+    не создаются. Сравнения между таблицами делаются одним запросом,
+    поэтому видят согласованный снимок даже при идущей записи.
+    Архивные таблицы проверяются вместе с горячими.
+    """
+
+    models = (CharityProject, Donation)
+
+    def __init__(
+        self, session: AsyncSession, chunk_size: int, sample_size: int
+    ):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+
+    async def check_totals(self) -> dict:
+        sums = []
+        for model in self.models:
+            history = get_history(model)
+            sums.append(
+                select(func.coalesce(func.sum(history.c.invested_amount), 0))
+                .scalar_subquery()
+            )
+        row = (await self.session.execute(select(*sums))).one()
+        totals = {
+            model.__tablename__: total
+            for model, total in zip(self.models, row)
+        }
+        return {
+            'ok': len(set(totals.values())) == 1,
+            'totals': totals,
+        }
+
+    async def check_rows(self, results: dict):
+        for model in self.models:
+            for table in (model.__table__, ARCHIVES[model]):
+                checks = row_checks(table.c)
+                first, last = (await self.session.execute(
+                    select(func.min(table.c.id), func.max(table.c.id))
+                )).one()
+                if first is None:
+                    continue
+                for start in range(first, last + 1, self.chunk_size):
+                    rows = await self.session.execute(
+                        select(table.c.id, *(
+                            condition.label(name)
+                            for name, condition in checks.items()
+                        ))
+                        .where(
+                            table.c.id >= start,
+                            table.c.id < start + self.chunk_size,
+                            or_(*checks.values()),
+                        )
+                    )
+                    for row in rows:
+                        for name in checks:
+                            if row._mapping[name]:
+                                results[name].add(table.name, row.id)
+
+    async def check_open_pools(self) -> dict:
+        """Открытые объекты обеих моделей сразу: распределение не дошло."""
+        both_open = await self.session.scalar(select(and_(*(
+            exists().where(model.fully_invested.is_(False))
+            for model in self.models
+        ))))
+        if not both_open:
+            return {'ok': True, 'ids': {}}
+        open_ids = {}
+        for model in self.models:
+            open_ids[model.__tablename__] = (
+                await self.session.scalars(
+                    select(model.id)
+                    .where(model.fully_invested.is_(False))
+                    .order_by(model.create_date, model.id)
+                    .limit(self.sample_size)
+                )
+            ).all()
+        return {'ok': False, 'ids': open_ids}
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        results = {
+            name: CheckResult(self.sample_size)
+            for name in row_checks(CharityProject)
+        }
+        report = {'totals': await self.check_totals()}
+        await self.check_rows(results)
+        for name, result in results.items():
+            report[name] = result.as_dict()
+        report['open_pools'] = await self.check_open_pools()
+        return {
+            'ok': all(check['ok'] for check in report.values()),
+            'checks': report,
+            'duration': time.perf_counter() - started,
+        }
+
+
+async def audit_investments(
+    session: AsyncSession, chunk_size: int, sample_size: int
+) -> dict:
+    """Отчёт о нарушениях инвариантов; ok — нарушений нет."""
+    return await InvestmentAuditor(session, chunk_size, sample_size).run()
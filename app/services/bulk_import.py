@@ -0,0 +1,358 @@
+import codecs
+import csv
+import json
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import commit_without_expiring
+from app.crud.base import CRUDBase
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.allocation_lock import acquire_allocation_lock
+from app.services.allocation_queue import OpenSourcesCursor
+from app.services.allocation_retry import AllocationConflict, run_with_retries
+from app.services.ledger import open_pool_ledger
+from app.services.project_names import NAME_TAKEN, project_names
+
+logger = logging.getLogger(__name__)
+
+
+def row_error(message: str, *loc: str) -> dict:
+    """Ошибка строки в том же виде, что и ошибки pydantic."""
+    return {'loc': list(loc), 'msg': message, 'type': 'value_error'}
+
+
+class RowRejected(Exception):
+    """Строка импорта не прошла проверку."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Строки текста из потока байтов в UTF-8, без концов строк."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    tail = ''
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail.rstrip('\r')
+
+
+async def parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, RowRejected([
+                row_error(f'Некорректный JSON: {error}')
+            ])
+            continue
+        if not isinstance(record, dict):
+            yield number, RowRejected([
+                row_error('Строка должна быть JSON-объектом')
+            ])
+            continue
+        yield number, record
+
+
+async def parse_csv(lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    """
+    Записи CSV с заголовком в первой строке.
+
+    Поле в кавычках может содержать перевод строки, поэтому запись
+    собирается из строк, пока число кавычек в ней нечётное. Пустые
+    поля считаются неуказанными.
+    """
+    header = None
+    parts = []
+    number = start = 0
+    async for line in lines:
+        number += 1
+        if not parts:
+            start = number
+        parts.append(line)
+        if sum(part.count('"') for part in parts) % 2:
+            continue
+        text = '\n'.join(parts)
+        parts = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield start, RowRejected([row_error(
+                f'Ожидалось полей: {len(header)}, получено: {len(values)}'
+            )])
+            continue
+        yield start, {
+            field: value for field, value in zip(header, values) if value
+        }
+    if parts:
+        yield start, RowRejected([row_error('Незакрытые кавычки')])
+
+
+PARSERS = {'ndjson': parse_ndjson, 'csv': parse_csv}
+
+
+class ImportReport:
+    """Ход импорта: счётчики строк и первые ошибки по строкам."""
+
+    def __init__(self, error_limit: int):
+        self.error_limit = error_limit
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def fail(self, line: int, errors: list[dict]):
+        self.failed += 1
+        if len(self.errors) < self.error_limit:
+            self.errors.append({'line': line, 'errors': errors})
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.duration if self.duration else 0.0
+
+    def progress(self) -> dict:
+        self.duration = time.perf_counter() - self.started
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'batches': self.batches,
+            'duration': self.duration,
+            'rows_per_second': self.rows_per_second,
+        }
+
+    def as_dict(self) -> dict:
+        return {**self.progress(), 'errors': self.errors}
+
+
+class BulkImporter:
+    """
+    Потоковый импорт объектов одной модели из NDJSON или CSV.
+
+    Строки проверяются схемой создания и копятся в пачки по
+    import_batch_size строк файла. Пачка записывается одной
+    транзакцией под блокировкой распределения: новые объекты в порядке
+    файла закрываются средствами открытых объектов другой модели,
+    которые читаются одним проходом по ключу (create_date, id), как
+    при создании объектов по одному. Строки, не прошедшие проверку,
+    попадают в отчёт в порядке файла и не мешают остальным.
+
+    У всех объектов пачки одна create_date, поэтому порядок FIFO
+    внутри пачки задают id: reserve_ids выдаёт их по возрастанию
+    в порядке файла, а следующая пачка получает не более раннюю дату
+    и большие id.
+    """
+
+    crud: CRUDBase
+    sources_crud: CRUDBase
+    schema: type[BaseModel]
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        *,
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ):
+        self.session = session
+        self.batch_size = batch_size or settings.import_batch_size
+        self.on_progress = on_progress
+        self.report = ImportReport(settings.import_error_limit)
+
+    def validate(self, record: dict) -> dict:
+        """Поля нового объекта по записи файла."""
+        try:
+            return self.schema.parse_obj(record).dict()
+        except ValidationError as error:
+            raise RowRejected(error.errors())
+
+    async def check(self, rows: list[tuple]) -> tuple[list, list]:
+        """Делит пачку на строки, которые можно записать, и отказы."""
+        return rows, []
+
+    def committed(self, created: list):
+        """Обновляет резидентные структуры после записи пачки."""
+
+    async def import_batch(self, rows: list[tuple]) -> list[tuple]:
+        """Пишет пачку и возвращает отказы как (номер строки, ошибки)."""
+        session = self.session
+
+        async def write():
+            await acquire_allocation_lock(session)
+            accepted, rejected = await self.check(rows)
+            cursor = OpenSourcesCursor(self.sources_crud, session)
+            create_date = datetime.utcnow()
+            ids = await self.crud.reserve_ids(session, len(accepted))
+            created = []
+            changed = []
+            # Новые объекты вставляются одним flush с итоговыми суммами,
+            # с заранее выданными id — пакетным executemany.
+            with session.no_autoflush:
+                for number, (_, data) in enumerate(accepted):
+                    obj = self.crud.model(**data, create_date=create_date)
+                    if ids is not None:
+                        obj.id = ids[number]
+                    session.add(obj)
+                    changed.extend(await cursor.allocate(obj))
+                    created.append(obj)
+            await session.flush()
+            await commit_without_expiring(session)
+            return created, changed, rejected
+
+        try:
+            created, changed, rejected = await run_with_retries(
+                write, rollback=session.rollback
+            )
+        except (IntegrityError, AllocationConflict) as error:
+            await session.rollback()
+            logger.warning('Пачка импорта не записана: %s', error)
+            return [
+                (line, [row_error(
+                    f'Пачка не записана: {getattr(error, "orig", error)}'
+                )])
+                for line, _ in rows
+            ]
+        for obj in (*changed, *created):
+            open_pool_ledger.track(obj)
+        self.committed(created)
+        self.report.imported += len(created)
+        return rejected
+
+    async def flush(self, rows: list[tuple], failed: list[tuple]):
+        """Пишет пачку и заносит в отчёт отказы её строк по порядку."""
+        if rows:
+            failed = [*failed, *await self.import_batch(rows)]
+            self.report.batches += 1
+        for line, errors in sorted(failed, key=lambda item: item[0]):
+            self.report.fail(line, errors)
+        if self.on_progress is not None:
+            self.on_progress(self.report.progress())
+
+    async def run(
+        self, chunks: AsyncIterable[bytes], import_format: str
+    ) -> ImportReport:
+        rows = []
+        failed = []
+        async for line, record in PARSERS[import_format](iter_lines(chunks)):
+            self.report.rows += 1
+            if isinstance(record, RowRejected):
+                failed.append((line, record.errors))
+            else:
+                try:
+                    rows.append((line, self.validate(record)))
+                except RowRejected as error:
+                    failed.append((line, error.errors))
+            # Отказы копятся вместе с пачкой: так отчёт идёт по строкам
+            # файла, хотя отказы проверки приходят после записи пачки.
+            if len(rows) + len(failed) >= self.batch_size:
+                await self.flush(rows, failed)
+                rows = []
+                failed = []
+        if rows or failed:
+            await self.flush(rows, failed)
+        return self.report
+
+
+class ProjectImporter(BulkImporter):
+    crud = charity_project_crud
+    sources_crud = donation_crud
+    schema = CharityProjectCreate
+
+    async def check(self, rows: list[tuple]) -> tuple[list, list]:
+        names = {data['name'] for _, data in rows}
+        taken = set((await self.session.scalars(
+            select(CharityProject.name).where(CharityProject.name.in_(names))
+        )).all())
+        accepted = []
+        rejected = []
+        for line, data in rows:
+            if data['name'] in taken:
+                rejected.append((line, [row_error(NAME_TAKEN, 'name')]))
+                continue
+            taken.add(data['name'])
+            accepted.append((line, data))
+        return accepted, rejected
+
+    def committed(self, created: list):
+        for project in created:
+            project_names.add(project.name, project.id)
+
+
+class DonationImporter(BulkImporter):
+    """
+    Импорт пожертвований.
+
+    Поле user_id указывает автора пожертвования; без него автором
+    становится пользователь, запустивший импорт.
+    """
+
+    crud = donation_crud
+    sources_crud = charity_project_crud
+    schema = DonationCreate
+
+    def __init__(self, session: AsyncSession, *, user_id=None, **kwargs):
+        super().__init__(session, **kwargs)
+        self.user_id = user_id
+
+    def validate(self, record: dict) -> dict:
+        data = super().validate(record)
+        user_id = record.get('user_id', self.user_id)
+        try:
+            data['user_id'] = int(user_id)
+        except (TypeError, ValueError):
+            raise RowRejected([
+                row_error('Не указан id пользователя', 'user_id')
+            ])
+        return data
+
+    async def check(self, rows: list[tuple]) -> tuple[list, list]:
+        users = set((await self.session.scalars(
+            select(User.id).where(
+                User.id.in_({data['user_id'] for _, data in rows})
+            )
+        )).all())
+        accepted = []
+        rejected = []
+        for line, data in rows:
+            if data['user_id'] in users:
+                accepted.append((line, data))
+            else:
+                rejected.append((line, [
+                    row_error('Пользователь не найден', 'user_id')
+                ]))
+        return accepted, rejected
+
+
+IMPORTERS = {
+    'charity_project': ProjectImporter,
+    'donation': DonationImporter,
+}
@@ -0,0 +1,73 @@
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Donation, User
+from app.models.archive import get_history
+from app.models.donor_totals import DonorTotals
+from app.services.allocation_lock import acquire_allocation_lock
+from app.services.stats import require_counters
+
+
+async def get_donor_summary(
+    session: AsyncSession, user_id: int
+) -> Optional[DonorTotals]:
+    """Итоги пользователя; None, если он ещё не жертвовал."""
+    require_counters(session)
+    return await session.scalar(
+        select(DonorTotals).where(DonorTotals.user_id == user_id)
+    )
+
+
+async def get_top_donors(session: AsyncSession, limit: int) -> list:
+    """Первые limit жертвователей по сумме пожертвований."""
+    require_counters(session)
+    return (
+        await session.execute(
+            select(
+                DonorTotals.user_id,
+                User.email,
+                DonorTotals.donations,
+                DonorTotals.amount,
+                DonorTotals.invested,
+                DonorTotals.last_donation_date,
+            )
+            .join(User, User.id == DonorTotals.user_id)
+            .order_by(DonorTotals.amount.desc(), DonorTotals.user_id)
+            .limit(limit)
+        )
+    ).all()
+
+
+async def rebuild_donor_totals(session: AsyncSession) -> int:
+    """
+    Пересчитывает итоги пользователей по истории пожертвований.
+
+    Работает одной транзакцией под блокировкой распределения.
+    Возвращает число пользователей.
+    """
+    require_counters(session)
+    await acquire_allocation_lock(session)
+    history = get_history(Donation).c
+    await session.execute(delete(DonorTotals))
+    await session.execute(
+        insert(DonorTotals).from_select(
+            (
+                'user_id', 'donations', 'amount', 'invested',
+                'last_donation_date',
+            ),
+            select(
+                history.user_id,
+                func.count(),
+                func.sum(history.full_amount),
+                func.sum(history.invested_amount),
+                func.max(history.create_date),
+            ).group_by(history.user_id),
+        )
+    )
+    donors = await session.scalar(
+        select(func.count()).select_from(DonorTotals)
+    )
+    await session.commit()
+    return donors
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def _to_csv(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def export_rows(
+    crud: CRUDBase,
+    schema: type[BaseModel],
+    session: AsyncSession,
+    export_format: str,
+    history: bool = False,
+    **filters,
+) -> AsyncIterator[str]:
+    """
+    Построчно выгружает объекты в NDJSON или CSV.
+
+    Строки читаются серверным курсором пачками по export_chunk_size
+    в виде кортежей столбцов, без ORM-объектов, и отдаются кусками
+    такого же размера, поэтому память не зависит от размера таблицы.
+    Набор и порядок полей совпадают со схемой ответа; с history=True
+    выгружаются и архивные строки.
+    """
+    fields = list(schema.__fields__)
+    source, columns = crud.get_source(history)
+    stmt = (
+        select(*(getattr(columns, field) for field in fields))
+        .where(*crud.get_filters(columns, **filters))
+        .order_by(columns.create_date, columns.id)
+        .execution_options(yield_per=settings.export_chunk_size)
+    )
+    result = await session.stream(stmt)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if export_format == 'csv':
+        writer.writerow(fields)
+    async for rows in result.partitions():
+        for row in rows:
+            if export_format == 'csv':
+                writer.writerow([_to_csv(value) for value in row])
+            else:
+                buffer.write(
+                    json.dumps(
+                        dict(zip(fields, row)),
+                        default=_to_json,
+                        ensure_ascii=False,
+                    )
+                )
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
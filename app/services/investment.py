@@ -1,6 +1,18 @@
 from datetime import datetime
+from typing import Callable, Optional
 
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import commit_without_expiring
+from app.crud.base import CRUDBase
 from app.models.base import InvestmentBaseModel
+from app.models.user import User
+from app.services.allocation_lock import acquire_allocation_lock
+from app.services.allocation_log import record_allocations
+from app.services.allocation_retry import run_with_retries
+from app.services.ledger import open_pool_ledger
 
 
 def process_investment(
@@ -25,3 +37,161 @@ def process_investment(
                 obj.close_date = datetime.utcnow()
         changed.append(source)
     return changed
+
+
+def transfer(
+    target: InvestmentBaseModel,
+    sources: list[InvestmentBaseModel],
+    session: AsyncSession,
+) -> list[InvestmentBaseModel]:
+    """process_investment с записью переводов в журнал распределения."""
+    before = {source.id: source.invested_amount for source in sources}
+    changed = process_investment(target, sources)
+    record_allocations(session, target, {
+        source.id: source.invested_amount - before[source.id]
+        for source in changed
+    })
+    return changed
+
+
+async def invest(
+    target: InvestmentBaseModel,
+    sources_crud: CRUDBase,
+    session: AsyncSession,
+) -> list[InvestmentBaseModel]:
+    """
+    Инвестирует в цель, обходя открытые источники пачками.
+
+    Обход останавливается, как только цель закрыта, поэтому из базы
+    загружаются только те источники, которые реально нужны. Если
+    включён резидентный пул открытых объектов, источники вовсе
+    не читаются из базы.
+    """
+    changed = []
+    if target.fully_invested:
+        return changed
+    if open_pool_ledger.ready:
+        return await open_pool_ledger.invest(target, sources_crud, session)
+    if settings.investment_engine == 'sql':
+        return await invest_sql(target, sources_crud, session)
+    async for batch in sources_crud.get_open_batches(
+        session, settings.investment_batch_size
+    ):
+        changed.extend(transfer(target, batch, session))
+        if target.fully_invested:
+            break
+    return changed
+
+
+async def reinvest(
+    target: InvestmentBaseModel,
+    sources_crud: CRUDBase,
+    session: AsyncSession,
+) -> list[InvestmentBaseModel]:
+    """
+    Приводит распределение в соответствие с изменённой суммой цели.
+
+    Если вложено уже не меньше новой суммы, цель сразу закрывается.
+    Иначе добирается только недостающая разница: invest читает
+    открытые источники в порядке FIFO и останавливается на закрытии.
+    """
+    if target.invested_amount >= target.full_amount:
+        target.fully_invested = True
+        target.close_date = datetime.utcnow()
+        return []
+    return await invest(target, sources_crud, session)
+
+
+async def invest_sql(
+    target: InvestmentBaseModel,
+    sources_crud: CRUDBase,
+    session: AsyncSession,
+) -> list[InvestmentBaseModel]:
+    """
+    Инвестирует в цель, рассчитывая распределение средствами SQL.
+
+    Распределение считается одним запросом с оконной функцией,
+    затронутые источники обновляются одним UPDATE без загрузки в сессию.
+    """
+    allocation = await sources_crud.get_fifo_allocation(
+        session, target.full_amount - target.invested_amount
+    )
+    if allocation:
+        amounts = {
+            obj_id: amount for obj_id, (amount, _) in allocation.items()
+        }
+        await sources_crud.add_invested_amounts(session, amounts, {
+            obj_id: version for obj_id, (_, version) in allocation.items()
+        })
+        record_allocations(session, target, amounts)
+        target.invested_amount += sum(amounts.values())
+        if target.invested_amount >= target.full_amount:
+            target.fully_invested = True
+            target.close_date = datetime.utcnow()
+    return []
+
+
+async def create_with_investment(
+    crud: CRUDBase,
+    obj_in: BaseModel,
+    sources_crud: CRUDBase,
+    session: AsyncSession,
+    *,
+    user: Optional[User] = None,
+) -> InvestmentBaseModel:
+    """
+    Создаёт объект и распределяет инвестиции в одной транзакции.
+
+    Транзакция начинается с блокировки распределения, поэтому
+    несколько процессов не могут одновременно вложить одни и те же
+    средства. Если блокировка отключена, строки защищены версиями,
+    и при конфликте транзакция повторяется целиком.
+    """
+    async def create():
+        await acquire_allocation_lock(session)
+        new_obj = await crud.create(obj_in, session, user=user, commit=False)
+        # Новый объект вставляется уже с итоговыми суммами одним INSERT.
+        with session.no_autoflush:
+            changed = await invest(new_obj, sources_crud, session)
+        session.add_all(changed)
+        await session.flush()
+        await commit_without_expiring(session)
+        return new_obj
+
+    return await run_with_retries(create, rollback=session.rollback)
+
+
+async def update_with_investment(
+    crud: CRUDBase,
+    obj_id: int,
+    obj_in: BaseModel,
+    sources_crud: CRUDBase,
+    session: AsyncSession,
+    *,
+    validate: Callable[[Optional[InvestmentBaseModel]], None],
+) -> InvestmentBaseModel:
+    """
+    Обновляет объект и перераспределяет инвестиции при смене суммы.
+
+    Объект читается заново в каждой попытке и проверяется функцией
+    validate. Если меняется full_amount, транзакция начинается
+    с блокировки распределения и в ней же выполняется reinvest.
+    """
+    amount_changed = 'full_amount' in obj_in.dict(exclude_unset=True)
+
+    async def update():
+        if amount_changed:
+            await acquire_allocation_lock(session)
+        db_obj = await session.get(crud.model, obj_id, populate_existing=True)
+        validate(db_obj)
+        db_obj = await crud.update(session, db_obj, obj_in, commit=False)
+        if amount_changed:
+            # Объект обновляется одним UPDATE уже с итоговыми суммами.
+            with session.no_autoflush:
+                changed = await reinvest(db_obj, sources_crud, session)
+            session.add_all(changed)
+        await session.flush()
+        await commit_without_expiring(session)
+        return db_obj
+
+    return await run_with_retries(update, rollback=session.rollback)
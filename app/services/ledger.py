@@ -0,0 +1,302 @@
+import asyncio
+import logging
+from bisect import insort
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.crud.base import CRUDBase
+from app.models import CharityProject, Donation
+from app.models.base import InvestmentBaseModel
+from app.services.allocation_log import record_allocations
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'open_pool_ledger_pending'
+
+
+class OpenPool:
+    """
+    FIFO открытых объектов одного типа.
+
+    Хранит только пары (id, остаток) в порядке (create_date, id)
+    и версии строк, с которыми сверяется UPDATE при распределении.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._queued = set()
+        self._remaining = {}
+        self._versions = {}
+
+    def __len__(self):
+        return len(self._remaining)
+
+    def __contains__(self, obj_id: int) -> bool:
+        return obj_id in self._remaining
+
+    def put(
+        self,
+        obj_id: int,
+        create_date: datetime,
+        remaining: int,
+        version: Optional[int] = None,
+    ):
+        if remaining <= 0:
+            self.discard(obj_id)
+            return
+        if version is not None:
+            self._versions[obj_id] = version
+        if obj_id not in self._queued:
+            key = (create_date, obj_id)
+            if not self._queue or self._queue[-1] < key:
+                self._queue.append(key)
+            else:
+                insort(self._queue, key)
+            self._queued.add(obj_id)
+        self._remaining[obj_id] = remaining
+
+    def discard(self, obj_id: int):
+        # Ключ остаётся в очереди и удаляется при следующем обходе.
+        self._remaining.pop(obj_id, None)
+        self._versions.pop(obj_id, None)
+
+    def version(self, obj_id: int) -> Optional[int]:
+        return self._versions.get(obj_id)
+
+    def advance(self, obj_ids, step: int = 1):
+        """Сдвигает версии строк после UPDATE или его отката."""
+        for obj_id in obj_ids:
+            if obj_id in self._versions:
+                self._versions[obj_id] += step
+
+    def forget_closed(self, obj_ids):
+        # Версия закрытого объекта нужна, только пока возможен откат.
+        for obj_id in obj_ids:
+            if obj_id not in self._remaining:
+                self._versions.pop(obj_id, None)
+
+    def take(self, amount: int) -> list[tuple[tuple[datetime, int], int]]:
+        """Списывает сумму с самых старых объектов и возвращает списания."""
+        taken = []
+        while amount > 0 and self._queue:
+            key = self._queue[0]
+            obj_id = key[1]
+            remaining = self._remaining.get(obj_id)
+            if remaining is None:
+                self._queue.popleft()
+                self._queued.discard(obj_id)
+                continue
+            part = min(amount, remaining)
+            taken.append((key, part))
+            amount -= part
+            if part == remaining:
+                self._queue.popleft()
+                self._queued.discard(obj_id)
+                del self._remaining[obj_id]
+            else:
+                self._remaining[obj_id] = remaining - part
+        return taken
+
+    def give_back(self, taken: list[tuple[tuple[datetime, int], int]]):
+        """Возвращает списания, сделанные методом take."""
+        for (create_date, obj_id), part in reversed(taken):
+            self.put(
+                obj_id, create_date, self._remaining.get(obj_id, 0) + part
+            )
+
+
+class OpenPoolLedger:
+    """
+    Резидентное зеркало открытых проектов и пожертвований.
+
+    Распределение выполняется в памяти: суммы резервируются в пуле,
+    в базу уходит один UPDATE затронутых строк, а после коммита
+    резерв закрепляется (при откате — возвращается в пул).
+    """
+
+    def __init__(self):
+        self.pools = {CharityProject: OpenPool(), Donation: OpenPool()}
+        self.ready = False
+        self._inflight = 0
+        self._generation = 0
+
+    async def _load(self, session: AsyncSession) -> dict:
+        pools = {}
+        for model in self.pools:
+            pool = OpenPool()
+            rows = await session.execute(
+                select(
+                    model.id,
+                    model.create_date,
+                    model.full_amount - model.invested_amount,
+                    model.version,
+                )
+                .where(model.fully_invested.is_(False))
+                .order_by(model.create_date, model.id)
+            )
+            for row in rows:
+                pool.put(*row)
+            pools[model] = pool
+        return pools
+
+    async def warm(self, session: AsyncSession):
+        self.pools = await self._load(session)
+        self.ready = True
+
+    async def reconcile(self, session: AsyncSession) -> bool:
+        """
+        Сверяет пулы с базой.
+
+        Если во время чтения шло распределение, сверка пропускается
+        до следующего раза, чтобы не затереть незакоммиченный резерв.
+        """
+        generation = self._generation
+        pools = await self._load(session)
+        if self._inflight or generation != self._generation:
+            return False
+        self.pools = pools
+        return True
+
+    async def run_reconciler(self, session_factory, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.reconcile(session)
+            except Exception:
+                logger.exception('Не удалось сверить пул открытых объектов')
+
+    def track(self, obj: InvestmentBaseModel):
+        """Отражает в пуле текущее состояние закоммиченного объекта."""
+        if not self.ready:
+            return
+        self._generation += 1
+        pool = self.pools[type(obj)]
+        if obj.fully_invested:
+            pool.discard(obj.id)
+        else:
+            pool.put(
+                obj.id, obj.create_date,
+                obj.full_amount - obj.invested_amount, obj.version
+            )
+
+    def discard(self, model: type[InvestmentBaseModel], obj_id: int):
+        if self.ready:
+            self._generation += 1
+            self.pools[model].discard(obj_id)
+
+    async def invest(
+        self,
+        target: InvestmentBaseModel,
+        sources_crud: CRUDBase,
+        session: AsyncSession,
+    ) -> list[InvestmentBaseModel]:
+        """Распределяет средства цели по источникам из пула."""
+        pool = self.pools[sources_crud.model]
+        self._generation += 1
+        taken = pool.take(target.full_amount - target.invested_amount)
+        self._inflight += 1
+        pending = session.sync_session.info.setdefault(PENDING_KEY, [])
+        # (модель, списания, цель, версии сдвинуты, строки из базы)
+        pending.append((sources_crud.model, taken, None, False, None))
+        if taken:
+            amounts = {key[1]: part for key, part in taken}
+            try:
+                await sources_crud.add_invested_amounts(
+                    session,
+                    amounts,
+                    {obj_id: pool.version(obj_id) for obj_id in amounts},
+                )
+            except StaleDataError:
+                # Строки изменены в обход пула: после отката пул
+                # получит их текущее состояние, и повтор пройдёт.
+                pending[-1] = (
+                    sources_crud.model, taken, None, False,
+                    await self._read_rows(
+                        session, sources_crud.model, amounts
+                    ),
+                )
+                raise
+            # Следующее списание в этой же транзакции сверяется
+            # уже с новыми версиями строк.
+            pool.advance(amounts)
+            pending[-1] = (sources_crud.model, taken, None, True, None)
+            record_allocations(session, target, amounts)
+            target.invested_amount += sum(amounts.values())
+            if target.invested_amount >= target.full_amount:
+                target.fully_invested = True
+                target.close_date = datetime.utcnow()
+        if not target.fully_invested:
+            # Атрибуты цели после коммита будут просрочены,
+            # поэтому запоминаем всё, что нужно для пула, заранее.
+            # Новая цель вставляется здесь, уже с итоговой суммой.
+            await session.flush()
+            pending[-1] = (
+                sources_crud.model,
+                taken,
+                (
+                    type(target), target.id, target.create_date,
+                    target.full_amount - target.invested_amount,
+                    target.version,
+                ),
+                *pending[-1][3:],
+            )
+        return []
+
+    async def _read_rows(
+        self, session: AsyncSession, model, ids
+    ) -> list[tuple]:
+        return (
+            await session.execute(
+                select(
+                    model.id,
+                    model.create_date,
+                    model.full_amount - model.invested_amount,
+                    model.version,
+                ).where(model.id.in_(list(ids)))
+            )
+        ).all()
+
+    def _settle(self, session: Session, committed: bool):
+        pending = session.info.pop(PENDING_KEY, None)
+        if not pending:
+            return
+        self._generation += 1
+        for model, taken, target, advanced, fresh in reversed(pending):
+            self._inflight -= 1
+            pool = self.pools[model]
+            obj_ids = [key[1] for key, _ in taken]
+            if not committed:
+                pool.give_back(taken)
+                if advanced:
+                    pool.advance(obj_ids, -1)
+                if fresh is not None:
+                    for obj_id in obj_ids:
+                        pool.discard(obj_id)
+                    for row in fresh:
+                        pool.put(*row)
+                continue
+            pool.forget_closed(obj_ids)
+            if target is not None:
+                target_model, *state = target
+                self.pools[target_model].put(*state)
+
+
+open_pool_ledger = OpenPoolLedger()
+
+
+@event.listens_for(Session, 'after_commit')
+def _settle_after_commit(session: Session):
+    open_pool_ledger._settle(session, committed=True)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _settle_after_rollback(session: Session, transaction):
+    if transaction.parent is None:
+        open_pool_ledger._settle(session, committed=False)
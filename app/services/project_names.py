@@ -0,0 +1,44 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CharityProject
+
+NAME_TAKEN = 'Проект с таким именем уже существует!'
+
+
+class ProjectNameRegistry:
+    """
+    Резидентный набор занятых имён проектов.
+
+    Отсекает очевидные дубликаты без обращения к базе. Уникальность
+    по-прежнему гарантирует индекс на charityproject.name: набор
+    не знает о проектах, созданных в обход API, а переименования
+    и удаления в других процессах не видит, поэтому включать его
+    стоит при одном процессе приложения.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._names = {}
+
+    async def warm(self, session: AsyncSession):
+        rows = await session.execute(
+            select(CharityProject.name, CharityProject.id)
+        )
+        self._names = dict(rows.all())
+        self.ready = True
+
+    def is_taken(self, name: str, project_id: Optional[int] = None) -> bool:
+        return self.ready and self._names.get(name, project_id) != project_id
+
+    def add(self, name: str, project_id: int):
+        if self.ready:
+            self._names[name] = project_id
+
+    def discard(self, name: str):
+        self._names.pop(name, None)
+
+
+project_names = ProjectNameRegistry()
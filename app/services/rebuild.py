@@ -0,0 +1,403 @@
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import (
+    bindparam, delete, insert, literal, select, tuple_, update
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.db import commit_without_expiring
+from app.models import (
+    CharityProject, Donation, InvestmentAllocation, RebuildCheckpoint
+)
+from app.models.archive import ARCHIVES
+from app.models.rebuild_checkpoint import investment_allocation_rebuild
+from app.services.allocation_lock import acquire_allocation_lock
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'investments'
+REPLAY_COLUMNS = (
+    'id', 'create_date', 'full_amount',
+    'invested_amount', 'fully_invested', 'close_date', 'version',
+)
+
+
+class TableStream:
+    """Строки одной таблицы в порядке (create_date, id), пачками."""
+
+    def __init__(self, session, table, archived, chunk_size, after=None):
+        self.session = session
+        self.table = table
+        self.archived = archived
+        self.chunk_size = chunk_size
+        self.after = after
+        self.loaded = deque()
+        self.exhausted = False
+
+    async def peek(self):
+        if not self.loaded and not self.exhausted:
+            columns = self.table.c
+            stmt = (
+                select(*(columns[name] for name in REPLAY_COLUMNS))
+                .order_by(columns.create_date, columns.id)
+                .limit(self.chunk_size)
+            )
+            if self.after is not None:
+                create_date, obj_id = self.after
+                stmt = stmt.where(
+                    tuple_(columns.create_date, columns.id) > tuple_(
+                        literal(create_date, columns.create_date.type),
+                        obj_id,
+                    )
+                )
+            rows = (await self.session.execute(stmt)).all()
+            self.exhausted = len(rows) < self.chunk_size
+            if rows:
+                self.after = (rows[-1].create_date, rows[-1].id)
+            self.loaded.extend(rows)
+        return self.loaded[0] if self.loaded else None
+
+    def pop(self):
+        return self.loaded.popleft()
+
+    def reopen(self):
+        """Снова читает таблицу после конца: строки могли добавиться."""
+        self.exhausted = False
+
+
+class ReplayStream:
+    """
+    Объекты модели в порядке FIFO вместе с архивными.
+
+    Горячая таблица и архив читаются по ключу (create_date, id)
+    и сливаются, поэтому в памяти не больше двух пачек строк.
+    """
+
+    def __init__(self, session, model, chunk_size, after=None):
+        self.model = model
+        self.streams = [
+            TableStream(session, model.__table__, False, chunk_size, after),
+            TableStream(session, ARCHIVES[model], True, chunk_size, after),
+        ]
+
+    async def next(self):
+        """Следующий объект как (строка, архивный ли) или None."""
+        best = None
+        for stream in self.streams:
+            row = await stream.peek()
+            if row is not None and (
+                best is None or
+                (row.create_date, row.id) < (best[0].create_date, best[0].id)
+            ):
+                best = (row, stream)
+        if best is None:
+            return None
+        row, stream = best
+        stream.pop()
+        return row, stream.archived
+
+    def reopen(self):
+        for stream in self.streams:
+            stream.reopen()
+
+
+def _dump_key(key: Optional[tuple[datetime, int]]) -> Optional[list]:
+    return None if key is None else [key[0].isoformat(), key[1]]
+
+
+def _load_key(key: Optional[list]) -> Optional[tuple[datetime, int]]:
+    return None if key is None else (datetime.fromisoformat(key[0]), key[1])
+
+
+class ReplaySide:
+    """Поток объектов одной модели и текущий, ещё не закрытый объект."""
+
+    def __init__(self, session, model, chunk_size, state: dict):
+        self.model = model
+        # Ключ последнего объекта, состояние которого уже посчитано.
+        self.done = _load_key(state.get('done'))
+        self.stream = ReplayStream(session, model, chunk_size, self.done)
+        self.current = None
+        self.archived = False
+        self.invested = state.get('invested', 0)
+
+    async def advance(self, keep_invested: bool = False):
+        item = await self.stream.next()
+        self.current, self.archived = item if item else (None, False)
+        if not keep_invested:
+            self.invested = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.current.full_amount - self.invested
+
+    def state(self) -> dict:
+        return {'done': _dump_key(self.done), 'invested': self.invested}
+
+
+class InvestmentRebuild:
+    """
+    Пересчёт invested_amount, fully_invested и close_date с нуля.
+
+    Проекты и пожертвования, включая архивные, проигрываются
+    в порядке create_date с той же семантикой FIFO, что
+    и process_investment: каждый объект по очереди закрывается
+    средствами самых ранних открытых объектов другой модели.
+    Итоговые суммы не зависят от того, как чередовались проекты
+    и пожертвования, а закрытие объекта приходится на создание
+    того, кто его закрыл.
+
+    Расхождения записываются пакетными UPDATE каждые chunk_size
+    посчитанных объектов, в той же транзакции сохраняется точка
+    продолжения. Архивные строки не изменяются, расхождения в них
+    только подсчитываются.
+
+    Пачка пишется под блокировкой распределения, а UPDATE сверяет
+    версию строки с прочитанной, как add_invested_amounts. Если
+    приложение изменило строку после чтения, пачка откатывается
+    с StaleDataError, и перезапуск продолжит с последней точки.
+    Сдвинутые версии заставляют пул работающего приложения
+    перечитать исправленные строки при следующем распределении.
+
+    Когда объекты одной модели кончаются, дальше идут открытые
+    объекты, которые приложение продолжает закрывать. Этот хвост
+    проигрывается одной транзакцией под блокировкой: потоки
+    дочитываются заново, и новых объектов за их концом уже
+    не появится.
+
+    Журнал переводов строится в investment_allocation_rebuild:
+    новый прогон очищает его в транзакции первой пачки, и каждая
+    пачка дописывает свои переводы. Рабочий журнал, в который
+    приложение пишет переводы во время прогона, заменяется
+    построенным в транзакции последней пачки. Переводы с архивным
+    объектом лежат в архиве журнала и, как архивные строки,
+    не изменяются.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        chunk_size: int,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.checkpoint: Optional[RebuildCheckpoint] = None
+        self.stats = {
+            'projects': 0,
+            'donations': 0,
+            'corrected': 0,
+            'archive_mismatches': 0,
+            'journal_rows': 0,
+            'batches': 0,
+        }
+        self.pending = {CharityProject: [], Donation: []}
+        self.transfers = []
+        self.clear_journal = False
+        self.locked = False
+        self.finished_since_flush = 0
+
+    async def load_checkpoint(self, reset: bool) -> dict:
+        self.checkpoint = await self.session.scalar(
+            select(RebuildCheckpoint)
+            .where(RebuildCheckpoint.name == CHECKPOINT_NAME)
+        )
+        if self.checkpoint is None or reset:
+            self.clear_journal = True
+            return {}
+        state = json.loads(self.checkpoint.state)
+        self.stats.update(state['stats'])
+        logger.info('Пересчёт продолжается с точки %s', state)
+        return state
+
+    def finish(self, side: ReplaySide, closed_at: Optional[datetime]):
+        """Записывает посчитанное состояние текущего объекта side."""
+        row = side.current
+        fully_invested = side.invested == row.full_amount
+        close_date = None
+        if fully_invested:
+            close_date = row.close_date if row.fully_invested else None
+            close_date = close_date or closed_at
+        name = 'projects' if side.model is CharityProject else 'donations'
+        self.stats[name] += 1
+        if (
+            row.invested_amount != side.invested or
+            bool(row.fully_invested) != fully_invested or
+            row.close_date != close_date
+        ):
+            if side.archived:
+                self.stats['archive_mismatches'] += 1
+            else:
+                self.pending[side.model].append({
+                    'obj_id': row.id,
+                    'expected_version': row.version,
+                    'new_invested': side.invested,
+                    'new_fully_invested': fully_invested,
+                    'new_close_date': close_date,
+                })
+        side.done = (row.create_date, row.id)
+        self.finished_since_flush += 1
+
+    def transfer(self, projects: ReplaySide, donations: ReplaySide,
+                 amount: int, created_at: datetime):
+        """Запоминает перевод для журнала, если оба объекта не в архиве."""
+        if projects.archived or donations.archived:
+            return
+        self.transfers.append({
+            'donation_id': donations.current.id,
+            'project_id': projects.current.id,
+            'amount': amount,
+            'created_at': created_at,
+        })
+
+    async def lock(self, sides: list[ReplaySide]):
+        """Берёт блокировку до конца прогона и дочитывает потоки."""
+        await self.flush(sides)
+        await acquire_allocation_lock(self.session)
+        self.locked = True
+        for side in sides:
+            side.stream.reopen()
+            if side.current is None:
+                await side.advance()
+
+    async def replace_journal(self):
+        """Заменяет рабочий журнал переводов построенным."""
+        journal = investment_allocation_rebuild
+        columns = ('donation_id', 'project_id', 'amount', 'created_at')
+        await self.session.execute(delete(InvestmentAllocation))
+        await self.session.execute(
+            insert(InvestmentAllocation).from_select(
+                columns,
+                select(*(journal.c[name] for name in columns))
+                .order_by(journal.c.id),
+            )
+        )
+        await self.session.execute(delete(journal))
+
+    async def write_corrections(self):
+        for model, rows in self.pending.items():
+            if not rows:
+                continue
+            table = model.__table__
+            result = await self.session.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam('obj_id'),
+                    table.c.version == bindparam('expected_version'),
+                )
+                .values(
+                    invested_amount=bindparam('new_invested'),
+                    fully_invested=bindparam('new_fully_invested'),
+                    close_date=bindparam('new_close_date'),
+                    version=table.c.version + 1,
+                ),
+                rows,
+            )
+            if result.rowcount != len(rows):
+                raise StaleDataError(
+                    f'{table.name}: строки изменены во время пересчёта, '
+                    'запустите его снова'
+                )
+            self.stats['corrected'] += len(rows)
+            rows.clear()
+
+    async def flush(self, sides: list[ReplaySide], finished: bool = False):
+        """Пишет накопленные исправления и точку продолжения."""
+        if not self.locked:
+            await acquire_allocation_lock(self.session)
+        if self.clear_journal:
+            await self.session.execute(delete(investment_allocation_rebuild))
+            self.clear_journal = False
+        if self.transfers:
+            await self.session.execute(
+                insert(investment_allocation_rebuild), self.transfers
+            )
+            self.stats['journal_rows'] += len(self.transfers)
+            self.transfers = []
+        await self.write_corrections()
+        self.stats['batches'] += 1
+        if finished:
+            await self.replace_journal()
+            if self.checkpoint is not None:
+                await self.session.delete(self.checkpoint)
+                self.checkpoint = None
+        elif not self.locked:
+            state = json.dumps({
+                **{
+                    side.model.__tablename__: side.state() for side in sides
+                },
+                'stats': self.stats,
+            })
+            if self.checkpoint is None:
+                self.checkpoint = RebuildCheckpoint(name=CHECKPOINT_NAME)
+                self.session.add(self.checkpoint)
+            self.checkpoint.state = state
+            self.checkpoint.updated_at = datetime.utcnow()
+        # Хвост пишется одной транзакцией до конца прогона, точка
+        # продолжения внутри неё не нужна.
+        if finished or not self.locked:
+            await commit_without_expiring(self.session)
+        self.finished_since_flush = 0
+        if self.on_progress is not None:
+            self.on_progress(dict(self.stats))
+
+    async def replay(self, sides: list[ReplaySide]):
+        """Закрывает объекты, пока не кончатся объекты одной из моделей."""
+        projects, donations = sides
+        while projects.current is not None and donations.current is not None:
+            amount = min(projects.remaining, donations.remaining)
+            projects.invested += amount
+            donations.invested += amount
+            closed_at = max(
+                projects.current.create_date, donations.current.create_date
+            )
+            self.transfer(projects, donations, amount, closed_at)
+            for side in sides:
+                if not side.remaining:
+                    self.finish(side, closed_at)
+                    await side.advance()
+            if self.finished_since_flush >= self.chunk_size:
+                await self.flush(sides)
+
+    async def run(self, reset: bool = False) -> dict:
+        state = await self.load_checkpoint(reset)
+        projects, donations = sides = [
+            ReplaySide(
+                self.session, model, self.chunk_size,
+                state.get(model.__tablename__, {}),
+            )
+            for model in (CharityProject, Donation)
+        ]
+        for side in sides:
+            await side.advance(keep_invested=True)
+        await self.replay(sides)
+        await self.lock(sides)
+        await self.replay(sides)
+        # Хвост одной из моделей остаётся открытым.
+        for side in sides:
+            while side.current is not None:
+                self.finish(side, None)
+                await side.advance()
+                if self.finished_since_flush >= self.chunk_size:
+                    await self.flush(sides)
+        await self.flush(sides, finished=True)
+        return self.stats
+
+
+async def rebuild_investments(
+    session: AsyncSession,
+    chunk_size: int,
+    *,
+    reset: bool = False,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """Пересчитывает состояние инвестиций, продолжая прерванный прогон."""
+    return await InvestmentRebuild(session, chunk_size, on_progress).run(
+        reset
+    )
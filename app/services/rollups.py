@@ -0,0 +1,122 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Donation
+from app.models.archive import get_history
+from app.models.donation_rollup import ROLLUPS
+from app.services.allocation_lock import acquire_allocation_lock
+from app.services.stats import require_counters
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLUMNS = ('start', 'donations', 'amount', 'invested')
+
+
+async def get_donation_rollups(
+    session: AsyncSession, bucket: str, start: datetime, end: datetime
+) -> list:
+    """
+    Строки сводки за [start, end) по возрастанию начала интервала.
+
+    Интервалы без пожертвований в ответ не попадают.
+    """
+    require_counters(session)
+    rollup = ROLLUPS[bucket]
+    return (
+        await session.scalars(
+            select(rollup)
+            .where(
+                rollup.start >= rollup.bucket_of(start),
+                rollup.start < end,
+            )
+            .order_by(rollup.start)
+        )
+    ).all()
+
+
+async def rebuild_rollup_range(
+    session: AsyncSession,
+    start: Optional[datetime],
+    end: Optional[datetime],
+):
+    """
+    Пересчитывает строки сводок за [start, end) по пожертвованиям.
+
+    Удаление и вставка идут в одной транзакции под блокировкой
+    распределения, поэтому триггеры до и после пересчёта дают
+    точные значения. None — граница не ограничена.
+    """
+    await acquire_allocation_lock(session)
+    history = get_history(Donation).c
+    for rollup in ROLLUPS.values():
+        table = rollup.__table__
+        bounds = []
+        source = []
+        if start is not None:
+            bounds.append(table.c.start >= start)
+            source.append(history.create_date >= start)
+        if end is not None:
+            bounds.append(table.c.start < end)
+            source.append(history.create_date < end)
+        bucket = func.strftime(
+            rollup.bucket_format, history.create_date
+        ).label('bucket')
+        await session.execute(delete(table).where(*bounds))
+        await session.execute(
+            insert(table).from_select(
+                ROLLUP_COLUMNS,
+                select(
+                    bucket,
+                    func.count(),
+                    func.sum(history.full_amount),
+                    func.sum(history.invested_amount),
+                )
+                .where(*source)
+                .group_by(bucket),
+            )
+        )
+    await session.commit()
+
+
+async def backfill_rollups(
+    session: AsyncSession,
+    days: int,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Строит сводки по истории пожертвований, включая архив.
+
+    История пересчитывается отрезками по days суток, каждый отрезок —
+    отдельной короткой транзакцией, так что приложение может
+    работать во время пересчёта. Первый и последний отрезки открыты,
+    чтобы заодно убрать строки сводок вне диапазона пожертвований
+    и учесть пожертвования, созданные во время пересчёта.
+    """
+    require_counters(session)
+    history = get_history(Donation).c
+    first, last = (
+        await session.execute(select(
+            func.min(history.create_date), func.max(history.create_date)
+        ))
+    ).one()
+    await session.commit()
+    bounds = [None]
+    if first is not None:
+        step = timedelta(days=days)
+        moment = ROLLUPS['day'].bucket_of(first) + step
+        while moment <= last:
+            bounds.append(moment)
+            moment += step
+    bounds.append(None)
+    stats = {'chunks': 0, 'total_chunks': len(bounds) - 1}
+    for start, end in zip(bounds, bounds[1:]):
+        await rebuild_rollup_range(session, start, end)
+        stats['chunks'] += 1
+        if on_progress is not None:
+            on_progress(dict(stats))
+    logger.info('Сводки пожертвований построены: %s', stats)
+    return stats
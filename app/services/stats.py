@@ -0,0 +1,115 @@
+from sqlalchemy import case, delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CharityProject, Donation
+from app.models.archive import get_history
+from app.models.fund_stats import (
+    DONATION_METRICS, FUND_STATS_COLUMNS, PROJECT_METRICS, SEED_FUND_STATS,
+    FundStats
+)
+from app.services.allocation_lock import acquire_allocation_lock
+
+# СУБД, в которых сводные счётчики поддерживаются триггерами.
+COUNTER_DIALECTS = ('sqlite',)
+
+
+class CountersUnavailable(Exception):
+    """Сводные счётчики не ведутся в этой СУБД."""
+
+
+def require_counters(session: AsyncSession) -> None:
+    """
+    Проверяет, что триггеры ведут счётчики в базе сессии.
+
+    Без триггеров таблицы счётчиков остаются нулевыми, и чтение
+    из них молча вернуло бы неверные данные.
+    """
+    dialect = session.bind.dialect.name
+    if dialect not in COUNTER_DIALECTS:
+        raise CountersUnavailable(
+            f'Сводные счётчики ведутся триггерами только в '
+            f'{", ".join(COUNTER_DIALECTS)}, а база работает на {dialect}'
+        )
+
+
+async def get_fund_totals(session: AsyncSession) -> dict:
+    """Сумма счётчиков по всем шардам."""
+    require_counters(session)
+    row = (
+        await session.execute(select(*(
+            func.coalesce(func.sum(getattr(FundStats, column)), 0)
+            for column in FUND_STATS_COLUMNS
+        )))
+    ).one()
+    return dict(zip(FUND_STATS_COLUMNS, row))
+
+
+async def get_fund_stats(session: AsyncSession) -> dict:
+    """Сводка фонда; чтение не зависит от объёма данных."""
+    totals = await get_fund_totals(session)
+    donations = totals['donations']
+    return {
+        'projects': {
+            'total': totals['projects'],
+            'open': totals['projects'] - totals['projects_closed'],
+            'closed': totals['projects_closed'],
+            'goal': totals['projects_goal'],
+            'invested': totals['projects_invested'],
+        },
+        'donations': {
+            'total': donations,
+            'open': donations - totals['donations_closed'],
+            'closed': totals['donations_closed'],
+            'amount': totals['donations_amount'],
+            'invested': totals['donations_invested'],
+            'waiting': (
+                totals['donations_amount'] - totals['donations_invested']
+            ),
+            'average_amount': (
+                totals['donations_amount'] / donations if donations else 0
+            ),
+        },
+    }
+
+
+async def compute_fund_totals(session: AsyncSession) -> dict:
+    """Счётчики, посчитанные заново по таблицам и их архивам."""
+    totals = {}
+    for model, metrics in (
+        (CharityProject, PROJECT_METRICS), (Donation, DONATION_METRICS)
+    ):
+        columns = get_history(model).c
+        # Порядок столбцов совпадает с порядком счётчиков в metrics.
+        row = (
+            await session.execute(select(
+                func.count(),
+                func.sum(case((columns.fully_invested.is_(True), 1), else_=0)),
+                func.sum(columns.full_amount),
+                func.sum(columns.invested_amount),
+            ))
+        ).one()
+        totals.update({
+            column: value or 0 for column, value in zip(metrics, row)
+        })
+    return totals
+
+
+async def reconcile_fund_stats(session: AsyncSession) -> dict:
+    """
+    Пересчитывает счётчики по базовым таблицам.
+
+    Работает под блокировкой распределения, поэтому новые записи
+    не теряются между подсчётом и перезаписью счётчиков. Таблицу
+    и триггеры создают миграции.
+    """
+    require_counters(session)
+    await acquire_allocation_lock(session)
+    before = await get_fund_totals(session)
+    after = await compute_fund_totals(session)
+    await session.execute(delete(FundStats))
+    await session.execute(text(SEED_FUND_STATS))
+    await session.execute(
+        update(FundStats).where(FundStats.id == 1).values(**after)
+    )
+    await session.commit()
+    return {'before': before, 'after': after}
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.services.audit import audit_investments
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Проверяет инварианты данных об инвестициях и печатает отчёт '
+            'в JSON. Код выхода 1 означает найденные нарушения.'
+        )
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=settings.audit_chunk_size,
+        help='Размер диапазона id для построчных проверок',
+    )
+    parser.add_argument(
+        '--sample-size', type=int, default=settings.audit_sample_size,
+        help='Сколько id нарушителей выводить на проверку и таблицу',
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> bool:
+    async with AsyncSessionLocal() as session:
+        report = await audit_investments(
+            session, args.chunk_size, args.sample_size
+        )
+    await engine.dispose()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return report['ok']
+
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.run(main(parse_args())) else 1)
@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.services.rollups import backfill_rollups
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Строит почасовые и посуточные сводки пожертвований по всей '
+            'истории, включая архив. Приложение может работать во время '
+            'пересчёта.'
+        )
+    )
+    parser.add_argument(
+        '--days', type=int, default=settings.rollup_backfill_days,
+        help='Длина отрезка истории, пересчитываемого одной транзакцией',
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace):
+    async with AsyncSessionLocal() as session:
+        stats = await backfill_rollups(
+            session, args.days,
+            on_progress=lambda stats: logging.info('Прогресс: %s', stats),
+        )
+    await engine.dispose()
+    print(f'Сводки построены: {stats}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,82 @@
+"""
+Замер числа SQL-запросов на аутентифицированный запрос с кэшем
+пользователей и без него.
+
+Запуск: python -m benchmarks.auth_queries --requests 1000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base, get_async_session
+from app.core.user_cache import user_cache
+from app.main import app
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'benchmark-password'
+
+
+def measure(client: TestClient, statements: list, requests: int,
+            cached: bool) -> tuple[float, float]:
+    statements.clear()
+    started = time.perf_counter()
+    for _ in range(requests):
+        if not cached:
+            user_cache.clear()
+        client.get('/donation/my')
+    elapsed = time.perf_counter() - started
+    return len(statements) / requests, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'auth.db'
+        Base.metadata.create_all(create_engine(f'sqlite:///{path}'))
+        engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+
+        async def override_session():
+            async with session_factory() as session:
+                yield session
+
+        statements = []
+        event.listen(
+            engine.sync_engine, 'before_cursor_execute',
+            lambda conn, cursor, statement, *rest: statements.append(
+                statement
+            ),
+        )
+        app.dependency_overrides = {get_async_session: override_session}
+        with TestClient(app) as client:
+            client.post(
+                '/auth/register', json={'email': EMAIL, 'password': PASSWORD}
+            )
+            token = client.post(
+                '/auth/jwt/login',
+                data={'username': EMAIL, 'password': PASSWORD},
+            ).json()['access_token']
+            client.headers['Authorization'] = f'Bearer {token}'
+            client.get('/donation/my')
+            for cached in (False, True):
+                queries, latency = measure(
+                    client, statements, args.requests, cached
+                )
+                print(
+                    f'{"С кэшем" if cached else "Без кэша"}: '
+                    f'{queries:.2f} запросов к базе, {latency:.2f} мс '
+                    'на запрос'
+                )
+        print(f'Кэш пользователей: {user_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
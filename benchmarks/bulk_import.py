@@ -0,0 +1,147 @@
+"""
+Замер пропускной способности пакетного импорта.
+
+В пустую базу загружаются проекты, затем пожертвования, которые
+их закрывают. Для сравнения столько же пожертвований (не больше
+--baseline-rows) создаётся по одному, как через POST /donation/.
+
+Запуск: python -m benchmarks.bulk_import --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import User
+from app.schemas.donation import DonationCreate
+from app.services.bulk_import import DonationImporter, ProjectImporter
+from app.services.investment import create_with_investment
+
+DONATION_AMOUNT = 100
+DONATIONS_PER_PROJECT = 10
+USER_ID = 1
+
+
+def create_database(path: Path):
+    Base.metadata.create_all(create_engine(f'sqlite:///{path}'))
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            'INSERT INTO user (id, email, hashed_password, is_active, '
+            'is_superuser, is_verified) '
+            "VALUES (?, 'bench@example.com', '', 1, 1, 1)",
+            (USER_ID,),
+        )
+
+
+def ndjson_chunks(rows):
+    async def chunks():
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(row))
+            if len(lines) == 1000:
+                yield ('\n'.join(lines) + '\n').encode()
+                lines = []
+        if lines:
+            yield '\n'.join(lines).encode()
+    return chunks()
+
+
+async def run_import(path: Path, rows: int, batch_size: int) -> dict:
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    projects = [
+        {
+            'name': f'project {number}',
+            'description': 'benchmark',
+            'full_amount': DONATION_AMOUNT * DONATIONS_PER_PROJECT,
+        }
+        for number in range(rows // DONATIONS_PER_PROJECT)
+    ]
+    donations = (
+        {'full_amount': DONATION_AMOUNT, 'comment': f'donation {number}'}
+        for number in range(rows)
+    )
+    timings = {}
+    async with session_factory() as session:
+        for name, importer, data in (
+            ('projects', ProjectImporter(session, batch_size=batch_size),
+             projects),
+            ('donations', DonationImporter(
+                session, batch_size=batch_size, user_id=USER_ID
+            ), donations),
+        ):
+            report = await importer.run(ndjson_chunks(data), 'ndjson')
+            timings[name] = report.progress()
+    await engine.dispose()
+    return timings
+
+
+async def run_one_by_one(path: Path, rows: int) -> float:
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        report = await ProjectImporter(session).run(ndjson_chunks([{
+            'name': 'baseline',
+            'description': 'benchmark',
+            'full_amount': DONATION_AMOUNT * rows,
+        }]), 'ndjson')
+        assert report.imported == 1
+    user = User(id=USER_ID)
+    started = time.perf_counter()
+    for number in range(rows):
+        async with session_factory() as session:
+            await create_with_investment(
+                donation_crud,
+                DonationCreate(full_amount=DONATION_AMOUNT),
+                charity_project_crud,
+                session,
+                user=user,
+            )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--baseline-rows', type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'import.db'
+        create_database(path)
+        timings = asyncio.run(run_import(path, args.rows, args.batch_size))
+        baseline_path = Path(directory) / 'baseline.db'
+        create_database(baseline_path)
+        baseline_rows = min(args.rows, args.baseline_rows)
+        elapsed = asyncio.run(run_one_by_one(baseline_path, baseline_rows))
+    for name, stats in timings.items():
+        print(
+            f'Импорт {name}: {stats["imported"]} строк за '
+            f'{stats["duration"]:.1f} с, '
+            f'{stats["rows_per_second"]:,.0f} строк/с, '
+            f'{stats["batches"]} пачек'
+        )
+    print(
+        f'По одному: {baseline_rows} пожертвований за {elapsed:.1f} с, '
+        f'{baseline_rows / elapsed:,.0f} строк/с'
+    )
+
+
+if __name__ == '__main__':
+    main()
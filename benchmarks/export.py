@@ -0,0 +1,85 @@
+"""
+Замер пропускной способности потоковой выгрузки пожертвований.
+
+Запуск: python -m benchmarks.export --rows 1000000 --format csv
+"""
+import argparse
+import asyncio
+import resource
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.crud.donation import donation_crud
+from app.models import Donation  # noqa
+from app.schemas.donation import DonationDB
+from app.services.export import export_rows
+
+
+def fill_database(path: Path, rows: int):
+    Base.metadata.create_all(create_engine(f'sqlite:///{path}'))
+    start = datetime(2020, 1, 1)
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            'INSERT INTO donation (full_amount, invested_amount, '
+            'fully_invested, create_date, version, user_id, comment) '
+            'VALUES (?, ?, ?, ?, 1, ?, ?)',
+            (
+                (
+                    100, 100, True,
+                    (start + timedelta(seconds=number)).isoformat(' '),
+                    number % 1000 + 1, f'donation {number}',
+                )
+                for number in range(rows)
+            ),
+        )
+
+
+async def run_export(path: Path, export_format: str) -> tuple[int, int]:
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    chunks = size = 0
+    async with session_factory() as session:
+        async for chunk in export_rows(
+            donation_crud, DonationDB, session, export_format
+        ):
+            chunks += 1
+            size += len(chunk)
+    await engine.dispose()
+    return chunks, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument(
+        '--format', choices=('ndjson', 'csv'), default='ndjson'
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'export.db'
+        started = time.perf_counter()
+        fill_database(path, args.rows)
+        print(f'Заполнение: {time.perf_counter() - started:.1f} с')
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        chunks, size = asyncio.run(run_export(path, args.format))
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f'Выгрузка {args.rows} строк ({args.format}): {elapsed:.1f} с, '
+        f'{args.rows / elapsed:,.0f} строк/с, {size / 2 ** 20:.1f} МиБ, '
+        f'{chunks} кусков, прирост RSS {(rss_after - rss_before) / 1024:.1f} '
+        'МиБ'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Замер p99 задержки GET /donation/ под одновременным потоком входов
+при хешировании паролей в цикле событий и в пуле потоков.
+
+Запуск: python -m benchmarks.password_hashing --requests 300 --logins 4
+"""
+import argparse
+import asyncio
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import user as user_module
+from app.core.config import settings
+from app.core.db import Base, get_async_session
+from app.core.password import PasswordHasher
+from app.main import app
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'benchmark-password'
+
+
+class InlineHasher(PasswordHasher):
+    """Хеширует прямо в цикле событий, как fastapi-users по умолчанию."""
+
+    def _run(self, func, *args):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(func(*args))
+        return future
+
+
+def percentile(values: list[float], share: float) -> float:
+    return statistics.quantiles(values, n=100)[int(share * 100) - 1]
+
+
+def run(client: TestClient, requests: int, logins: int) -> list[float]:
+    stop = threading.Event()
+
+    def login():
+        while not stop.is_set():
+            client.post(
+                '/auth/jwt/login',
+                data={'username': EMAIL, 'password': PASSWORD},
+            )
+
+    workers = [threading.Thread(target=login) for _ in range(logins)]
+    for worker in workers:
+        worker.start()
+    latencies = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get('/donation/')
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--logins', type=int, default=4)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'password.db'
+        Base.metadata.create_all(create_engine(f'sqlite:///{path}'))
+        engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+
+        async def override_session():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides = {get_async_session: override_session}
+        with TestClient(app) as client:
+            client.post(
+                '/auth/register', json={'email': EMAIL, 'password': PASSWORD}
+            )
+            with sqlite3.connect(path) as connection:
+                connection.execute('UPDATE user SET is_superuser = 1')
+            token = client.post(
+                '/auth/jwt/login',
+                data={'username': EMAIL, 'password': PASSWORD},
+            ).json()['access_token']
+            client.headers['Authorization'] = f'Bearer {token}'
+            for name, hasher_class in (
+                ('В цикле событий', InlineHasher),
+                ('В пуле потоков', PasswordHasher),
+            ):
+                hasher = hasher_class(
+                    settings.password_hash_rounds,
+                    settings.password_hash_workers,
+                )
+                user_module.password_hasher = hasher
+                latencies = run(client, args.requests, args.logins)
+                hasher.shutdown()
+                print(
+                    f'{name}: p50 {percentile(latencies, 0.5):.1f} мс, '
+                    f'p99 {percentile(latencies, 0.99):.1f} мс'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Замер смешанной нагрузки чтения и записи в SQLite в режиме WAL
+и с журналом отката по умолчанию.
+
+Запуск: python -m benchmarks.sqlite_journal --operations 5000 --writes 0.2
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.db import Base, create_tuned_engine
+from app.crud.donation import donation_crud
+from app.models import Donation, User
+
+
+async def worker(session_factory, operations: int, writes: float,
+                 latencies: list[float]):
+    for _ in range(operations):
+        started = time.perf_counter()
+        async with session_factory() as session:
+            if random.random() < writes:
+                session.add(Donation(
+                    full_amount=100, invested_amount=0, user_id=1
+                ))
+                await session.commit()
+            else:
+                await donation_crud.get_page(session, 100)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(path: Path, journal_mode: str, operations: int, writes: float,
+              concurrency: int) -> tuple[float, list[float]]:
+    sync_engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(sync_engine)
+    with Session(sync_engine) as session:
+        session.add(User(email='bench@example.com', hashed_password='-'))
+        session.commit()
+    settings.sqlite_journal_mode = journal_mode
+    engine = create_tuned_engine(f'sqlite+aiosqlite:///{path}')
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        worker(
+            session_factory, operations // concurrency, writes, latencies
+        )
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--writes', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for journal_mode in ('delete', 'wal'):
+            elapsed, latencies = asyncio.run(run(
+                Path(directory) / f'{journal_mode}.db', journal_mode,
+                args.operations, args.writes, args.concurrency,
+            ))
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(
+                f'{journal_mode}: {len(latencies) / elapsed:,.0f} операций/с, '
+                f'p50 {quantiles[49]:.1f} мс, p99 {quantiles[98]:.1f} мс'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import sys
+
+from app.core.db import AsyncSessionLocal, engine
+from app.services.reports import build_funding_speed_report, report_renderer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Отчёт о закрытых проектах, упорядоченных по скорости сбора '
+            'средств (close_date - create_date).'
+        )
+    )
+    parser.add_argument(
+        '--format', dest='report_format', choices=('csv', 'ndjson'),
+        default='csv',
+    )
+    parser.add_argument(
+        '--history', action='store_true',
+        help='Включить перенесённые в архив проекты',
+    )
+    parser.add_argument(
+        '--output', help='Файл для отчёта; по умолчанию stdout',
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace):
+    async with AsyncSessionLocal() as session:
+        report = await build_funding_speed_report(
+            session, args.report_format, args.history
+        )
+    report_renderer.shutdown()
+    await engine.dispose()
+    if args.output:
+        with open(args.output, 'wb') as output:
+            output.write(report)
+    else:
+        sys.stdout.buffer.write(report)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.services.bulk_import import IMPORTERS
+
+READ_SIZE = 1024 * 1024
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Загружает проекты или пожертвования из файла NDJSON или CSV '
+            'пачками, распределяя средства один раз на пачку.'
+        )
+    )
+    parser.add_argument('model', choices=IMPORTERS)
+    parser.add_argument('path', help='Файл для загрузки или - для stdin')
+    parser.add_argument(
+        '--format', choices=('ndjson', 'csv'),
+        help='Формат файла, по умолчанию по расширению',
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=settings.import_batch_size,
+        help='Число строк в одной транзакции',
+    )
+    parser.add_argument(
+        '--user-id', type=int,
+        help='Автор пожертвований, у которых не указан user_id',
+    )
+    return parser.parse_args()
+
+
+async def read_chunks(path: str):
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    with stream:
+        while chunk := stream.read(READ_SIZE):
+            yield chunk
+
+
+async def main(args: argparse.Namespace):
+    import_format = args.format or (
+        'csv' if Path(args.path).suffix.lower() == '.csv' else 'ndjson'
+    )
+    kwargs = {
+        'batch_size': args.batch_size,
+        'on_progress': lambda stats: logging.info('Прогресс: %s', stats),
+    }
+    if args.model == 'donation':
+        kwargs['user_id'] = args.user_id
+    async with AsyncSessionLocal() as session:
+        report = await IMPORTERS[args.model](session, **kwargs).run(
+            read_chunks(args.path), import_format
+        )
+    await engine.dispose()
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(asyncio.run(main(parse_args())))
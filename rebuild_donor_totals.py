@@ -0,0 +1,15 @@
+import asyncio
+
+from app.core.db import AsyncSessionLocal, engine
+from app.services.donor_totals import rebuild_donor_totals
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        donors = await rebuild_donor_totals(session)
+    await engine.dispose()
+    print(f'Итоги пересчитаны для {donors} пользователей')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
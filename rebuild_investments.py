@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.services.rebuild import rebuild_investments
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Пересчитывает invested_amount, fully_invested и close_date '
+            'проектов и пожертвований заново в порядке FIFO и строит '
+            'журнал переводов. Прерванный пересчёт продолжается '
+            'с последней точки. Пачки пишутся под блокировкой '
+            'распределения, а хвост открытых объектов и замена журнала — '
+            'одной транзакцией под ней; если приложение изменит '
+            'прочитанные строки, пересчёт остановится, и его нужно '
+            'запустить снова.'
+        )
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=settings.rebuild_chunk_size,
+        help='Размер пачки чтения и записи',
+    )
+    parser.add_argument(
+        '--reset', action='store_true',
+        help='Начать заново, не продолжая прерванный пересчёт',
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace):
+    async with AsyncSessionLocal() as session:
+        stats = await rebuild_investments(
+            session, args.chunk_size, reset=args.reset,
+            on_progress=lambda stats: logging.info('Прогресс: %s', stats),
+        )
+    await engine.dispose()
+    print(f'Пересчёт завершён: {stats}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    asyncio.run(main(parse_args()))
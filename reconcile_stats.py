@@ -0,0 +1,16 @@
+import asyncio
+import json
+
+from app.core.db import AsyncSessionLocal, engine
+from app.services.stats import reconcile_fund_stats
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        result = await reconcile_fund_stats(session)
+    await engine.dispose()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
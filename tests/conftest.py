@@ -16,7 +16,9 @@ except (NameError, ImportError) as error:
     )
 
 try:
-    from app.core.db import Base, get_async_session  # noqa
+    from app.core.db import (  # noqa
+        Base, create_tuned_engine, get_async_session, get_read_session
+    )
 except (NameError, ImportError) as error:
     raise AssertionError(
         'При импорте объектов `Base, get_async_session` '
@@ -48,6 +50,7 @@ BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
 pytest_plugins = [
     'fixtures.user',
     'fixtures.data',
+    'fixtures.queries',
 ]
 
 TEST_DB = BASE_DIR / 'test.db'
@@ -59,6 +62,11 @@ engine = create_async_engine(
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
 )
+# Чтение, как в приложении, идёт через отдельный пул в режиме query_only.
+read_engine = create_tuned_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+TestingReadSessionLocal = sessionmaker(
+    class_=AsyncSession, autocommit=False, autoflush=False, bind=read_engine,
+)
 
 
 async def override_db():
@@ -66,11 +74,19 @@ async def override_db():
         yield session
 
 
+async def override_read_db():
+    async with TestingReadSessionLocal() as session:
+        yield session
+
+
 @pytest_asyncio.fixture(autouse=True)
 async def init_db():
     async with engine.begin() as conn:
+        # test.db хранит схему до миграций: таблицы создаются заново.
+        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
     yield
+    await read_engine.dispose()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
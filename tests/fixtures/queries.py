@@ -0,0 +1,17 @@
+import pytest
+from conftest import engine, read_engine
+from sqlalchemy import event
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    for sync_engine in (engine.sync_engine, read_engine.sync_engine):
+        event.listen(sync_engine, 'before_cursor_execute', record)
+    yield executed
+    for sync_engine in (engine.sync_engine, read_engine.sync_engine):
+        event.remove(sync_engine, 'before_cursor_execute', record)
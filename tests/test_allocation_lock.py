@@ -0,0 +1,100 @@
+import asyncio
+import multiprocessing
+import random
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.db import Base
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.allocation_lock import lock_stats
+from app.services.investment import create_with_investment
+
+WORKERS = 4
+OPERATIONS = 30
+
+
+async def allocate(database_url, worker, operations):
+    engine = create_async_engine(
+        database_url, connect_args={'timeout': 30}
+    )
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    rnd = random.Random(worker)
+    for number in range(operations):
+        async with session_factory() as session:
+            if rnd.random() < 0.5:
+                await create_with_investment(
+                    charity_project_crud,
+                    CharityProjectCreate(
+                        name=f'{worker}-{number}', description='stress',
+                        full_amount=rnd.randint(1, 500),
+                    ),
+                    donation_crud,
+                    session,
+                )
+            else:
+                await create_with_investment(
+                    donation_crud,
+                    DonationCreate(full_amount=rnd.randint(1, 500)),
+                    charity_project_crud,
+                    session,
+                    user=User(id=1),
+                )
+    await engine.dispose()
+    return lock_stats.as_dict()
+
+
+def run_worker(args):
+    return asyncio.run(allocate(*args))
+
+
+def test_allocation_is_consistent_across_processes(tmp_path):
+    database = tmp_path / 'stress.db'
+    sync_engine = create_engine(f'sqlite:///{database}')
+    Base.metadata.create_all(sync_engine)
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(WORKERS) as pool:
+        stats = pool.map(run_worker, [
+            (f'sqlite+aiosqlite:///{database}', worker, OPERATIONS)
+            for worker in range(WORKERS)
+        ])
+    for worker_stats in stats:
+        assert worker_stats['acquired'] == OPERATIONS, (
+            'Каждая операция должна брать блокировку распределения.'
+        )
+        assert 0 <= worker_stats['max_wait'] <= worker_stats['total_wait'], (
+            'Статистика ожидания блокировки должна быть согласованной.'
+        )
+    with Session(sync_engine) as session:
+        totals = [
+            session.scalar(select(func.sum(model.invested_amount)))
+            for model in (CharityProject, Donation)
+        ]
+        open_counts = [
+            session.scalar(
+                select(func.count())
+                .where(model.fully_invested.is_(False))
+            )
+            for model in (CharityProject, Donation)
+        ]
+        mismatched = session.scalar(
+            select(func.count()).select_from(Donation).where(
+                Donation.fully_invested
+                != (Donation.invested_amount == Donation.full_amount)
+            )
+        )
+    assert totals[0] == totals[1], (
+        'Сумма, полученная проектами, должна совпадать с суммой, '
+        'вложенной пожертвованиями, при распределении из нескольких '
+        'процессов.'
+    )
+    assert 0 in open_counts, (
+        'Открытые проекты и открытые пожертвования не должны '
+        'существовать одновременно.'
+    )
+    assert mismatched == 0
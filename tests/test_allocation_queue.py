@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from conftest import TestingSessionLocal
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.allocation_queue import (
+    AllocationQueue,
+    AllocationQueueBusy,
+)
+from app.services.ledger import open_pool_ledger
+
+
+@pytest_asyncio.fixture
+async def queue(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_queue_window', 0.05)
+    queue = AllocationQueue()
+    queue.start(TestingSessionLocal)
+    yield queue
+    await queue.stop()
+
+
+async def test_concurrent_donations_are_batched(queue):
+    await queue.submit(
+        charity_project_crud,
+        CharityProjectCreate(name='queue', description='queue',
+                             full_amount=1000),
+        donation_crud,
+    )
+    user = User(id=2)
+    donations = await asyncio.gather(*[
+        queue.submit(
+            donation_crud, DonationCreate(full_amount=30),
+            charity_project_crud, user=user,
+        )
+        for _ in range(40)
+    ])
+    assert queue.batches < 1 + len(donations), (
+        'Запросы, пришедшие в пределах окна, должны выполняться '
+        'одной транзакцией.'
+    )
+    assert all(donation.id for donation in donations)
+    assert all(donation.user_id == 2 for donation in donations)
+    async with TestingSessionLocal() as session:
+        project = (await session.execute(select(CharityProject))).scalar()
+        invested = await session.scalar(
+            select(func.sum(Donation.invested_amount))
+        )
+    assert project.fully_invested and project.invested_amount == 1000
+    assert invested == 1000, (
+        'Сумма, вложенная пожертвованиями, должна совпадать с суммой, '
+        'полученной проектами.'
+    )
+    assert sum(not donation.fully_invested for donation in donations) == 7
+
+
+async def test_failed_request_does_not_break_batch(queue):
+    project = CharityProjectCreate(
+        name='same', description='same', full_amount=10
+    )
+    results = await asyncio.gather(
+        *[queue.submit(charity_project_crud, project, donation_crud)
+          for _ in range(2)],
+        return_exceptions=True,
+    )
+    assert sum(isinstance(result, CharityProject) for result in results) == 1
+    assert sum(isinstance(result, Exception) for result in results) == 1
+
+
+async def test_failure_after_commit_is_not_retried(queue, monkeypatch):
+    def broken_track(obj):
+        raise RuntimeError('after commit')
+
+    monkeypatch.setattr(open_pool_ledger, 'track', broken_track)
+    donations = await asyncio.gather(*[
+        queue.submit(
+            donation_crud, DonationCreate(full_amount=10),
+            charity_project_crud, user=User(id=2),
+        )
+        for _ in range(3)
+    ])
+    assert all(isinstance(donation, Donation) for donation in donations)
+    async with TestingSessionLocal() as session:
+        count = await session.scalar(select(func.count(Donation.id)))
+    assert count == 3, (
+        'Пачку, упавшую после фиксации, нельзя повторять по одному: '
+        'объекты создались бы второй раз.'
+    )
+
+
+async def test_stopped_queue_rejects_requests(queue):
+    await queue.stop()
+    with pytest.raises(AllocationQueueBusy):
+        await queue.submit(
+            donation_crud, DonationCreate(full_amount=1),
+            charity_project_crud, user=User(id=1),
+        )
@@ -0,0 +1,107 @@
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject
+from app.services.allocation_retry import (
+    AllocationConflict,
+    conflict_stats,
+    run_with_retries,
+)
+
+
+async def create_project():
+    async with TestingSessionLocal() as session:
+        project = CharityProject(
+            name='version', description='version', full_amount=100
+        )
+        session.add(project)
+        await session.flush()
+        project_id = project.id
+        await session.commit()
+        return project_id
+
+
+async def add_invested_amount(session, project_id, amount):
+    project = await session.get(CharityProject, project_id)
+    project.invested_amount += amount
+    await session.commit()
+
+
+async def test_stale_update_is_retried(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_retry_base_delay', 0)
+    project_id = await create_project()
+    conflicts = conflict_stats.conflicts
+    async with TestingSessionLocal() as session:
+        stale = await session.get(CharityProject, project_id)
+        async with TestingSessionLocal() as other_session:
+            await add_invested_amount(other_session, project_id, 10)
+
+        async def operation():
+            project = await session.get(CharityProject, project_id)
+            assert project is stale
+            project.invested_amount += 20
+            await session.commit()
+
+        await run_with_retries(operation, rollback=session.rollback)
+    assert conflict_stats.conflicts == conflicts + 1, (
+        'Обновление строки с устаревшей версией должно считаться '
+        'конфликтом.'
+    )
+    async with TestingSessionLocal() as session:
+        project = await session.get(CharityProject, project_id)
+        assert project.invested_amount == 30, (
+            'После повтора транзакции ни одно из изменений '
+            '`invested_amount` не должно потеряться.'
+        )
+        assert project.version == 3
+
+
+async def test_conflict_retries_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_retry_base_delay', 0)
+    monkeypatch.setattr(settings, 'allocation_max_retries', 2)
+    project_id = await create_project()
+    failures = conflict_stats.failures
+    async with TestingSessionLocal() as session:
+        async def operation():
+            project = await session.get(CharityProject, project_id)
+            async with TestingSessionLocal() as other_session:
+                await add_invested_amount(other_session, project_id, 1)
+            project.invested_amount += 1
+            await session.commit()
+
+        with pytest.raises(AllocationConflict):
+            await run_with_retries(operation, rollback=session.rollback)
+    assert conflict_stats.failures == failures + 1
+
+
+def test_allocation_metrics(superuser_client):
+    response = superuser_client.get('/allocation/metrics')
+    assert response.status_code == 200
+    assert set(response.json()['conflicts']) == {
+        'attempts', 'conflicts', 'retries', 'failures', 'conflict_rate',
+    }, 'Метрики должны показывать число повторов и долю конфликтов.'
+
+
+def test_allocation_metrics_usual_user(user_client):
+    response = user_client.get('/allocation/metrics')
+    assert response.status_code == 403
+
+
+async def test_bulk_update_checks_versions():
+    project_id = await create_project()
+    async with TestingSessionLocal() as session:
+        await charity_project_crud.add_invested_amounts(
+            session, {project_id: 10}, {project_id: 1}
+        )
+        with pytest.raises(StaleDataError):
+            await charity_project_crud.add_invested_amounts(
+                session, {project_id: 10}, {project_id: 1}
+            )
+        await session.commit()
+        project = await session.get(CharityProject, project_id)
+        assert (project.invested_amount, project.version) == (10, 2), (
+            'Пакетный UPDATE не должен менять строку с другой версией.'
+        )
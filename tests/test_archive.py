@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from conftest import TestingSessionLocal
+
+from app.services.archive import archiver
+
+PROJECTS_URL = '/charity_project/'
+DONATION_ALLOCATIONS_URL = '/donation/{donation_id}/allocations'
+DONORS_URL = '/charity_project/{project_id}/donors'
+
+
+@pytest.fixture
+def closed_history(freezer, mixer, charity_project):
+    freezer.move_to('2010-10-10')
+    project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='closed',
+        description='Funded long ago',
+        full_amount=100,
+        invested_amount=100,
+        fully_invested=True,
+        create_date=datetime.now(),
+        close_date=datetime.now(),
+    )
+    donation = mixer.blend(
+        'app.models.donation.Donation',
+        user__id=2,
+        full_amount=100,
+        invested_amount=100,
+        fully_invested=True,
+        create_date=datetime.now(),
+        close_date=datetime.now(),
+    )
+    mixer.blend(
+        'app.models.investment_allocation.InvestmentAllocation',
+        donation_id=donation.id,
+        project_id=project.id,
+        amount=100,
+        created_at=datetime.now(),
+    )
+    freezer.move_to('2012-01-01')
+    return project.id, donation.id
+
+
+@pytest_asyncio.fixture
+async def archived(closed_history):
+    await archiver.run(TestingSessionLocal)
+    return closed_history
+
+
+@pytest.mark.asyncio
+async def test_dry_run_moves_nothing(closed_history):
+    progress = await archiver.run(TestingSessionLocal, dry_run=True)
+    assert progress.candidates == {'donation': 1, 'charityproject': 1}
+    assert progress.moved == {'donation': 0, 'charityproject': 0}, (
+        'Пробный прогон архивации не должен переносить строки.'
+    )
+
+
+def test_archived_rows_leave_hot_tables(superuser_client, archived):
+    assert archiver.progress.moved == {'donation': 1, 'charityproject': 1}
+    names = [
+        project['name']
+        for project in superuser_client.get(PROJECTS_URL).json()
+    ]
+    assert names == ['chimichangas4life'], (
+        'Закрытые проекты старше archive_after_days должны уходить '
+        'из горячей таблицы, открытые — оставаться.'
+    )
+
+
+def test_history_includes_archive(superuser_client, archived):
+    response = superuser_client.get(
+        PROJECTS_URL, params={'history': True, 'with_total': True}
+    )
+    assert [project['name'] for project in response.json()] == [
+        'chimichangas4life', 'closed',
+    ], 'С history=true список должен включать архивные проекты.'
+    assert response.headers['X-Total-Count'] == '2'
+
+
+def test_archived_project_donors(superuser_client, archived):
+    project_id, donation_id = archived
+    response = superuser_client.get(DONORS_URL.format(project_id=project_id))
+    assert response.json() == [
+        {'user_id': 2, 'amount': 100, 'donations': 1},
+    ], 'Доноры архивного проекта должны читаться из архива журнала.'
+
+
+def test_archived_donation_allocations(user_client, archived):
+    project_id, donation_id = archived
+    response = user_client.get(
+        DONATION_ALLOCATIONS_URL.format(donation_id=donation_id)
+    )
+    assert response.status_code == 200
+    assert [
+        (item['project_name'], item['amount']) for item in response.json()
+    ] == [('closed', 100)]
+
+
+def test_archive_status_superuser_only(user_client):
+    assert user_client.get('/archive/status').status_code == 403
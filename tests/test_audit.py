@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+AUDIT_URL = '/allocation/audit'
+
+
+@pytest.fixture
+def broken_project(freezer, mixer):
+    freezer.move_to('2010-10-10')
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='broken',
+        description='Closed without money',
+        full_amount=100,
+        invested_amount=50,
+        fully_invested=True,
+        create_date=datetime.now(),
+    )
+
+
+def test_audit_clean_data(superuser_client, charity_project):
+    superuser_client.post('/charity_project/', json={
+        'name': 'new', 'description': 'new', 'full_amount': 10,
+    })
+    report = superuser_client.get(AUDIT_URL).json()
+    assert report['ok'] is True, (
+        f'Аудит согласованных данных не должен находить нарушений: {report}'
+    )
+
+
+def test_audit_reports_offenders(superuser_client, broken_project, donation):
+    report = superuser_client.get(AUDIT_URL).json()
+    checks = report['checks']
+    assert report['ok'] is False
+    assert checks['totals']['totals'] == {
+        'charityproject': 50, 'donation': 0,
+    }
+    assert checks['fully_invested']['ids'] == {
+        'charityproject': [broken_project.id],
+    }, 'Аудит должен называть id строк с неверным fully_invested.'
+    assert checks['close_date']['ids'] == {
+        'charityproject': [broken_project.id],
+    }
+    assert checks['open_pools']['ok'] is True
+
+
+def test_audit_reports_open_pools(superuser_client, charity_project,
+                                  donation):
+    checks = superuser_client.get(AUDIT_URL).json()['checks']
+    assert checks['open_pools'] == {
+        'ok': False,
+        'ids': {
+            'charityproject': [charity_project.id],
+            'donation': [donation.id],
+        },
+    }, 'Открытые проекты и пожертвования не должны существовать вместе.'
+
+
+def test_audit_superuser_only(user_client):
+    assert user_client.get(AUDIT_URL).status_code == 403
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import func, select
+
+from app.models import CharityProject, Donation, InvestmentAllocation
+from app.services.audit import audit_investments
+from app.services.bulk_import import ProjectImporter
+
+PROJECTS_IMPORT_URL = '/charity_project/import'
+DONATIONS_IMPORT_URL = '/donation/import'
+
+
+def ndjson(*rows) -> bytes:
+    return '\n'.join(
+        row if isinstance(row, str) else json.dumps(row) for row in rows
+    ).encode()
+
+
+async def read_amounts(model) -> list:
+    async with TestingSessionLocal() as session:
+        return (await session.execute(
+            select(model.full_amount, model.invested_amount,
+                   model.fully_invested)
+            .order_by(model.create_date, model.id)
+        )).all()
+
+
+@pytest.mark.asyncio
+async def test_import_projects(superuser_client, donation, another_donation):
+    response = superuser_client.post(PROJECTS_IMPORT_URL, data=ndjson(
+        {'name': 'first', 'description': 'first', 'full_amount': 150},
+        {'name': 'negative', 'description': 'bad', 'full_amount': -1},
+        '{not json',
+        {'name': 'second', 'description': 'second', 'full_amount': 5000},
+        {'name': 'first', 'description': 'again', 'full_amount': 10},
+    ))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report['rows'], report['imported'], report['failed']) == (
+        5, 2, 3
+    )
+    assert [error['line'] for error in report['errors']] == [2, 3, 5], (
+        'Отчёт должен называть номера отклонённых строк.'
+    )
+    assert report['errors'][2]['errors'][0]['loc'] == ['name']
+    assert await read_amounts(CharityProject) == [
+        (150, 150, True), (5000, 1950, False),
+    ], 'Пачка должна распределять средства в порядке FIFO.'
+    assert await read_amounts(Donation) == [
+        (100, 100, True), (2000, 2000, True),
+    ]
+    async with TestingSessionLocal() as session:
+        assert await session.scalar(
+            select(func.sum(InvestmentAllocation.amount))
+        ) == 2100, 'Переводы импорта должны попадать в журнал.'
+        audit = await audit_investments(session, 100, 10)
+    assert audit['ok'], audit
+
+
+@pytest.mark.asyncio
+async def test_import_donations_csv(superuser_client, charity_project, mixer):
+    mixer.blend('app.models.user.User', id=1)
+    content = (
+        'full_amount,comment,user_id\n'
+        '100,"two\nlines",\n'
+        '200,,1\n'
+        '300,,999\n'
+        'abc,,\n'
+    ).encode()
+    report = superuser_client.post(
+        DONATIONS_IMPORT_URL, params={'format': 'csv'}, data=content
+    ).json()
+    assert (report['imported'], report['failed']) == (2, 2)
+    assert [error['line'] for error in report['errors']] == [5, 6], (
+        'Отказы проверки и ошибки схемы должны идти в порядке строк файла.'
+    )
+    assert await read_amounts(CharityProject) == [(1000000, 300, False)]
+    async with TestingSessionLocal() as session:
+        comments = (await session.scalars(
+            select(Donation.comment).order_by(Donation.id)
+        )).all()
+    assert comments == ['two\nlines', None], (
+        'Поле CSV в кавычках может содержать перевод строки.'
+    )
+
+
+@pytest.mark.asyncio
+async def test_import_batches(charity_project):
+    rows = [
+        {'name': f'project {number}', 'description': 'x', 'full_amount': 1}
+        for number in range(25)
+    ]
+    progress = []
+
+    async def chunks():
+        data = ndjson(*rows)
+        for start in range(0, len(data), 7):
+            yield data[start:start + 7]
+
+    async with TestingSessionLocal() as session:
+        report = await ProjectImporter(
+            session, batch_size=10, on_progress=progress.append
+        ).run(chunks(), 'ndjson')
+    assert report.imported == 25
+    assert [stats['imported'] for stats in progress] == [10, 20, 25], (
+        'Импорт должен идти пачками и сообщать о ходе.'
+    )
+    async with TestingSessionLocal() as session:
+        names = (await session.scalars(
+            select(CharityProject.name)
+            .where(CharityProject.name.startswith('project '))
+            .order_by(CharityProject.create_date, CharityProject.id)
+        )).all()
+    assert names == [row['name'] for row in rows], (
+        'Порядок FIFO проектов из нескольких пачек должен совпадать '
+        'с порядком файла.'
+    )
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import delete, select, text
+
+from app.models import DonorTotals
+from app.services.donor_totals import rebuild_donor_totals
+
+DONATIONS_URL = '/donation/'
+SUMMARY_URL = DONATIONS_URL + 'my/summary'
+LEADERBOARD_URL = DONATIONS_URL + 'leaderboard'
+
+
+async def read_totals() -> list:
+    async with TestingSessionLocal() as session:
+        return (await session.execute(
+            select(
+                DonorTotals.user_id, DonorTotals.donations,
+                DonorTotals.amount, DonorTotals.invested,
+                DonorTotals.last_donation_date,
+            ).order_by(DonorTotals.user_id)
+        )).all()
+
+
+def test_summary_follows_donations(user_client, mixer):
+    assert user_client.get(SUMMARY_URL).json() == {
+        'donations': 0, 'amount': 0, 'invested': 0,
+        'last_donation_date': None,
+    }
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='summary',
+        description='summary',
+        full_amount=120,
+        create_date=datetime.now(),
+    )
+    for full_amount in (100, 50):
+        created = user_client.post(
+            DONATIONS_URL, json={'full_amount': full_amount}
+        ).json()
+    summary = user_client.get(SUMMARY_URL).json()
+    assert summary == {
+        'donations': 2, 'amount': 150, 'invested': 120,
+        'last_donation_date': created['create_date'],
+    }, 'Итоги должны обновляться при создании и распределении.'
+
+
+def test_leaderboard(superuser_client, donation, another_donation):
+    response = superuser_client.get(LEADERBOARD_URL, params={'limit': 1})
+    assert response.status_code == 200
+    leaders = response.json()
+    assert len(leaders) == 1
+    assert leaders[0]['user_id'] == another_donation.user_id
+    assert leaders[0]['amount'] == 2000
+    assert leaders[0]['email'], 'В рейтинге должен быть email пользователя.'
+    leaders = superuser_client.get(LEADERBOARD_URL).json()
+    assert [leader['amount'] for leader in leaders] == [2000, 100]
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_reads_index(mixer):
+    async with TestingSessionLocal() as session:
+        plan = (await session.execute(text(
+            'EXPLAIN QUERY PLAN SELECT user_id FROM donortotals '
+            'ORDER BY amount DESC, user_id LIMIT 10'
+        ))).all()
+    assert 'ix_donortotals_amount_user_id' in str(plan), (
+        'Рейтинг должен читаться по индексу, без сортировки таблицы.'
+    )
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_triggers(donation, another_donation):
+    expected = await read_totals()
+    assert [row.amount for row in expected] == [100, 2000]
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(DonorTotals))
+        await session.commit()
+        assert await rebuild_donor_totals(session) == 2
+    assert await read_totals() == expected, (
+        'Пересчёт должен давать те же итоги, что и триггеры.'
+    )
+
+
+def test_summary_fails_without_counter_triggers(user_client, monkeypatch):
+    monkeypatch.setattr('app.services.stats.COUNTER_DIALECTS', ('other',))
+    assert user_client.get(SUMMARY_URL).status_code == 501, (
+        'Без триггеров итоги должны отвечать ошибкой, а не нулями.'
+    )
@@ -0,0 +1,40 @@
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import create_tuned_engine, get_engine_report
+
+
+async def test_sqlite_pragmas_applied(tmp_path):
+    engine = create_tuned_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "tuned.db"}'
+    )
+    report = await get_engine_report(engine)
+    await engine.dispose()
+    assert report['journal_mode'] == 'wal', (
+        'Каждое соединение SQLite должно работать в режиме WAL.'
+    )
+    assert report['synchronous'] == 1
+    assert report['busy_timeout'] == 5000
+    assert report['cache_size'] == -64000
+    assert report['pool'] == 'AsyncAdaptedQueuePool', (
+        'Для файла SQLite должен использоваться пул соединений.'
+    )
+
+
+async def test_session_checkout_is_lazy(tmp_path):
+    engine = create_tuned_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "lazy.db"}'
+    )
+    checkouts = []
+    event.listen(
+        engine.sync_engine, 'checkout',
+        lambda *args: checkouts.append(args),
+    )
+    async with sessionmaker(engine, class_=AsyncSession)() as session:
+        assert not checkouts, (
+            'Сессия не должна брать соединение до первого запроса.'
+        )
+        await session.execute(text('SELECT 1'))
+        assert len(checkouts) == 1
+    await engine.dispose()
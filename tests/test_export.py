@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+import pytest
+
+DONATIONS_EXPORT_URL = '/donation/export'
+PROJECTS_EXPORT_URL = '/charity_project/export'
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_export_donations_ndjson(superuser_client):
+    response = superuser_client.get(DONATIONS_EXPORT_URL)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['comment'] for row in rows] == [
+        'To you for chimichangas', 'From admin'
+    ], 'Выгрузка должна содержать все пожертвования в порядке создания.'
+    assert set(rows[0]) == {
+        'id', 'user_id', 'full_amount', 'create_date', 'invested_amount',
+        'fully_invested', 'close_date', 'comment',
+    }
+    assert rows[0]['create_date'] == '2011-11-11T00:00:00'
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_export_donations_csv_filtered(superuser_client):
+    response = superuser_client.get(DONATIONS_EXPORT_URL, params={
+        'format': 'csv', 'create_date_from': '2012-01-01T00:00:00',
+    })
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1 and rows[0]['comment'] == 'From admin'
+
+
+@pytest.mark.usefixtures('charity_project', 'small_fully_charity_project')
+def test_export_projects_by_close_date(superuser_client):
+    response = superuser_client.get(PROJECTS_EXPORT_URL, params={
+        'close_date_from': '2010-10-11T00:00:00',
+    })
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['name'] for row in rows] == ['1M$ for ur project'], (
+        'Фильтр по `close_date` должен оставлять только закрытые проекты.'
+    )
+
+
+def test_export_csv_header_only(superuser_client):
+    response = superuser_client.get(
+        PROJECTS_EXPORT_URL, params={'format': 'csv'}
+    )
+    assert response.text.splitlines() == [
+        'name,description,full_amount,id,invested_amount,fully_invested,'
+        'create_date,close_date'
+    ]
+
+
+@pytest.mark.parametrize('url', [DONATIONS_EXPORT_URL, PROJECTS_EXPORT_URL])
+def test_export_usual_user(user_client, url):
+    assert user_client.get(url).status_code == 403
@@ -1,5 +1,7 @@
 import pytest
 
+from app.core.config import settings
+
 DONATION_URL = '/donation/'
 PROJECTS_URL = '/charity_project/'
 
@@ -60,3 +62,19 @@ def test_donation_to_little_invest_project(
     )
     assert not charity_project_nunchaku.fully_invested, common_asser_msg
     assert charity_project_nunchaku.invested_amount == 0, common_asser_msg
+
+
+def test_donation_spans_open_projects_batches(
+        user_client, monkeypatch, charity_project_little_invested,
+        charity_project_nunchaku
+):
+    monkeypatch.setattr(settings, 'investment_batch_size', 1)
+    user_client.post(DONATION_URL, json={'full_amount': 1000000})
+    assert charity_project_little_invested.fully_invested, (
+        'Пожертвование должно закрыть первый открытый проект, даже если '
+        'открытые проекты выбираются из базы пачками.'
+    )
+    assert charity_project_nunchaku.invested_amount == 100, (
+        'Остаток пожертвования должен перейти в следующий по дате '
+        'создания открытый проект из следующей пачки.'
+    )
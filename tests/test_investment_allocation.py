@@ -0,0 +1,44 @@
+DONATIONS_URL = '/donation/'
+ALLOCATIONS_URL = '/donation/{donation_id}/allocations'
+DONORS_URL = '/charity_project/{project_id}/donors'
+
+
+def test_donation_allocations(user_client, charity_project):
+    donation_id = user_client.post(
+        DONATIONS_URL, json={'full_amount': 100}
+    ).json()['id']
+    response = user_client.get(ALLOCATIONS_URL.format(donation_id=donation_id))
+    assert response.status_code == 200
+    data = response.json()
+    for allocation in data:
+        allocation.pop('created_at')
+    assert data == [{
+        'project_id': charity_project.id,
+        'project_name': charity_project.name,
+        'amount': 100,
+    }], 'Пожертвование должно показывать, в какие проекты ушли средства.'
+
+
+def test_foreign_donation_allocations_hidden(user_client, another_donation):
+    response = user_client.get(
+        ALLOCATIONS_URL.format(donation_id=another_donation.id)
+    )
+    assert response.status_code == 404, (
+        'Переводы чужого пожертвования не должны быть доступны.'
+    )
+
+
+def test_project_donors(superuser_client, donation, another_donation):
+    project_id = superuser_client.post('/charity_project/', json={
+        'name': 'new', 'description': 'new', 'full_amount': 500,
+    }).json()['id']
+    response = superuser_client.get(DONORS_URL.format(project_id=project_id))
+    assert response.json() == [
+        {'user_id': another_donation.user_id, 'amount': 400, 'donations': 1},
+        {'user_id': donation.user_id, 'amount': 100, 'donations': 1},
+    ], 'Список доноров проекта должен суммировать переводы по пользователям.'
+
+
+def test_project_donors_superuser_only(user_client, charity_project):
+    response = user_client.get(DONORS_URL.format(project_id=1))
+    assert response.status_code == 403
@@ -0,0 +1,90 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import Base, TestingSessionLocal, engine
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation, InvestmentAllocation
+from app.services.investment import invest
+
+FIXED_SCENARIOS = [
+    [('project', 1000), ('donation', 300), ('donation', 800),
+     ('project', 500), ('donation', 2000), ('project', 100)],
+    [('donation', 100), ('donation', 200), ('donation', 300),
+     ('project', 450), ('project', 150), ('project', 1)],
+    [('project', 10), ('project', 10), ('project', 10),
+     ('donation', 25), ('donation', 5), ('donation', 1)],
+]
+
+
+def random_scenario(seed, length=60):
+    rnd = random.Random(seed)
+    return [
+        (rnd.choice(('project', 'donation')), rnd.randint(1, 1000))
+        for _ in range(length)
+    ]
+
+
+async def run_scenario(steps):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    start = datetime(2020, 1, 1)
+    async with TestingSessionLocal() as session:
+        for number, (kind, amount) in enumerate(steps):
+            if kind == 'project':
+                obj = CharityProject(
+                    name=f'project {number}', description='parity',
+                    full_amount=amount,
+                )
+                sources_crud = donation_crud
+            else:
+                obj = Donation(user_id=1, full_amount=amount)
+                sources_crud = charity_project_crud
+            # Одинаковые даты проверяют разрешение ничьих по id.
+            obj.create_date = start + timedelta(minutes=number // 2)
+            session.add(obj)
+            await session.commit()
+            await session.refresh(obj)
+            session.add_all(await invest(obj, sources_crud, session))
+            await session.commit()
+        state = {}
+        for model in (CharityProject, Donation):
+            rows = await session.execute(
+                select(
+                    model.id, model.invested_amount,
+                    model.fully_invested, model.close_date,
+                ).order_by(model.id)
+            )
+            state[model.__tablename__] = rows.all()
+        rows = await session.execute(
+            select(
+                InvestmentAllocation.donation_id,
+                InvestmentAllocation.project_id,
+                InvestmentAllocation.amount,
+            )
+        )
+        state['investment_allocation'] = sorted(rows.all())
+    return state
+
+
+@pytest.mark.parametrize(
+    'steps',
+    FIXED_SCENARIOS + [random_scenario(seed) for seed in range(5)],
+)
+async def test_python_and_sql_engines_parity(freezer, monkeypatch, steps):
+    freezer.move_to('2021-01-01')
+    monkeypatch.setattr(settings, 'investment_engine', 'python')
+    python_state = await run_scenario(steps)
+    monkeypatch.setattr(settings, 'investment_engine', 'sql')
+    sql_state = await run_scenario(steps)
+    assert python_state == sql_state, (
+        'Распределение средствами SQL должно давать те же '
+        '`invested_amount`, `fully_invested`, `close_date` и журнал '
+        'переводов, что и распределение на Python.'
+    )
+    assert any(row[2] for row in sql_state['charityproject'])
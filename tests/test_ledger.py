@@ -0,0 +1,96 @@
+import pytest_asyncio
+from conftest import TestingSessionLocal
+
+from app.core.config import settings
+from app.models import CharityProject, Donation
+from app.services.allocation_retry import conflict_stats
+from app.services.ledger import OpenPool, open_pool_ledger
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest_asyncio.fixture
+async def ledger(charity_project, charity_project_nunchaku):
+    async with TestingSessionLocal() as session:
+        await open_pool_ledger.warm(session)
+    yield open_pool_ledger
+    open_pool_ledger.ready = False
+
+
+@pytest_asyncio.fixture
+async def donation_ledger(donation):
+    async with TestingSessionLocal() as session:
+        await open_pool_ledger.warm(session)
+    yield open_pool_ledger
+    open_pool_ledger.ready = False
+
+
+def test_open_pool_fifo_take_and_give_back():
+    pool = OpenPool()
+    pool.put(2, 2, 50)
+    pool.put(1, 1, 30)
+    taken = pool.take(40)
+    assert taken == [((1, 1), 30), ((2, 2), 10)], (
+        'Пул должен списывать суммы с самых старых объектов.'
+    )
+    assert 1 not in pool and len(pool) == 1
+    pool.give_back(taken)
+    assert pool.take(100) == [((1, 1), 30), ((2, 2), 50)], (
+        'После отката списания пул должен вернуться в исходное состояние.'
+    )
+
+
+def test_donation_allocated_from_ledger(
+        user_client, ledger, charity_project, charity_project_nunchaku
+):
+    user_client.post(DONATION_URL, json={'full_amount': 1000100})
+    assert charity_project.fully_invested, (
+        'Распределение через резидентный пул должно закрыть первый проект.'
+    )
+    assert charity_project.close_date is not None
+    assert charity_project_nunchaku.invested_amount == 100
+    assert not charity_project_nunchaku.fully_invested
+    assert charity_project.id not in ledger.pools[CharityProject]
+    assert ledger.pools[CharityProject].take(10**9) == [(
+        (charity_project_nunchaku.create_date, charity_project_nunchaku.id),
+        4999900,
+    )], 'Пул должен хранить актуальный остаток незакрытого проекта.'
+
+
+def test_project_allocated_from_ledger(superuser_client, donation_ledger):
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'ledger', 'description': 'ledger', 'full_amount': 60,
+    })
+    data = response.json()
+    assert data['fully_invested'] and data['invested_amount'] == 60, (
+        'Новый проект должен получить средства открытого пожертвования '
+        'из резидентного пула.'
+    )
+    donations = donation_ledger.pools[Donation]
+    assert [part for _, part in donations.take(10**9)] == [40], (
+        'В пуле должен остаться остаток частично вложенного пожертвования.'
+    )
+    response = superuser_client.get(DONATION_URL)
+    assert response.json()[0]['invested_amount'] == 60
+
+
+async def test_ledger_recovers_from_stale_versions(
+        user_client, ledger, charity_project, monkeypatch
+):
+    monkeypatch.setattr(settings, 'allocation_retry_base_delay', 0)
+    async with TestingSessionLocal() as session:
+        # Изменение в обход пула: версия строки в пуле устаревает.
+        project = await session.get(CharityProject, charity_project.id)
+        project.description = 'changed past the ledger'
+        await session.commit()
+    conflicts = conflict_stats.conflicts
+    response = user_client.post(DONATION_URL, json={'full_amount': 100})
+    assert response.status_code == 200
+    assert conflict_stats.conflicts == conflicts + 1
+    async with TestingSessionLocal() as session:
+        project = await session.get(CharityProject, charity_project.id)
+        assert (project.invested_amount, project.version) == (100, 3), (
+            'После конфликта версий пул должен перечитать строку, '
+            'а повтор — распределить средства.'
+        )
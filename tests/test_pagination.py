@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+DONATION_URL = '/donation/'
+MY_DONATIONS_URL = '/donation/my'
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest.fixture
+def many_donations(mixer):
+    start = datetime(2020, 1, 1)
+    return [
+        mixer.blend(
+            'app.models.donation.Donation',
+            user_id=2 if number % 2 else 1,
+            comment=str(number),
+            full_amount=100,
+            invested_amount=100 if number < 2 else 0,
+            fully_invested=number < 2,
+            create_date=start + timedelta(days=number // 2),
+        )
+        for number in range(7)
+    ]
+
+
+def collect_pages(client, url, limit, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = {'limit': limit, **params}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get(url, params=query)
+        assert response.status_code == 200
+        ids += [item['id'] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return ids, pages
+
+
+def test_donations_keyset_pages(superuser_client, many_donations):
+    ids, pages = collect_pages(superuser_client, DONATION_URL, 3)
+    expected = [
+        donation.id for donation in
+        sorted(many_donations, key=lambda d: (d.create_date, d.id))
+    ]
+    assert ids == expected, (
+        'Постраничный обход по курсору должен вернуть все пожертвования '
+        'ровно один раз в порядке (create_date, id).'
+    )
+    assert pages == 3
+
+
+def test_donations_filters(superuser_client, many_donations):
+    ids, _ = collect_pages(
+        superuser_client, DONATION_URL, 2, fully_invested=False,
+        create_date_from='2020-01-02T00:00:00',
+        create_date_to='2020-01-04T00:00:00',
+    )
+    assert ids == [
+        donation.id for donation in many_donations[2:6]
+    ], 'Фильтры по `fully_invested` и датам создания должны применяться.'
+
+
+def test_my_donations_pages(user_client, many_donations):
+    ids, _ = collect_pages(user_client, MY_DONATIONS_URL, 1)
+    assert ids == [
+        donation.id for donation in many_donations if donation.user_id == 2
+    ], 'Пользователь должен видеть только свои пожертвования.'
+
+
+def test_total_count_header(superuser_client, many_donations):
+    response = superuser_client.get(
+        DONATION_URL, params={'limit': 1, 'with_total': True}
+    )
+    assert response.headers['X-Total-Count'] == '7'
+    response = superuser_client.get(DONATION_URL, params={'limit': 1})
+    assert 'X-Total-Count' not in response.headers
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': 'not-a-cursor'},
+    {'limit': 0},
+    {'limit': 100000},
+])
+def test_invalid_page_params(user_client, params):
+    response = user_client.get(PROJECTS_URL, params=params)
+    assert response.status_code == 422
@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+
+import pytest
+from conftest import TEST_DB, app, get_async_session, override_db
+from fastapi.testclient import TestClient
+
+from app.core import user as user_module
+from app.core.password import PasswordHasher
+
+REGISTER_URL = '/auth/register'
+LOGIN_URL = '/auth/jwt/login'
+CREDENTIALS = {'username': 'dead@pool.com', 'password': 'chimichangas4life'}
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    with TestClient(app) as client:
+        yield client
+
+
+def use_hasher(monkeypatch, rounds: int) -> PasswordHasher:
+    hasher = PasswordHasher(rounds, 1)
+    monkeypatch.setattr(user_module, 'password_hasher', hasher)
+    return hasher
+
+
+def stored_hash() -> str:
+    with sqlite3.connect(TEST_DB) as connection:
+        return connection.execute(
+            'SELECT hashed_password FROM user'
+        ).fetchone()[0]
+
+
+async def test_hash_runs_in_pool():
+    hasher = PasswordHasher(4, 1)
+    threads = []
+    original = hasher.context.hash
+
+    def record(password):
+        threads.append(threading.current_thread())
+        return original(password)
+
+    hasher.context.hash = record
+    hashed = await hasher.hash('secret')
+    hasher.shutdown()
+    assert threads and threads[0] is not threading.main_thread(), (
+        'Хеширование пароля должно выполняться вне цикла событий.'
+    )
+    assert (await PasswordHasher(4, 1).verify_and_update(
+        'secret', hashed
+    )) == (True, None)
+
+
+def test_rehash_on_login_when_cost_changes(client, monkeypatch):
+    use_hasher(monkeypatch, 4)
+    client.post(REGISTER_URL, json={
+        'email': CREDENTIALS['username'],
+        'password': CREDENTIALS['password'],
+    })
+    assert stored_hash().startswith('$2b$04$')
+    use_hasher(monkeypatch, 5)
+    response = client.post(LOGIN_URL, data=CREDENTIALS)
+    assert response.status_code == 200
+    assert stored_hash().startswith('$2b$05$'), (
+        'При входе хеш пароля со старой стоимостью должен пересчитываться.'
+    )
+    wrong = client.post(
+        LOGIN_URL, data={**CREDENTIALS, 'password': 'wrong'}
+    )
+    assert wrong.status_code == 400
@@ -0,0 +1,38 @@
+import pytest_asyncio
+from conftest import TestingSessionLocal
+
+from app.services.project_names import project_names
+
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest_asyncio.fixture
+async def warm_names(charity_project):
+    async with TestingSessionLocal() as session:
+        await project_names.warm(session)
+    yield project_names
+    project_names.ready = False
+
+
+def test_known_duplicate_rejected_without_queries(superuser_client,
+                                                  warm_names, statements):
+    statements.clear()
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life', 'description': 'new', 'full_amount': 10,
+    })
+    assert response.status_code == 400
+    assert not statements, (
+        'Известный дубликат имени должен отклоняться без запросов к базе.'
+    )
+
+
+def test_renamed_project_frees_name(superuser_client, warm_names):
+    superuser_client.patch(PROJECTS_URL + '1', json={'name': 'renamed'})
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life', 'description': 'new', 'full_amount': 10,
+    })
+    assert response.status_code == 200, (
+        'После переименования проекта его прежнее имя должно освобождаться.'
+    )
+    assert warm_names.is_taken('renamed')
+    assert warm_names.is_taken('renamed', project_id=1) is False
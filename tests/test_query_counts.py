@@ -0,0 +1,45 @@
+PROJECTS_URL = '/charity_project/'
+DONATIONS_URL = '/donation/'
+
+
+def check_statements(statements, expected, url):
+    kinds = [statement.split()[0] for statement in statements]
+    assert kinds == expected, (
+        f'Запрос к эндпоинту `{url}` должен выполнять ровно '
+        f'{len(expected)} SQL-запросов: {expected}, а выполнил {kinds}.'
+    )
+
+
+def test_create_project_queries(superuser_client, donation, statements):
+    statements.clear()
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'new', 'description': 'new', 'full_amount': 10 ** 6,
+    })
+    assert response.json()['invested_amount'] == donation.full_amount
+    # Блокировка, открытые пожертвования, вставка проекта с итоговой
+    # суммой, обновление пожертвования и запись перевода в журнал;
+    # имя проверяет индекс.
+    check_statements(
+        statements, ['BEGIN', 'SELECT', 'INSERT', 'UPDATE', 'INSERT'],
+        PROJECTS_URL,
+    )
+
+
+def test_create_donation_queries(user_client, charity_project, statements):
+    statements.clear()
+    response = user_client.post(DONATIONS_URL, json={'full_amount': 10})
+    assert response.json()['full_amount'] == 10
+    check_statements(
+        statements, ['BEGIN', 'SELECT', 'UPDATE', 'INSERT', 'INSERT'],
+        DONATIONS_URL,
+    )
+
+
+def test_update_project_queries(superuser_client, charity_project,
+                                statements):
+    statements.clear()
+    response = superuser_client.patch(
+        PROJECTS_URL + '1', json={'name': 'renamed'}
+    )
+    assert response.json()['name'] == 'renamed'
+    check_statements(statements, ['SELECT', 'UPDATE'], PROJECTS_URL + '1')
@@ -0,0 +1,57 @@
+import pytest
+from conftest import override_read_db
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from app.api.endpoints.donation import recent_donors
+from app.core.db import create_tuned_engine, get_read_session, read_engine
+from app.models import CharityProject
+
+
+async def test_read_session_uses_read_engine():
+    sessions = get_read_session()
+    read_session = await sessions.__anext__()
+    assert read_session.bind is read_engine, (
+        'Чтение должно идти через отдельный движок только для чтения.'
+    )
+    await sessions.aclose()
+
+
+async def test_read_session_rejects_writes(charity_project):
+    sessions = override_read_db()
+    read_session = await sessions.__anext__()
+    assert await read_session.scalar(
+        select(CharityProject.name)
+    ) == charity_project.name
+    with pytest.raises(OperationalError):
+        await read_session.execute(text(
+            "UPDATE charityproject SET name = 'renamed'"
+        ))
+    await sessions.aclose()
+
+
+async def test_read_engine_is_query_only(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "read.db"}'
+    engine = create_tuned_engine(url)
+    async with engine.begin() as connection:
+        await connection.execute(text('CREATE TABLE item (id INTEGER)'))
+    read_only = create_tuned_engine(url, read_only=True)
+    async with read_only.connect() as connection:
+        assert await connection.scalar(
+            text('SELECT count(*) FROM item')
+        ) == 0
+        with pytest.raises(OperationalError):
+            await connection.execute(text('INSERT INTO item VALUES (1)'))
+    await read_only.dispose()
+    await engine.dispose()
+
+
+def test_donation_marks_recent_donor(user_client, charity_project):
+    recent_donors.clear()
+    user_client.post('/donation/', json={'full_amount': 10})
+    assert recent_donors.get(2), (
+        'После создания пожертвования список пользователя должен '
+        'читаться из основной базы.'
+    )
+    response = user_client.get('/donation/my')
+    assert [donation['full_amount'] for donation in response.json()] == [10]
@@ -0,0 +1,57 @@
+import pytest
+from datetime import datetime
+
+PROJECT_URL = '/charity_project/1'
+
+
+@pytest.fixture
+def empty_project(freezer, mixer):
+    freezer.move_to('2010-10-10')
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='empty',
+        description='Waiting for donations',
+        full_amount=10,
+        invested_amount=0,
+        fully_invested=False,
+        create_date=datetime.now(),
+    )
+
+
+def test_lowered_amount_closes_project(superuser_client,
+                                       charity_project_little_invested):
+    response = superuser_client.patch(PROJECT_URL, json={'full_amount': 100})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['fully_invested'] is True, (
+        'Если новая сумма равна уже вложенной, проект должен закрываться '
+        'сразу при редактировании.'
+    )
+    assert data['close_date'] is not None
+
+
+def test_raised_amount_pulls_fifo_donations(superuser_client, empty_project,
+                                            donation, another_donation,
+                                            statements):
+    statements.clear()
+    response = superuser_client.patch(PROJECT_URL, json={'full_amount': 150})
+    data = response.json()
+    assert data['invested_amount'] == 150, (
+        'При увеличении суммы проект должен добирать разницу из открытых '
+        'пожертвований.'
+    )
+    assert data['fully_invested'] is True
+    assert [statement.split()[0] for statement in statements] == [
+        'BEGIN', 'SELECT', 'SELECT', 'UPDATE', 'UPDATE', 'UPDATE', 'INSERT',
+    ], (
+        'Изменение суммы должно выполняться в одной транзакции под '
+        'блокировкой и обновлять каждую строку одним запросом.'
+    )
+    donations = {
+        item['id']: item for item in superuser_client.get('/donation/').json()
+    }
+    assert donations[donation.id]['fully_invested'] is True
+    assert donations[another_donation.id]['invested_amount'] == 50, (
+        'Пожертвования должны забираться в порядке FIFO и только '
+        'на недостающую сумму.'
+    )
@@ -0,0 +1,223 @@
+from datetime import datetime
+
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import (
+    CharityProject, Donation, InvestmentAllocation, RebuildCheckpoint, User
+)
+from app.schemas.donation import DonationCreate
+from app.services.allocation_lock import lock_stats
+from app.services.investment import create_with_investment
+from app.services.rebuild import InvestmentRebuild, rebuild_investments
+
+
+@pytest.fixture
+def drifted(freezer, mixer):
+    """Проект и пожертвования с испорченными суммами инвестиций."""
+    for date, model, full_amount in (
+        ('2010-10-10', 'charity_project.CharityProject', 100),
+        ('2011-11-11', 'donation.Donation', 60),
+        ('2012-12-12', 'donation.Donation', 80),
+    ):
+        freezer.move_to(date)
+        fields = {'name': date, 'description': date} if 'project' in model \
+            else {}
+        mixer.blend(
+            f'app.models.{model}',
+            full_amount=full_amount,
+            invested_amount=full_amount,
+            fully_invested=True,
+            create_date=datetime.now(),
+            close_date=datetime.now(),
+            **fields,
+        )
+
+
+async def get_state(model):
+    async with TestingSessionLocal() as session:
+        rows = await session.execute(
+            select(
+                model.invested_amount, model.fully_invested, model.close_date
+            ).order_by(model.id)
+        )
+        return [tuple(row) for row in rows]
+
+
+EXPECTED_PROJECTS = [(100, True, datetime(2010, 10, 10))]
+EXPECTED_DONATIONS = [
+    (60, True, datetime(2011, 11, 11)),
+    (40, False, None),
+]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_restores_fifo_state(drifted):
+    async with TestingSessionLocal() as session:
+        stats = await rebuild_investments(session, chunk_size=1)
+    assert await get_state(CharityProject) == EXPECTED_PROJECTS
+    assert await get_state(Donation) == EXPECTED_DONATIONS, (
+        'Пересчёт должен распределять пожертвования по проектам в порядке '
+        'FIFO и открывать недовложенные объекты.'
+    )
+    assert stats['corrected'] == 1
+    async with TestingSessionLocal() as session:
+        stats = await rebuild_investments(session, chunk_size=1)
+    assert stats['corrected'] == 0, 'Повторный пересчёт ничего не меняет.'
+
+
+@pytest.mark.asyncio
+async def test_rebuild_resumes_from_checkpoint(drifted, monkeypatch):
+    flush = InvestmentRebuild.flush
+    calls = []
+
+    async def interrupted_flush(self, *args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError('interrupted')
+        await flush(self, *args, **kwargs)
+
+    monkeypatch.setattr(InvestmentRebuild, 'flush', interrupted_flush)
+    with pytest.raises(RuntimeError):
+        async with TestingSessionLocal() as session:
+            await rebuild_investments(session, chunk_size=1)
+    monkeypatch.undo()
+    async with TestingSessionLocal() as session:
+        assert await session.scalar(select(RebuildCheckpoint.state)), (
+            'После каждой пачки должна сохраняться точка продолжения.'
+        )
+        stats = await rebuild_investments(session, chunk_size=1)
+    assert stats['projects'] == 1 and stats['donations'] == 2, (
+        'Продолженный пересчёт не должен заново проходить посчитанные '
+        'объекты.'
+    )
+    assert await get_state(CharityProject) == EXPECTED_PROJECTS
+    assert await get_state(Donation) == EXPECTED_DONATIONS
+    async with TestingSessionLocal() as session:
+        assert await session.scalar(select(RebuildCheckpoint)) is None
+
+
+@pytest.mark.asyncio
+async def test_rebuild_restores_journal(drifted):
+    async with TestingSessionLocal() as session:
+        session.add(InvestmentAllocation(
+            donation_id=2, project_id=1, amount=80
+        ))
+        await session.commit()
+        stats = await rebuild_investments(session, chunk_size=1)
+        journal = (await session.execute(
+            select(
+                InvestmentAllocation.donation_id,
+                InvestmentAllocation.project_id,
+                InvestmentAllocation.amount,
+                InvestmentAllocation.created_at,
+            ).order_by(InvestmentAllocation.id)
+        )).all()
+    assert journal == [
+        (1, 1, 60, datetime(2011, 11, 11)),
+        (2, 1, 40, datetime(2012, 12, 12)),
+    ], 'Журнал переводов должен совпадать с пересчитанным распределением.'
+    assert stats['journal_rows'] == 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_locks_batches_and_checks_versions(drifted,
+                                                        monkeypatch):
+    # Первое пожертвование тоже испорчено: его исправление пишется
+    # до хвоста, который идёт под блокировкой до конца прогона.
+    async with TestingSessionLocal() as session:
+        await session.execute(
+            update(Donation).where(Donation.id == 1)
+            .values(invested_amount=50, fully_invested=False)
+        )
+        await session.commit()
+    acquired = lock_stats.acquired
+    flush = InvestmentRebuild.flush
+
+    async def flush_after_concurrent_write(self, *args, **kwargs):
+        # Приложение меняет строку после того, как пересчёт её прочитал.
+        if self.pending[Donation]:
+            async with TestingSessionLocal() as other_session:
+                donation = await other_session.get(
+                    Donation, self.pending[Donation][0]['obj_id']
+                )
+                donation.comment = 'concurrent'
+                await other_session.commit()
+        await flush(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        InvestmentRebuild, 'flush', flush_after_concurrent_write
+    )
+    with pytest.raises(StaleDataError):
+        async with TestingSessionLocal() as session:
+            await rebuild_investments(session, chunk_size=1)
+    assert lock_stats.acquired > acquired, (
+        'Пачки пересчёта должны писаться под блокировкой распределения.'
+    )
+    monkeypatch.undo()
+    async with TestingSessionLocal() as session:
+        await rebuild_investments(session, chunk_size=1)
+    assert await get_state(Donation) == EXPECTED_DONATIONS, (
+        'Перезапуск после конфликта должен довести пересчёт до конца.'
+    )
+
+
+async def read_journal() -> list:
+    async with TestingSessionLocal() as session:
+        return (await session.execute(
+            select(
+                InvestmentAllocation.donation_id,
+                InvestmentAllocation.project_id,
+                InvestmentAllocation.amount,
+            ).order_by(InvestmentAllocation.id)
+        )).all()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_concurrent_transfers_once(freezer, mixer,
+                                                       monkeypatch):
+    mixer.blend('app.models.user.User', id=1)
+    for date, model, full_amount, invested_amount in (
+        ('2010-01-01', 'charity_project.CharityProject', 50, 50),
+        ('2010-02-02', 'charity_project.CharityProject', 50, 50),
+        ('2011-01-01', 'donation.Donation', 100, 100),
+        ('2012-01-01', 'charity_project.CharityProject', 100, 0),
+    ):
+        freezer.move_to(date)
+        fields = {'name': date, 'description': date} if 'project' in model \
+            else {'user_id': 1}
+        mixer.blend(
+            f'app.models.{model}',
+            full_amount=full_amount,
+            invested_amount=invested_amount,
+            fully_invested=full_amount == invested_amount,
+            create_date=datetime.now(),
+            close_date=datetime.now() if invested_amount else None,
+            **fields,
+        )
+    flush = InvestmentRebuild.flush
+
+    async def flush_then_donate(self, *args, **kwargs):
+        await flush(self, *args, **kwargs)
+        if self.stats['batches'] == 1:
+            # Приложение закрывает проект, до которого пересчёт
+            # ещё не дошёл, и пишет перевод в рабочий журнал.
+            freezer.move_to('2013-01-01')
+            async with TestingSessionLocal() as other_session:
+                await create_with_investment(
+                    donation_crud, DonationCreate(full_amount=30),
+                    charity_project_crud, other_session, user=User(id=1),
+                )
+
+    monkeypatch.setattr(InvestmentRebuild, 'flush', flush_then_donate)
+    async with TestingSessionLocal() as session:
+        stats = await rebuild_investments(session, chunk_size=1)
+    assert stats['corrected'] == 0
+    assert await read_journal() == [(1, 1, 50), (1, 2, 50), (2, 3, 30)], (
+        'Перевод, сделанный приложением во время пересчёта, должен '
+        'попасть в журнал ровно один раз.'
+    )
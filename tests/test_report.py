@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.services.reports import report_renderer
+
+REPORT_URL = '/charity_project/report'
+
+
+@pytest.fixture
+def funded_projects(mixer):
+    for name, created, closed in (
+        ('slow', '2010-01-01', '2010-03-01'),
+        ('fast', '2010-02-01', '2010-02-02'),
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=name,
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime.fromisoformat(created),
+            close_date=datetime.fromisoformat(closed),
+        )
+
+
+def test_report_ranks_by_speed(superuser_client, funded_projects,
+                               charity_project):
+    response = superuser_client.get(REPORT_URL)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row['name'] for row in rows] == ['fast', 'slow'], (
+        'Отчёт должен содержать только закрытые проекты, от самого '
+        'быстро собранного к самому долгому.'
+    )
+    assert rows[0]['duration'] == '1 day, 0:00:00'
+    assert float(rows[0]['duration_seconds']) == 86400
+
+
+def test_report_ndjson_in_worker_process(superuser_client, funded_projects,
+                                         monkeypatch):
+    monkeypatch.setattr(report_renderer, 'threshold', 0)
+    response = superuser_client.get(REPORT_URL, params={'format': 'ndjson'})
+    report_renderer.shutdown()
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['name'] for row in rows] == ['fast', 'slow'], (
+        'Большой отчёт должен отрисовываться в процессе пула с тем же '
+        'результатом.'
+    )
+
+
+def test_report_cached_by_projects_version(superuser_client,
+                                           funded_projects):
+    response = superuser_client.get(REPORT_URL)
+    etag = response.headers['ETag']
+    cached = superuser_client.get(REPORT_URL, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    superuser_client.post('/charity_project/', json={
+        'name': 'new', 'description': 'new', 'full_amount': 10,
+    })
+    assert superuser_client.get(REPORT_URL).headers['ETag'] != etag, (
+        'Изменение проектов должно сбрасывать кэш отчёта.'
+    )
+
+
+def test_report_superuser_only(user_client):
+    assert user_client.get(REPORT_URL).status_code == 403
@@ -0,0 +1,112 @@
+from sqlalchemy.orm import object_session
+
+from app.api.response_cache import response_cache
+
+PROJECTS_URL = '/charity_project/'
+PROJECT_DETAILS_URL = PROJECTS_URL + '{project_id}'
+
+
+def test_projects_list_etag(superuser_client, charity_project):
+    response = superuser_client.get(PROJECTS_URL)
+    etag = response.headers['ETag']
+    hits = response_cache.hits
+    cached = superuser_client.get(PROJECTS_URL)
+    assert cached.json() == response.json()
+    assert response_cache.hits == hits + 1, (
+        'Повторный запрос списка проектов без изменений должен '
+        'обслуживаться из кэша.'
+    )
+    not_modified = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+
+
+def test_projects_list_invalidated_on_create(superuser_client,
+                                             charity_project):
+    etag = superuser_client.get(PROJECTS_URL).headers['ETag']
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'new', 'description': 'new', 'full_amount': 10,
+    })
+    response = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'Создание проекта должно менять версию списка проектов.'
+    )
+    assert response.headers['ETag'] != etag
+    assert [project['name'] for project in response.json()] == [
+        'chimichangas4life', 'new'
+    ]
+
+
+def test_projects_version_tracks_direct_writes(superuser_client,
+                                               charity_project):
+    etag = superuser_client.get(PROJECTS_URL).headers['ETag']
+    charity_project.invested_amount = 10
+    object_session(charity_project).commit()
+    response = superuser_client.get(PROJECTS_URL)
+    assert response.headers['ETag'] != etag, (
+        'Изменение проекта в обход API тоже должно менять версию.'
+    )
+    assert response.json()[0]['invested_amount'] == 10
+
+
+def test_project_details(user_client, charity_project):
+    url = PROJECT_DETAILS_URL.format(project_id=charity_project.id)
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert response.json()['name'] == 'chimichangas4life'
+    not_modified = user_client.get(
+        url, headers={'If-None-Match': response.headers['ETag']}
+    )
+    assert not_modified.status_code == 304
+    assert user_client.get(
+        PROJECT_DETAILS_URL.format(project_id=100500)
+    ).status_code == 404
+
+
+def test_projects_list_total_follows_version(superuser_client,
+                                            charity_project):
+    params = {'with_total': True}
+    assert superuser_client.get(
+        PROJECTS_URL, params=params
+    ).headers['X-Total-Count'] == '1'
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'new', 'description': 'new', 'full_amount': 10,
+    })
+    response = superuser_client.get(PROJECTS_URL, params=params)
+    assert len(response.json()) == 2
+    assert response.headers['X-Total-Count'] == '2', (
+        'Число проектов в закэшированном ответе должно соответствовать '
+        'той же версии таблицы, что и тело.'
+    )
+
+
+def test_cached_project_details_skip_project_load(user_client,
+                                                  charity_project,
+                                                  statements):
+    url = PROJECT_DETAILS_URL.format(project_id=charity_project.id)
+    response = user_client.get(url)
+    statements.clear()
+    assert user_client.get(url).json() == response.json()
+    assert statements, 'Существование проекта проверяется запросом к базе.'
+    assert not any(
+        'charityproject.description' in statement
+        for statement in statements
+    ), 'При попадании в кэш проект целиком не читается.'
+
+
+def test_missing_project_ignores_if_none_match(user_client, charity_project):
+    url = PROJECT_DETAILS_URL.format(project_id=charity_project.id)
+    etag = user_client.get(url).headers['ETag']
+    missing_url = PROJECT_DETAILS_URL.format(project_id=999)
+    for if_none_match in ('*', etag):
+        response = user_client.get(
+            missing_url, headers={'If-None-Match': if_none_match}
+        )
+        assert response.status_code == 404, (
+            'Для несуществующего проекта ответ 404, а не 304.'
+        )
+        assert response.json() == {'detail': 'Project not found'}
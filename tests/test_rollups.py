@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import delete, insert, select
+
+from app.models.donation_rollup import ROLLUPS
+from app.services.archive import archiver
+from app.services.rollups import backfill_rollups
+
+ROLLUPS_URL = '/stats/donations'
+DONATIONS_URL = '/donation/'
+
+
+async def read_rollups() -> dict:
+    async with TestingSessionLocal() as session:
+        return {
+            bucket: (await session.execute(
+                select(
+                    rollup.start, rollup.donations,
+                    rollup.amount, rollup.invested,
+                ).order_by(rollup.start)
+            )).all()
+            for bucket, rollup in ROLLUPS.items()
+        }
+
+
+def test_rollups_follow_donations(user_client, mixer):
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='rollup',
+        description='rollup',
+        full_amount=120,
+        create_date=datetime.now(),
+    )
+    for full_amount in (100, 50, 30):
+        user_client.post(DONATIONS_URL, json={'full_amount': full_amount})
+    now = datetime.now()
+    for bucket in ROLLUPS:
+        response = user_client.get(ROLLUPS_URL, params={
+            'from': (now - timedelta(hours=2)).isoformat(),
+            'to': (now + timedelta(hours=2)).isoformat(),
+            'bucket': bucket,
+        })
+        assert response.status_code == 200
+        rows = response.json()
+        assert [
+            sum(row[field] for row in rows)
+            for field in ('donations', 'amount', 'invested')
+        ] == [3, 180, 120], (
+            'Сводка должна учитывать создание и распределение пожертвований.'
+        )
+
+
+def test_rollups_reject_long_ranges(user_client):
+    response = user_client.get(ROLLUPS_URL, params={
+        'from': '2020-01-01T00:00:00', 'to': '2021-01-01T00:00:00',
+        'bucket': 'hour',
+    })
+    assert response.status_code == 422, (
+        'Почасовая сводка за год должна отклоняться.'
+    )
+    response = user_client.get(ROLLUPS_URL, params={
+        'from': '2020-01-02T00:00:00', 'to': '2020-01-01T00:00:00',
+    })
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_backfill_matches_triggers(freezer, mixer, donation,
+                                         another_donation):
+    freezer.move_to('2010-10-10')
+    mixer.blend(
+        'app.models.donation.Donation',
+        user__id=3,
+        full_amount=100,
+        invested_amount=100,
+        fully_invested=True,
+        create_date=datetime.now(),
+        close_date=datetime.now(),
+    )
+    expected = await read_rollups()
+    assert expected['hour'] == [
+        (datetime(2010, 10, 10), 1, 100, 100),
+        (datetime(2011, 11, 11), 1, 100, 0),
+        (datetime(2012, 12, 12), 1, 2000, 0),
+    ]
+    assert expected['day'] == expected['hour']
+    freezer.move_to('2030-01-01')
+    progress = await archiver.run(TestingSessionLocal)
+    assert progress.moved['donation'] == 1
+    assert await read_rollups() == expected, (
+        'Перенос в архив не должен менять сводки.'
+    )
+    async with TestingSessionLocal() as session:
+        for rollup in ROLLUPS.values():
+            await session.execute(delete(rollup))
+            await session.execute(insert(rollup).values(
+                start=datetime(1999, 1, 1), donations=7, amount=7,
+                invested=7,
+            ))
+        await session.commit()
+        stats = await backfill_rollups(session, days=100)
+    assert stats['chunks'] == stats['total_chunks'] > 2
+    assert await read_rollups() == expected, (
+        'Пересчёт должен строить сводки по истории, включая архив.'
+    )
+
+
+def test_rollups_fail_without_counter_triggers(user_client, monkeypatch):
+    monkeypatch.setattr('app.services.stats.COUNTER_DIALECTS', ('other',))
+    response = user_client.get(ROLLUPS_URL, params={
+        'from': '2024-01-01T00:00:00', 'to': '2024-01-02T00:00:00',
+    })
+    assert response.status_code == 501, (
+        'Без триггеров сводка пожертвований должна отвечать ошибкой.'
+    )
@@ -0,0 +1,80 @@
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import func, select, text
+
+from app.models import FundStats
+from app.models.fund_stats import STATS_SHARDS
+from app.services.archive import archiver
+from app.services.stats import get_fund_stats, reconcile_fund_stats
+
+STATS_URL = '/stats/'
+PROJECTS_URL = '/charity_project/'
+
+
+def test_stats_follow_creates_and_deletes(superuser_client, donation,
+                                          another_donation):
+    for name, full_amount in (('new', 500), ('big', 5000)):
+        superuser_client.post(PROJECTS_URL, json={
+            'name': name, 'description': name, 'full_amount': full_amount,
+        })
+    stats = superuser_client.get(STATS_URL).json()
+    assert stats['projects'] == {
+        'total': 2, 'open': 1, 'closed': 1, 'goal': 5500, 'invested': 2100,
+    }
+    assert stats['donations'] == {
+        'total': 2, 'open': 0, 'closed': 2, 'amount': 2100,
+        'invested': 2100, 'waiting': 0, 'average_amount': 1050,
+    }, 'Сводка должна обновляться вместе с созданием и распределением.'
+    project_id = superuser_client.post(PROJECTS_URL, json={
+        'name': 'spare', 'description': 'spare', 'full_amount': 10,
+    }).json()['id']
+    superuser_client.delete(PROJECTS_URL + str(project_id))
+    projects = superuser_client.get(STATS_URL).json()['projects']
+    assert projects['total'] == 2 and projects['goal'] == 5500, (
+        'Удалённый проект должен исчезать из сводки.'
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_sharded(mixer):
+    async with TestingSessionLocal() as session:
+        assert await session.scalar(
+            select(func.count()).select_from(FundStats)
+        ) == STATS_SHARDS
+
+
+@pytest.mark.asyncio
+async def test_archiving_keeps_stats(closed_charity_project, freezer):
+    freezer.move_to('2030-01-01')
+    async with TestingSessionLocal() as session:
+        before = await get_fund_stats(session)
+    progress = await archiver.run(TestingSessionLocal)
+    assert progress.moved['charityproject'] == 1
+    async with TestingSessionLocal() as session:
+        assert await get_fund_stats(session) == before, (
+            'Перенос в архив не должен менять сводку фонда.'
+        )
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_drift(charity_project, donation):
+    async with TestingSessionLocal() as session:
+        await session.execute(text(
+            'UPDATE fundstats SET donations = donations + 5 WHERE id = 3'
+        ))
+        await session.commit()
+        result = await reconcile_fund_stats(session)
+    assert result['before']['donations'] == 6
+    assert result['after']['donations'] == 1, (
+        'Сверка должна пересчитывать сводку по базовым таблицам.'
+    )
+    assert result['after']['projects'] == 1
+
+
+def test_stats_fail_without_counter_triggers(user_client, monkeypatch):
+    monkeypatch.setattr('app.services.stats.COUNTER_DIALECTS', ('other',))
+    response = user_client.get(STATS_URL)
+    assert response.status_code == 501, (
+        'Без триггеров сводка должна отвечать ошибкой, а не нулями.'
+    )
+    assert 'sqlite' in response.json()['detail']
@@ -0,0 +1,65 @@
+import pytest
+from conftest import app, get_async_session, override_db
+from fastapi.testclient import TestClient
+
+from app.core.user_cache import user_cache
+
+REGISTER_URL = '/auth/register'
+LOGIN_URL = '/auth/jwt/login'
+ME_URL = '/users/me'
+CACHE_URL = '/auth/cache'
+
+
+@pytest.fixture
+def auth_client():
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    user_cache.clear()
+    with TestClient(app) as client:
+        client.post(REGISTER_URL, json={
+            'email': 'dead@pool.com', 'password': 'chimichangas4life',
+        })
+        token = client.post(LOGIN_URL, data={
+            'username': 'dead@pool.com', 'password': 'chimichangas4life',
+        }).json()['access_token']
+        client.headers['Authorization'] = f'Bearer {token}'
+        yield client
+
+
+def test_user_lookup_cached(auth_client, statements):
+    first = auth_client.get(ME_URL)
+    assert first.status_code == 200
+    lookups = len(statements)
+    hits = user_cache.hits
+    second = auth_client.get(ME_URL)
+    assert second.json() == first.json()
+    assert user_cache.hits == hits + 1, (
+        'Повторный запрос с тем же токеном должен находить пользователя '
+        'в кэше.'
+    )
+    assert len(statements) == lookups, (
+        'При попадании в кэш пользователь не должен читаться из базы.'
+    )
+
+
+def test_user_cache_invalidated_on_update(auth_client):
+    auth_client.get(ME_URL)
+    response = auth_client.patch(ME_URL, json={'email': 'wade@pool.com'})
+    assert response.status_code == 200
+    misses = user_cache.misses
+    assert auth_client.get(ME_URL).json()['email'] == 'wade@pool.com', (
+        'После изменения пользователя кэш должен отдавать свежие данные.'
+    )
+    assert user_cache.misses == misses + 1
+
+
+def test_user_cache_rejects_invalid_token(auth_client):
+    response = auth_client.get(
+        ME_URL, headers={'Authorization': 'Bearer invalid'}
+    )
+    assert response.status_code == 401
+
+
+def test_user_cache_stats_superuser_only(auth_client):
+    response = auth_client.get(CACHE_URL)
+    assert response.status_code == 403